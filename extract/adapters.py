@@ -0,0 +1,263 @@
+"""
+Adaptadores de origen para la extracción del SGP
+
+- MySQLSourceAdapter: el OLTP real (config/db_config.py)
+- SQLiteSourceAdapter: base SQLite local creada desde DB/BD_SGP.sql, para
+  ejecutar y medir el ETL en un portátil o en CI sin MySQL
+
+Las consultas del ETL están escritas en dialecto MySQL. El adaptador SQLite
+devuelve una conexión que traduce ese dialecto (DATEDIFF, IFNULL, CURDATE,
+tablas temporales, parámetros %s, TRUNCATE, ON DUPLICATE KEY UPDATE) y expone
+el mismo subconjunto de la API de mysql-connector que usan SGPExtractor y
+DWLoader. Con schema_path=DB/DW_SSD.sql sirve también como DW local.
+"""
+
+import os
+import re
+import sqlite3
+import logging
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Tablas del SGP (para estadísticas de tamaño)
+SGP_TABLES = [
+    'clientes', 'empleados', 'contratos', 'proyectos', 'hitos', 'tareas',
+    'asignaciones', 'pruebas', 'errores', 'riesgos', 'gastos', 'penalizaciones'
+]
+
+DB_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "DB")
+DEFAULT_SGP_SCHEMA = os.path.join(DB_DIR, "BD_SGP.sql")
+DEFAULT_DW_SCHEMA = os.path.join(DB_DIR, "DW_SSD.sql")
+
+class SourceAdapter:
+    """Interfaz de un origen de datos para SGPExtractor"""
+
+    name = "base"
+
+    def connect(self):
+        """Abrir una conexión nueva (una por worker en modo paralelo)"""
+        raise NotImplementedError
+
+    def get_table_sizes(self, connection) -> Dict[str, int]:
+        """Filas aproximadas por tabla (para programar primero las más grandes)"""
+        return {}
+
+class MySQLSourceAdapter(SourceAdapter):
+    """Origen MySQL configurado en config/db_config.py"""
+
+    name = "mysql"
+
+    def __init__(self, db_type: str = "OLTP"):
+        self.db_type = db_type
+
+    def connect(self):
+        from utils.helpers import get_connection
+        return get_connection(self.db_type)
+
+    def get_table_sizes(self, connection) -> Dict[str, int]:
+        cursor = connection.cursor()
+        cursor.execute("""
+            SELECT TABLE_NAME, TABLE_ROWS
+            FROM information_schema.TABLES
+            WHERE TABLE_SCHEMA = DATABASE()
+        """)
+        sizes = {name: rows or 0 for name, rows in cursor.fetchall()}
+        cursor.close()
+        return sizes
+
+# ================= DIALECTO MySQL -> SQLite =================
+
+def _replace_function(query: str, name: str, build) -> str:
+    """Reemplazar NAME(arg1, arg2, ...) respetando paréntesis anidados"""
+    pattern = re.compile(rf"\b{name}\s*\(", re.IGNORECASE)
+    while True:
+        match = pattern.search(query)
+        if not match:
+            return query
+        depth, args, start = 1, [], match.end()
+        i = start
+        while depth:
+            char = query[i]
+            if char == '(':
+                depth += 1
+            elif char == ')':
+                depth -= 1
+            elif char == ',' and depth == 1:
+                args.append(query[start:i].strip())
+                start = i + 1
+            i += 1
+        args.append(query[start:i - 1].strip())
+        query = query[:match.start()] + build(args) + query[i:]
+
+def translate_mysql_to_sqlite(query: str) -> str:
+    """Traducir las construcciones MySQL usadas por el ETL a SQLite"""
+    stripped = query.strip().upper()
+    if stripped.startswith(("FLUSH TABLES", "UNLOCK TABLES")):
+        # SQLite no tiene bloqueo global; cada BEGIN ya es un snapshot consistente
+        return "SELECT 1"
+    if stripped.startswith("SET FOREIGN_KEY_CHECKS"):
+        return f"PRAGMA foreign_keys = {'ON' if stripped.endswith('1') else 'OFF'}"
+
+    # Carga al DW: TRUNCATE y upsert por PK
+    query = re.sub(r"^\s*TRUNCATE\s+TABLE\s+", "DELETE FROM ", query, flags=re.IGNORECASE)
+    if re.search(r"\sON\s+DUPLICATE\s+KEY\s+UPDATE\s", query, re.IGNORECASE):
+        query = re.sub(r"\sON\s+DUPLICATE\s+KEY\s+UPDATE\s.*$", "", query, flags=re.IGNORECASE | re.DOTALL)
+        query = re.sub(r"^\s*INSERT\s+INTO\s+", "INSERT OR REPLACE INTO ", query, flags=re.IGNORECASE)
+
+    query = re.sub(r"DROP\s+TEMPORARY\s+TABLE\s+IF\s+EXISTS\s+(\w+)",
+                   r"DROP TABLE IF EXISTS temp.\1", query, flags=re.IGNORECASE)
+    query = re.sub(r"\bCURDATE\s*\(\s*\)", "DATE('now')", query, flags=re.IGNORECASE)
+    query = re.sub(r"\bIFNULL\s*\(", "COALESCE(", query, flags=re.IGNORECASE)
+    query = _replace_function(
+        query, "DATEDIFF",
+        lambda args: f"CAST(julianday({args[0]}) - julianday({args[1]}) AS INTEGER)"
+    )
+    return query.replace("%s", "?")
+
+def mysql_ddl_to_sqlite(ddl: str) -> List[str]:
+    """
+    Convertir un script DDL de MySQL (DB/BD_SGP.sql) a sentencias SQLite:
+    sin DATABASE/USE, sin AUTO_INCREMENT y con los INDEX en línea
+    convertidos a CREATE INDEX
+    """
+    ddl = re.sub(r"--[^\n]*", "", ddl)
+    statements = []
+    for statement in ddl.split(';'):
+        statement = statement.strip()
+        if not statement or re.match(r"(DROP|CREATE)\s+DATABASE|USE\s", statement, re.IGNORECASE):
+            continue
+
+        statement = re.sub(r"\s+AUTO_INCREMENT", "", statement, flags=re.IGNORECASE)
+        table = re.match(r"CREATE\s+TABLE\s+(\w+)", statement, re.IGNORECASE)
+        indexes = []
+        if table:
+            for name, columns in re.findall(r"^\s*INDEX\s+(\w+)\s*\(([^)]*)\),?\s*$", statement, re.MULTILINE):
+                indexes.append(f"CREATE INDEX {name} ON {table.group(1)} ({columns})")
+            statement = re.sub(r"^\s*INDEX\s+\w+\s*\([^)]*\),?\s*$\n?", "", statement, flags=re.MULTILINE)
+            statement = re.sub(r",\s*\)\s*$", "\n)", statement)
+
+        statements.append(statement)
+        statements.extend(indexes)
+    return statements
+
+class SQLiteCursor:
+    """Cursor SQLite con la API de mysql-connector que usa el extractor"""
+
+    def __init__(self, cursor: sqlite3.Cursor):
+        self._cursor = cursor
+
+    def execute(self, query: str, params=None):
+        self._cursor.execute(translate_mysql_to_sqlite(query), params or ())
+        return self
+
+    def executemany(self, query: str, seq_params):
+        self._cursor.executemany(translate_mysql_to_sqlite(query), seq_params)
+        return self
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    def fetchmany(self, size: Optional[int] = None):
+        return self._cursor.fetchmany(size or self._cursor.arraysize)
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    @property
+    def column_names(self):
+        return tuple(d[0] for d in self._cursor.description or ())
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    def close(self):
+        self._cursor.close()
+
+class SQLiteConnection:
+    """Conexión SQLite con la API de mysql-connector que usa el extractor"""
+
+    # Los cursores SQLite no dejan resultados pendientes en la conexión
+    unread_result = False
+
+    def __init__(self, connection: sqlite3.Connection):
+        self._connection = connection
+        self._closed = False
+
+    def cursor(self, buffered: Optional[bool] = None, **kwargs) -> SQLiteCursor:
+        return SQLiteCursor(self._connection.cursor())
+
+    def start_transaction(self, consistent_snapshot: bool = False,
+                          isolation_level: Optional[str] = None, readonly: Optional[bool] = None):
+        if not self._connection.in_transaction:
+            self._connection.execute("BEGIN")
+
+    def consume_results(self):
+        pass
+
+    def is_connected(self) -> bool:
+        return not self._closed
+
+    def commit(self):
+        self._connection.commit()
+
+    def rollback(self):
+        self._connection.rollback()
+
+    def close(self):
+        self._connection.close()
+        self._closed = True
+
+class SQLiteSourceAdapter(SourceAdapter):
+    """
+    Origen SQLite local con el esquema del SGP (DB/BD_SGP.sql).
+    Si el archivo no existe se crea con las tablas vacías.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, db_path: str = "logs/sgp_local.sqlite", schema_path: str = DEFAULT_SGP_SCHEMA):
+        self.db_path = db_path
+        self.schema_path = schema_path
+        if not os.path.exists(db_path):
+            self.create_schema()
+
+    def _raw_connect(self) -> sqlite3.Connection:
+        # check_same_thread=False: cada conexión se usa desde un único worker a la vez
+        connection = sqlite3.connect(self.db_path, check_same_thread=False)
+        connection.execute("PRAGMA journal_mode = WAL")
+        return connection
+
+    def create_schema(self):
+        """Crear las tablas del SGP a partir del DDL de MySQL"""
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        with open(self.schema_path, 'r', encoding='utf-8') as f:
+            statements = mysql_ddl_to_sqlite(f.read())
+
+        connection = self._raw_connect()
+        try:
+            for statement in statements:
+                connection.execute(statement)
+        finally:
+            connection.close()
+        logger.info(f"Base SQLite del SGP creada en {self.db_path} ({len(statements)} sentencias)")
+
+    def connect(self) -> SQLiteConnection:
+        return SQLiteConnection(self._raw_connect())
+
+    def get_table_sizes(self, connection) -> Dict[str, int]:
+        cursor = connection.cursor()
+        sizes = {}
+        for table_name in SGP_TABLES:
+            cursor.execute(f"SELECT COUNT(*) FROM {table_name}")
+            sizes[table_name] = cursor.fetchone()[0]
+        cursor.close()
+        return sizes
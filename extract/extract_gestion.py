@@ -5,6 +5,9 @@ REGLAS DE NEGOCIO:
 1. SOLO se extraen datos de proyectos con Estado = 'Cerrado' OR 'Cancelado'
 2. O de contratos con Estado = 'Cerrado' OR 'Cancelado'  
 3. CARGA INCREMENTAL: Solo registros nuevos desde última extracción
+   (marca de agua por tabla, ver WATERMARKS). Los proyectos y contratos que
+   entraron al alcance desde la extracción anterior se extraen completos
+   (claves del alcance en utils/scope_keys.py)
 4. Esta regla se aplica en cascada a todas las tablas relacionadas
 
 """
@@ -12,8 +15,12 @@ REGLAS DE NEGOCIO:
 import mysql.connector
 import pandas as pd
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import partial
+from queue import Queue
+import threading
 import logging
-from typing import Dict, Any
+from typing import Dict, Any, List, Iterator, Tuple, Optional
 import sys
 import os
 
@@ -21,25 +28,262 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from config.db_config import DB_OLTP
-from utils.helpers import get_connection
-from utils.incremental_control import IncrementalControl
+from utils.incremental_control import IncrementalControl, DEFAULT_CONTROL_PATH
+from utils.scope_keys import ScopeKeysStore, DEFAULT_SCOPE_PATH
+from utils.snapshot_cache import SnapshotCache, ExtractionCheckpoint, DEFAULT_SNAPSHOT_DIR, DEFAULT_CHECKPOINT_DIR
+from extract.schema import apply_schema
+from extract.adapters import SourceAdapter, MySQLSourceAdapter
+from transform.registry import get_source_columns, resolve_targets
 
 # Configurar logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Orden lógico de extracción (maestros -> planificación -> calidad -> riesgos -> finanzas)
+EXTRACTION_ORDER = [
+    'clientes', 'empleados', 'contratos', 'proyectos',
+    'hitos', 'tareas', 'asignaciones',
+    'pruebas', 'errores',
+    'riesgos',
+    'gastos', 'penalizaciones'
+]
+
+# Prioridad por volumen esperado cuando no hay estadísticas del servidor
+# (las tablas más grandes se programan primero en modo paralelo)
+DEFAULT_SIZE_PRIORITY = [
+    'asignaciones', 'tareas', 'errores', 'gastos', 'hitos', 'pruebas',
+    'riesgos', 'penalizaciones', 'proyectos', 'contratos', 'empleados', 'clientes'
+]
+
+# Regla de negocio: alcance de proyectos/contratos cerrados o cancelados
+SCOPE_PROYECTOS_CONDITION = """(p.Estado IN ('Cerrado', 'Cancelado') 
+               OR c.Estado IN ('Cerrado', 'Cancelado'))"""
+SCOPE_CONTRATOS_CONDITION = "c.Estado IN ('Cerrado', 'Cancelado')"
+
+# Marca de agua por tabla: (columna SQL, columna del resultado, tipo)
+#   'id'    -> PK máxima extraída (tablas append-only)
+#   'fecha' -> fecha de cierre máxima extraída (se pasa como parámetro %s)
+# Los proyectos que entran al alcance sin FechaFin o con una FechaFin anterior
+# a la marca se detectan con las claves del alcance (ScopeKeysStore)
+# clientes y empleados son maestros pequeños y se extraen completos siempre
+WATERMARKS = {
+    'contratos': ('c.ID_Contrato', 'ID_Contrato', 'id'),
+    'proyectos': ('p.FechaFin', 'FechaFin', 'fecha'),
+    'hitos': ('h.ID_Hito', 'ID_Hito', 'id'),
+    'tareas': ('t.ID_Tarea', 'ID_Tarea', 'id'),
+    'asignaciones': ('a.ID_Asignacion', 'ID_Asignacion', 'id'),
+    'pruebas': ('pr.ID_Prueba', 'ID_Prueba', 'id'),
+    'errores': ('e.ID_Error', 'ID_Error', 'id'),
+    'riesgos': ('r.ID_Riesgo', 'ID_Riesgo', 'id'),
+    'gastos': ('g.ID_Gasto', 'ID_Gasto', 'id'),
+    'penalizaciones': ('p.ID_Penalizacion', 'ID_Penalizacion', 'id'),
+}
+
+# Tabla padre cuya entrada en el alcance (cierre) obliga a traer también
+# las filas hijas antiguas, aunque su PK esté por debajo de la marca de agua.
+# Solo se usa sin claves del alcance anterior (ScopeKeysStore); con ellas los
+# proyectos/contratos nuevos en el alcance se extraen completos
+WATERMARK_PARENT = {
+    'hitos': 'proyectos',
+    'tareas': 'proyectos',
+    'asignaciones': 'proyectos',
+    'pruebas': 'proyectos',
+    'errores': 'proyectos',
+    'riesgos': 'proyectos',
+    'gastos': 'proyectos',
+    'penalizaciones': 'contratos',
+}
+
+# Tablas grandes que se extraen por rangos de PK en modo paralelo:
+# tabla -> (columna SQL de la PK, columna del resultado)
+SHARDED_TABLES = {
+    'asignaciones': ('a.ID_Asignacion', 'ID_Asignacion'),
+    'tareas': ('t.ID_Tarea', 'ID_Tarea'),
+    'errores': ('e.ID_Error', 'ID_Error'),
+}
+
+# Columnas que puede devolver cada consulta: (columna del resultado, expresión SQL).
+# Con poda de columnas solo se seleccionan las que declaran las transformaciones
+# (get_source_columns) más las claves (ID_*) y la columna de marca de agua.
+SOURCE_COLUMNS = {
+    'clientes': [
+        ('ID_Cliente', 'cl.ID_Cliente'),
+        ('NombreCliente', 'cl.NombreCliente'),
+        ('fecha_extraccion', 'CURRENT_TIMESTAMP'),
+    ],
+    'empleados': [
+        ('ID_Empleado', 'e.ID_Empleado'),
+        ('NombreCompleto', 'e.NombreCompleto'),
+        ('Rol', 'e.Rol'),
+        ('Seniority', 'e.Seniority'),
+        ('CostoPorHora', 'e.CostoPorHora'),
+        ('fecha_extraccion', 'CURRENT_TIMESTAMP'),
+    ],
+    'contratos': [
+        ('ID_Contrato', 'c.ID_Contrato'),
+        ('ID_Cliente', 'c.ID_Cliente'),
+        ('ValorTotalContrato', 'c.ValorTotalContrato'),
+        ('Estado', 'c.Estado'),
+        ('fecha_extraccion', 'CURRENT_TIMESTAMP'),
+    ],
+    'proyectos': [
+        ('ID_Proyecto', 'p.ID_Proyecto'),
+        ('ID_Contrato', 'p.ID_Contrato'),
+        ('NombreProyecto', 'p.NombreProyecto'),
+        ('Version', 'p.Version'),
+        ('FechaInicio', 'p.FechaInicio'),
+        ('FechaFin', 'p.FechaFin'),
+        ('EstadoProyecto', 'p.Estado'),
+        ('ID_Cliente', 'c.ID_Cliente'),
+        ('ValorTotalContrato', 'c.ValorTotalContrato'),
+        ('EstadoContrato', 'c.Estado'),
+        ('razon_inclusion', """CASE 
+                WHEN p.Estado IN ('Cerrado', 'Cancelado') THEN 'Por proyecto'
+                WHEN c.Estado IN ('Cerrado', 'Cancelado') THEN 'Por contrato'
+                ELSE 'No aplica'
+            END"""),
+        ('fecha_extraccion', 'CURRENT_TIMESTAMP'),
+    ],
+    'hitos': [
+        ('ID_Hito', 'h.ID_Hito'),
+        ('ID_Proyecto', 'h.ID_Proyecto'),
+        ('Descripcion', 'h.Descripcion'),
+        ('Estado', 'h.Estado'),
+        ('FechaInicio', 'h.FechaInicio'),
+        ('FechaFinPlanificada', 'h.FechaFinPlanificada'),
+        ('FechaFinReal', 'h.FechaFinReal'),
+        ('dias_retraso', 'DATEDIFF(IFNULL(h.FechaFinReal, CURDATE()), h.FechaFinPlanificada)'),
+        ('fecha_extraccion', 'CURRENT_TIMESTAMP'),
+    ],
+    'tareas': [
+        ('ID_Tarea', 't.ID_Tarea'),
+        ('ID_Hito', 't.ID_Hito'),
+        ('ID_Proyecto', 'h.ID_Proyecto'),
+        ('NombreTarea', 't.NombreTarea'),
+        ('Descripcion', 't.Descripcion'),
+        ('Estado', 't.Estado'),
+        ('DuracionPlanificada', 't.DuracionPlanificada'),
+        ('DuracionReal', 't.DuracionReal'),
+        ('desviacion_duracion', 'IFNULL(t.DuracionReal, 0) - IFNULL(t.DuracionPlanificada, 0)'),
+        ('fecha_extraccion', 'CURRENT_TIMESTAMP'),
+    ],
+    'asignaciones': [
+        ('ID_Asignacion', 'a.ID_Asignacion'),
+        ('ID_Proyecto', 'a.ID_Proyecto'),
+        ('ID_Empleado', 'a.ID_Empleado'),
+        ('HorasPlanificadas', 'a.HorasPlanificadas'),
+        ('HorasReales', 'a.HorasReales'),
+        ('FechaAsignacion', 'a.FechaAsignacion'),
+        ('CostoPorHora', 'e.CostoPorHora'),
+        ('costo_real_horas', '(a.HorasReales * e.CostoPorHora)'),
+        ('costo_planificado_horas', '(a.HorasPlanificadas * e.CostoPorHora)'),
+        ('fecha_extraccion', 'CURRENT_TIMESTAMP'),
+    ],
+    'pruebas': [
+        ('ID_Prueba', 'pr.ID_Prueba'),
+        ('ID_Hito', 'pr.ID_Hito'),
+        ('ID_Proyecto', 'h.ID_Proyecto'),
+        ('TipoPrueba', 'pr.TipoPrueba'),
+        ('Fecha', 'pr.Fecha'),
+        ('Exitosa', 'pr.Exitosa'),
+        ('fecha_extraccion', 'CURRENT_TIMESTAMP'),
+    ],
+    'errores': [
+        ('ID_Error', 'e.ID_Error'),
+        ('ID_Tarea', 'e.ID_Tarea'),
+        ('ID_Hito', 't.ID_Hito'),
+        ('ID_Proyecto', 'h.ID_Proyecto'),
+        ('TipoError', 'e.TipoError'),
+        ('Descripcion', 'e.Descripcion'),
+        ('Fecha', 'e.Fecha'),
+        ('fecha_extraccion', 'CURRENT_TIMESTAMP'),
+    ],
+    'riesgos': [
+        ('ID_Riesgo', 'r.ID_Riesgo'),
+        ('ID_Proyecto', 'r.ID_Proyecto'),
+        ('TipoRiesgo', 'r.TipoRiesgo'),
+        ('Severidad', 'r.Severidad'),
+        ('Descripcion', 'r.Descripcion'),
+        ('FechaRegistro', 'r.FechaRegistro'),
+        ('fecha_extraccion', 'CURRENT_TIMESTAMP'),
+    ],
+    'gastos': [
+        ('ID_Gasto', 'g.ID_Gasto'),
+        ('ID_Proyecto', 'g.ID_Proyecto'),
+        ('TipoGasto', 'g.TipoGasto'),
+        ('Categoria', 'g.Categoria'),
+        ('Monto', 'g.Monto'),
+        ('Fecha', 'g.Fecha'),
+        ('fecha_extraccion', 'CURRENT_TIMESTAMP'),
+    ],
+    'penalizaciones': [
+        ('ID_Penalizacion', 'p.ID_Penalizacion'),
+        ('ID_Contrato', 'p.ID_Contrato'),
+        ('ID_Cliente', 'c.ID_Cliente'),
+        ('Monto', 'p.Monto'),
+        ('Motivo', 'p.Motivo'),
+        ('Fecha', 'p.Fecha'),
+        ('fecha_extraccion', 'CURRENT_TIMESTAMP'),
+    ],
+}
+
+# Tamaño de lote por defecto para la extracción en streaming
+DEFAULT_CHUNK_SIZE = 50000
+
 class SGPExtractor:
     
-    def __init__(self, incremental: bool = True):
+    def __init__(self, incremental: bool = True, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 materialize_scope: bool = True, snapshot_dir: Optional[str] = DEFAULT_SNAPSHOT_DIR,
+                 adapter: Optional[SourceAdapter] = None,
+                 checkpoint_dir: Optional[str] = DEFAULT_CHECKPOINT_DIR,
+                 prune_columns: bool = True, targets: Optional[List[str]] = None,
+                 proyecto_ids: Optional[List[int]] = None, contrato_ids: Optional[List[int]] = None,
+                 scope_path: Optional[str] = DEFAULT_SCOPE_PATH,
+                 control_path: str = DEFAULT_CONTROL_PATH):
         self.connection = None
+        # Origen de datos (MySQL del SGP por defecto, SQLite local para pruebas)
+        self.adapter = adapter or MySQLSourceAdapter()
         self.extraction_timestamp = datetime.now()
         self.incremental = incremental
-        self.control = IncrementalControl() if incremental else None
+        self.control = IncrementalControl(control_path) if incremental else None
+        self.chunk_size = chunk_size
+        self.watermarks = self.control.get_watermarks() if self.control else {}
+        self.failed_tables = []
+        # Alcance (proyectos/contratos cerrados) calculado una vez por ejecución
+        self.materialize_scope = materialize_scope
+        self.scope_proyectos = None
+        self.scope_contratos = None
+        # Claves del alcance de la extracción anterior (None = no se comparan) y
+        # proyectos/contratos que entraron al alcance desde entonces
+        self.scope_store = ScopeKeysStore(scope_path) if incremental and scope_path else None
+        self.previous_scope = self.scope_store.load() if self.scope_store and self.watermarks else None
+        self.new_proyectos = None
+        self.new_contratos = None
+        # Restricción del alcance a algunos proyectos (y a todos los de algunos
+        # contratos), p. ej. los proyectos afectados por un delta (None = sin restricción)
+        self.restricted = proyecto_ids is not None or contrato_ids is not None
+        self.proyecto_ids = sorted({int(i) for i in proyecto_ids or []})
+        self.contrato_ids = sorted({int(i) for i in contrato_ids or []})
+        # Carpeta de snapshots Parquet de los datos crudos (None = no guardar)
+        self.snapshot_dir = snapshot_dir
+        # Tablas del DW pedidas (None = todas): solo se extraen sus tablas origen
+        self.targets = targets
+        transforms = None
+        self.tables = list(EXTRACTION_ORDER)
+        if targets:
+            transforms, source_tables = resolve_targets(targets)
+            self.tables = [t for t in EXTRACTION_ORDER if t in source_tables]
+        # Columnas que leen las transformaciones (None = todas las de SOURCE_COLUMNS)
+        self.source_columns = get_source_columns(transforms) if prune_columns else None
+        # Checkpoint por tabla/rango para reanudar una extracción fallida (None = sin checkpoint)
+        self.checkpoint = ExtractionCheckpoint(checkpoint_dir) if checkpoint_dir else None
+        # Conexión propia de cada hilo en modo paralelo
+        self._local = threading.local()
         
     def connect(self):
         try:
-            self.connection = get_connection("OLTP")
-            logger.info("Conexión establecida con SGP exitosamente")
+            self.connection = self.adapter.connect()
+            logger.info(f"Conexión establecida con SGP exitosamente ({self.adapter.name})")
             return True
         except Exception as e:
             logger.error(f"Error conectando a SGP: {str(e)}")
@@ -50,300 +294,905 @@ class SGPExtractor:
             self.connection.close()
             logger.info("Conexión cerrada exitosamente")
     
+    def _current_connection(self):
+        """Conexión del hilo actual (modo paralelo) o la conexión principal"""
+        return getattr(self._local, 'connection', None) or self.connection
+    
+    def read_table(self, query: str, table_name: str, params: Optional[List[Any]] = None) -> pd.DataFrame:
+        """
+        Ejecutar la consulta de una tabla (los errores se propagan)
+        
+        Args:
+            params: parámetros %s de la consulta (por defecto los del filtro incremental de la tabla)
+        """
+        if params is None:
+            params = self.get_incremental_params(table_name)
+        df = apply_schema(pd.read_sql(query, self._current_connection(), params=params or None), table_name)
+        mode = "INCREMENTAL" if self.incremental else "COMPLETA"
+        logger.info(f"Extraídos {len(df)} registros de {table_name} [MODO: {mode}]")
+        return df
+    
+    def fetch_table(self, table_name: str) -> pd.DataFrame:
+        return self.read_table(getattr(self, f"query_{table_name}")(), table_name)
+    
     def execute_query(self, query: str, table_name: str) -> pd.DataFrame:
         try:
-            df = pd.read_sql(query, self.connection)
-            mode = "INCREMENTAL" if self.incremental else "COMPLETA"
-            logger.info(f"Extraídos {len(df)} registros de {table_name} [MODO: {mode}]")
-            return df
+            return self.read_table(query, table_name)
         except Exception as e:
             logger.error(f"Error extrayendo datos de {table_name}: {str(e)}")
+            self.failed_tables.append(table_name)
             return pd.DataFrame()
     
-    def get_incremental_filter(self) -> str:
+    def stream_query(self, query: str, table_name: str, chunk_size: Optional[int] = None,
+                     params: Optional[List[Any]] = None) -> Iterator[pd.DataFrame]:
         """
-        Obtener filtro para carga incremental
-        PROYECTO ESCOLAR: Siempre hacer carga completa para simplicidad
+        Ejecutar una consulta con cursor no bufferizado (streaming desde el servidor)
+        y devolver DataFrames de como máximo chunk_size filas.
+        
+        Args:
+            params: parámetros %s de la consulta (por defecto los del filtro incremental de la tabla)
         """
-        # Para proyecto escolar: siempre extraer todo (sin filtro incremental)
-        return ""
+        chunk_size = chunk_size or self.chunk_size
+        if params is None:
+            params = self.get_incremental_params(table_name)
+        conn = self._current_connection()
+        cursor = conn.cursor(buffered=False)
+        total_rows = 0
+        try:
+            cursor.execute(query, params or ())
+            columns = list(cursor.column_names)
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                total_rows += len(rows)
+                yield apply_schema(pd.DataFrame.from_records(rows, columns=columns), table_name)
+            mode = "INCREMENTAL" if self.incremental else "COMPLETA"
+            logger.info(f"Extraídos {total_rows} registros de {table_name} en streaming [MODO: {mode}]")
+        finally:
+            # Si el consumidor abandona el generador hay que descartar las filas pendientes
+            if conn.unread_result:
+                conn.consume_results()
+            cursor.close()
+    
+    def stream_table(self, table_name: str, chunk_size: Optional[int] = None) -> Iterator[pd.DataFrame]:
+        """Extraer una tabla en lotes de tamaño acotado"""
+        query = getattr(self, f"query_{table_name}")()
+        return self.stream_query(query, table_name, chunk_size)
+
+    def column_range(self, table_name: str, column: str) -> Tuple[Any, Any]:
+        """Mínimo y máximo de una columna de la consulta de una tabla, sin traer sus filas"""
+        query = getattr(self, f"query_{table_name}")()
+        cursor = self._current_connection().cursor()
+        cursor.execute(f"SELECT MIN(q.{column}), MAX(q.{column}) FROM ({query}) q",
+                       self.get_incremental_params(table_name) or ())
+        minimo, maximo = cursor.fetchone()
+        cursor.close()
+        return minimo, maximo
+
+    # ================= ALCANCE MATERIALIZADO =================
+    
+    def load_scope_keys(self, connection):
+        """
+        Evaluar UNA vez la regla de negocio (proyectos/contratos cerrados o cancelados)
+        y guardar las claves en memoria
+        """
+        cursor = connection.cursor()
+        cursor.execute(f"""
+            SELECT p.ID_Proyecto, p.ID_Contrato, p.FechaFin
+            FROM proyectos p
+            INNER JOIN contratos c ON p.ID_Contrato = c.ID_Contrato
+            WHERE {SCOPE_PROYECTOS_CONDITION}
+        """)
+        self.scope_proyectos = cursor.fetchall()
+        cursor.execute(f"""
+            SELECT c.ID_Contrato, c.ID_Cliente
+            FROM contratos c
+            WHERE {SCOPE_CONTRATOS_CONDITION}
+        """)
+        self.scope_contratos = cursor.fetchall()
+        cursor.close()
+        if self.restricted:
+            proyectos, contratos = set(self.proyecto_ids), set(self.contrato_ids)
+            self.scope_proyectos = [row for row in self.scope_proyectos
+                                    if row[0] in proyectos or row[1] in contratos]
+            contratos |= {row[1] for row in self.scope_proyectos}
+            self.scope_contratos = [row for row in self.scope_contratos if row[0] in contratos]
+        logger.info(f"Alcance materializado: {len(self.scope_proyectos)} proyectos, "
+                    f"{len(self.scope_contratos)} contratos")
+    
+    def create_scope_tables(self, connection, batch_size: int = 5000):
+        """Crear las tablas temporales de alcance en la sesión y poblarlas con las claves"""
+        cursor = connection.cursor()
+        cursor.execute("DROP TEMPORARY TABLE IF EXISTS etl_scope_proyectos")
+        cursor.execute("DROP TEMPORARY TABLE IF EXISTS etl_scope_contratos")
+        cursor.execute("""
+            CREATE TEMPORARY TABLE etl_scope_proyectos (
+                ID_Proyecto INT PRIMARY KEY,
+                ID_Contrato INT NOT NULL,
+                FechaFin DATE
+            )
+        """)
+        cursor.execute("""
+            CREATE TEMPORARY TABLE etl_scope_contratos (
+                ID_Contrato INT PRIMARY KEY,
+                ID_Cliente INT NOT NULL
+            )
+        """)
+        for i in range(0, len(self.scope_proyectos), batch_size):
+            cursor.executemany("INSERT INTO etl_scope_proyectos VALUES (%s, %s, %s)",
+                               self.scope_proyectos[i:i + batch_size])
+        for i in range(0, len(self.scope_contratos), batch_size):
+            cursor.executemany("INSERT INTO etl_scope_contratos VALUES (%s, %s)",
+                               self.scope_contratos[i:i + batch_size])
+        cursor.close()
+    
+    def setup_scope(self, connections: List[Any]):
+        """
+        Preparar el alcance en todas las conexiones que van a extraer.
+        Las claves se leen con la primera conexión (dentro de su snapshot).
+        Si no se pueden crear tablas temporales se vuelve al predicado en línea.
+        """
+        if self.scope_store is not None and self.scope_proyectos is None:
+            self.load_scope_keys(connections[0])
+            self.diff_scope()
+        if not self.materialize_scope:
+            return
+        try:
+            if self.scope_proyectos is None:
+                self.load_scope_keys(connections[0])
+            for conn in connections:
+                self.create_scope_tables(conn)
+        except Exception as e:
+            logger.warning(f"No se pudo materializar el alcance ({str(e)}). "
+                           "Se usará el filtro en cada consulta")
+            self.materialize_scope = False
+    
+    def diff_scope(self):
+        """Proyectos y contratos del alcance actual que no estaban en el de la extracción anterior"""
+        if self.previous_scope is None:
+            if self.watermarks:
+                logger.warning("Sin claves del alcance anterior: los proyectos/contratos nuevos en el "
+                               "alcance se detectan con las marcas de agua (los proyectos sin FechaFin, "
+                               "desde la próxima ejecución)")
+            return
+        proyectos, contratos = (set(keys) for keys in self.previous_scope)
+        self.new_proyectos = sorted({row[0] for row in self.scope_proyectos} - proyectos)
+        self.new_contratos = sorted({row[0] for row in self.scope_contratos} - contratos)
+        logger.info(f"Nuevos en el alcance: {len(self.new_proyectos)} proyectos, "
+                    f"{len(self.new_contratos)} contratos")
+    
+    @staticmethod
+    def _in_list(column: str, ids: List[int]) -> str:
+        return f"{column} IN ({', '.join(str(i) for i in ids)})" if ids else "1 = 0"
+    
+    def restricted_proyectos_condition(self) -> str:
+        """Predicado en línea (alias p) de la restricción a proyectos/contratos"""
+        if not self.restricted:
+            return ""
+        return (f"AND ({self._in_list('p.ID_Proyecto', self.proyecto_ids)} "
+                f"OR {self._in_list('p.ID_Contrato', self.contrato_ids)})")
+    
+    def restricted_contratos_condition(self) -> str:
+        """Predicado en línea (alias c): contratos pedidos y contratos de los proyectos pedidos"""
+        if not self.restricted:
+            return ""
+        proyectos = self._in_list('ID_Proyecto', self.proyecto_ids)
+        return (f"AND ({self._in_list('c.ID_Contrato', self.contrato_ids)} "
+                f"OR c.ID_Contrato IN (SELECT ID_Contrato FROM proyectos WHERE {proyectos}))")
+    
+    def proyectos_scope(self, join_condition: str) -> str:
+        """JOIN + WHERE que limita una tabla hija a proyectos del alcance (alias p)"""
+        if self.materialize_scope:
+            return f"""INNER JOIN etl_scope_proyectos p ON {join_condition}
+        WHERE 1 = 1"""
+        return f"""INNER JOIN proyectos p ON {join_condition}
+        INNER JOIN contratos c ON p.ID_Contrato = c.ID_Contrato
+        WHERE {SCOPE_PROYECTOS_CONDITION}
+        {self.restricted_proyectos_condition()}"""
+    
+    def contratos_scope(self, join_condition: str) -> str:
+        """JOIN + WHERE que limita una tabla a contratos del alcance (alias c)"""
+        if self.materialize_scope:
+            return f"""INNER JOIN etl_scope_contratos c ON {join_condition}
+        WHERE 1 = 1"""
+        return f"""INNER JOIN contratos c ON {join_condition}
+        WHERE {SCOPE_CONTRATOS_CONDITION}
+        {self.restricted_contratos_condition()}"""
+    
+    @staticmethod
+    def _watermark_condition(table_name: str, value) -> Tuple[str, List[Any]]:
+        """Condición estricta sobre la marca de agua y sus parámetros"""
+        sql_column, _, kind = WATERMARKS[table_name]
+        if kind == 'id':
+            return f"{sql_column} > {int(value)}", []
+        return f"{sql_column} > %s", [value]
+    
+    def incremental_filter(self, table_name: str) -> Tuple[str, List[Any]]:
+        """
+        Obtener filtro para carga incremental de una tabla y sus parámetros %s
+        
+        Se empuja la marca de agua de la tabla al WHERE de su consulta. Con las claves
+        del alcance anterior, proyectos y contratos solo traen los que entraron al
+        alcance (sus filas hijas llegan con extract_new_scope); sin ellas las tablas
+        hijas incluyen las filas de los proyectos/contratos cuya marca de agua
+        avanzó (WATERMARK_PARENT). Sin marca de agua previa -> carga completa.
+        """
+        if not self.incremental or table_name not in WATERMARKS:
+            return "", []
+        
+        if self.new_proyectos is not None and table_name == 'proyectos':
+            return f"AND {self._in_list('p.ID_Proyecto', self.new_proyectos)}", []
+        if self.new_contratos is not None and table_name == 'contratos':
+            return f"AND {self._in_list('c.ID_Contrato', self.new_contratos)}", []
+        
+        value = self.watermarks.get(table_name)
+        if value is None:
+            return "", []
+        
+        conditions = [self._watermark_condition(table_name, value)]
+        parent = self.watermark_parent(table_name)
+        if parent:
+            conditions.append(self._watermark_condition(parent, self.watermarks[parent]))
+        
+        sql = "AND (" + " OR ".join(f"({c})" for c, _ in conditions) + ")"
+        return sql, [param for _, params in conditions for param in params]
+    
+    def watermark_parent(self, table_name: str) -> Optional[str]:
+        """Tabla padre cuya marca de agua también filtra la tabla (solo sin claves del alcance)"""
+        parent = WATERMARK_PARENT.get(table_name)
+        if parent and self.new_proyectos is None and self.watermarks.get(parent) is not None:
+            return parent
+        return None
+    
+    def get_incremental_filter(self, table_name: str) -> str:
+        """Filtro incremental de una tabla (SQL con parámetros %s, ver get_incremental_params)"""
+        return self.incremental_filter(table_name)[0]
+    
+    def get_incremental_params(self, table_name: str) -> List[Any]:
+        """Parámetros del filtro incremental de una tabla, en orden"""
+        return self.incremental_filter(table_name)[1]
+    
+    @staticmethod
+    def collect_watermark(table_name: str, df: pd.DataFrame, new_watermarks: Dict[str, Any]):
+        """Actualizar new_watermarks con el máximo de la columna de marca de agua en df"""
+        if table_name not in WATERMARKS or df.empty:
+            return
+        
+        _, column, kind = WATERMARKS[table_name]
+        if column not in df.columns:
+            return
+        
+        if kind == 'id':
+            current = df[column].max()
+            value = int(current) if pd.notna(current) else None
+        else:
+            current = pd.to_datetime(df[column], errors='coerce').max()
+            value = current.strftime('%Y-%m-%d') if pd.notna(current) else None
+        
+        if value is None:
+            return
+        previous = new_watermarks.get(table_name)
+        new_watermarks[table_name] = value if previous is None else max(previous, value)
+    
+    def save_watermarks(self, new_watermarks: Dict[str, Any]):
+        """Persistir las marcas de agua solo si todas las tablas se extrajeron sin error"""
+        if not self.incremental or not self.control:
+            return
+        if self.failed_tables:
+            logger.warning(f"Marcas de agua NO actualizadas: fallaron {', '.join(self.failed_tables)}")
+            return
+        self.control.update_watermarks(new_watermarks)
+        logger.info(f"Marcas de agua actualizadas: {new_watermarks}")
+        if self.scope_store is not None and self.scope_proyectos is not None:
+            self.scope_store.save([row[0] for row in self.scope_proyectos],
+                                  [row[0] for row in self.scope_contratos])
+    
+    def extract_new_scope(self, extracted_data: Dict[str, pd.DataFrame], parallel: bool = False, workers: int = 4):
+        """
+        Extraer completos los proyectos/contratos que entraron al alcance desde la
+        extracción anterior (sus filas hijas pueden estar por debajo de las marcas
+        de agua) y unirlos a extracted_data sin repetir filas
+        """
+        logger.info(f"--- Extrayendo {len(self.new_proyectos)} proyectos y {len(self.new_contratos)} "
+                    "contratos nuevos en el alcance ---")
+        scope_data = extract_projects(self.new_proyectos, self.new_contratos, targets=self.targets,
+                                      parallel=parallel, workers=workers, adapter=self.adapter)
+        if not scope_data:
+            self.failed_tables.append('alcance')
+            return
+        for table_name, df in scope_data.items():
+            current = extracted_data.get(table_name)
+            if current is None or current.empty:
+                extracted_data[table_name] = df
+            elif not df.empty:
+                pk = SOURCE_COLUMNS[table_name][0][0]
+                extracted_data[table_name] = pd.concat([current, df], ignore_index=True) \
+                    .drop_duplicates(subset=pk, ignore_index=True)
+
+    # ================= COLUMNAS =================
+    
+    def get_selected_columns(self, table_name: str) -> List[str]:
+        """Columnas a seleccionar: las declaradas por las transformaciones + claves + marca de agua"""
+        available = [column for column, _ in SOURCE_COLUMNS[table_name]]
+        if self.source_columns is None:
+            return available
+        
+        required = set(self.source_columns.get(table_name, []))
+        if table_name in WATERMARKS:
+            required.add(WATERMARKS[table_name][1])
+        return [column for column in available if column.startswith('ID_') or column in required]
+    
+    def select_list(self, table_name: str) -> str:
+        """Lista del SELECT de una tabla a partir de SOURCE_COLUMNS"""
+        expressions = dict(SOURCE_COLUMNS[table_name])
+        items = []
+        for column in self.get_selected_columns(table_name):
+            expression = expressions[column]
+            items.append(expression if expression.split('.')[-1] == column else f"{expression} as {column}")
+        return ",\n            ".join(items)
 
     # ================= TABLAS =================
     
-    def extract_clientes(self) -> pd.DataFrame:
-        query = """
+    def query_clientes(self) -> str:
+        query = f"""
         SELECT DISTINCT
-            cl.ID_Cliente,
-            cl.NombreCliente,
-            CURRENT_TIMESTAMP as fecha_extraccion
+            {self.select_list('clientes')}
         FROM clientes cl
-        INNER JOIN contratos c ON cl.ID_Cliente = c.ID_Cliente
-        WHERE c.Estado IN ('Cerrado', 'Cancelado')
+        {self.contratos_scope('cl.ID_Cliente = c.ID_Cliente')}
         ORDER BY cl.ID_Cliente
         """
-        return self.execute_query(query, "clientes")
+        return query
     
-    def extract_empleados(self) -> pd.DataFrame:
-        query = """
+    def extract_clientes(self) -> pd.DataFrame:
+        return self.execute_query(self.query_clientes(), "clientes")
+    
+    def query_empleados(self) -> str:
+        query = f"""
         SELECT DISTINCT
-            e.ID_Empleado,
-            e.NombreCompleto,
-            e.Rol,
-            e.Seniority,
-            e.CostoPorHora,
-            CURRENT_TIMESTAMP as fecha_extraccion
+            {self.select_list('empleados')}
         FROM empleados e
         INNER JOIN asignaciones a ON e.ID_Empleado = a.ID_Empleado
-        INNER JOIN proyectos p ON a.ID_Proyecto = p.ID_Proyecto
-        INNER JOIN contratos c ON p.ID_Contrato = c.ID_Contrato
-        WHERE (p.Estado IN ('Cerrado', 'Cancelado') 
-               OR c.Estado IN ('Cerrado', 'Cancelado'))
+        {self.proyectos_scope('a.ID_Proyecto = p.ID_Proyecto')}
         ORDER BY e.ID_Empleado
         """
-        return self.execute_query(query, "empleados")
+        return query
+    
+    def extract_empleados(self) -> pd.DataFrame:
+        return self.execute_query(self.query_empleados(), "empleados")
+    
+    def query_contratos(self) -> str:
+        incremental_filter = self.get_incremental_filter('contratos')
+        if self.materialize_scope:
+            scope = "INNER JOIN etl_scope_contratos sc ON sc.ID_Contrato = c.ID_Contrato\n        WHERE 1 = 1"
+        else:
+            scope = f"WHERE {SCOPE_CONTRATOS_CONDITION}\n        {self.restricted_contratos_condition()}"
+        
+        query = f"""
+        SELECT
+            {self.select_list('contratos')}
+        FROM contratos c
+        {scope}
+        {incremental_filter}
+        ORDER BY c.ID_Contrato
+        """
+        return query
     
     def extract_contratos(self) -> pd.DataFrame:
-        query = """
-        SELECT 
-            ID_Contrato,
-            ID_Cliente,
-            ValorTotalContrato,
-            Estado,
-            CURRENT_TIMESTAMP as fecha_extraccion
-        FROM contratos
-        WHERE Estado IN ('Cerrado', 'Cancelado')
-        ORDER BY ID_Contrato
-        """
-        return self.execute_query(query, "contratos")
+        return self.execute_query(self.query_contratos(), "contratos")
     
-    def extract_proyectos(self) -> pd.DataFrame:
-        incremental_filter = self.get_incremental_filter()
+    def query_proyectos(self) -> str:
+        incremental_filter = self.get_incremental_filter('proyectos')
+        if self.materialize_scope:
+            scope = "INNER JOIN etl_scope_proyectos sp ON sp.ID_Proyecto = p.ID_Proyecto\n        WHERE 1 = 1"
+        else:
+            scope = f"WHERE {SCOPE_PROYECTOS_CONDITION}\n        {self.restricted_proyectos_condition()}"
         
         query = f"""
-        SELECT 
-            p.ID_Proyecto,
-            p.ID_Contrato,
-            p.NombreProyecto,
-            p.Version,
-            p.FechaInicio,
-            p.FechaFin,
-            p.Estado as EstadoProyecto,
-            c.ID_Cliente,
-            c.ValorTotalContrato,
-            c.Estado as EstadoContrato,
-            CASE 
-                WHEN p.Estado IN ('Cerrado', 'Cancelado') THEN 'Por proyecto'
-                WHEN c.Estado IN ('Cerrado', 'Cancelado') THEN 'Por contrato'
-                ELSE 'No aplica'
-            END as razon_inclusion,
-            CURRENT_TIMESTAMP as fecha_extraccion
+        SELECT
+            {self.select_list('proyectos')}
         FROM proyectos p
         INNER JOIN contratos c ON p.ID_Contrato = c.ID_Contrato
-        WHERE (p.Estado IN ('Cerrado', 'Cancelado') 
-               OR c.Estado IN ('Cerrado', 'Cancelado'))
+        {scope}
         {incremental_filter}
         ORDER BY p.ID_Proyecto
         """
-        return self.execute_query(query, "proyectos")
+        return query
     
-    def extract_hitos(self) -> pd.DataFrame:
-        query = """
-        SELECT 
-            h.ID_Hito,
-            h.ID_Proyecto,
-            h.Descripcion,
-            h.Estado,
-            h.FechaInicio,
-            h.FechaFinPlanificada,
-            h.FechaFinReal,
-            DATEDIFF(IFNULL(h.FechaFinReal, CURDATE()), h.FechaFinPlanificada) as dias_retraso,
-            CURRENT_TIMESTAMP as fecha_extraccion
+    def extract_proyectos(self) -> pd.DataFrame:
+        return self.execute_query(self.query_proyectos(), "proyectos")
+    
+    def query_hitos(self) -> str:
+        incremental_filter = self.get_incremental_filter('hitos')
+        
+        query = f"""
+        SELECT
+            {self.select_list('hitos')}
         FROM hitos h
-        INNER JOIN proyectos p ON h.ID_Proyecto = p.ID_Proyecto
-        INNER JOIN contratos c ON p.ID_Contrato = c.ID_Contrato
-        WHERE (p.Estado IN ('Cerrado', 'Cancelado') 
-               OR c.Estado IN ('Cerrado', 'Cancelado'))
+        {self.proyectos_scope('h.ID_Proyecto = p.ID_Proyecto')}
+        {incremental_filter}
         ORDER BY h.ID_Proyecto, h.ID_Hito
         """
-        return self.execute_query(query, "hitos")
+        return query
     
-    def extract_tareas(self) -> pd.DataFrame:
-        query = """
-        SELECT 
-            t.ID_Tarea,
-            t.ID_Hito,
-            h.ID_Proyecto,
-            t.NombreTarea,
-            t.Descripcion,
-            t.Estado,
-            t.DuracionPlanificada,
-            t.DuracionReal,
-            IFNULL(t.DuracionReal, 0) - IFNULL(t.DuracionPlanificada, 0) as desviacion_duracion,
-            CURRENT_TIMESTAMP as fecha_extraccion
+    def extract_hitos(self) -> pd.DataFrame:
+        return self.execute_query(self.query_hitos(), "hitos")
+    
+    def query_tareas(self, key_range: Optional[Tuple[int, int]] = None) -> str:
+        incremental_filter = self.get_incremental_filter('tareas')
+        if key_range:
+            order_by = self.keyset_clause('tareas', key_range)
+        else:
+            order_by = "ORDER BY h.ID_Proyecto, t.ID_Hito, t.ID_Tarea"
+        
+        query = f"""
+        SELECT
+            {self.select_list('tareas')}
         FROM tareas t
         INNER JOIN hitos h ON t.ID_Hito = h.ID_Hito
-        INNER JOIN proyectos p ON h.ID_Proyecto = p.ID_Proyecto
-        INNER JOIN contratos c ON p.ID_Contrato = c.ID_Contrato
-        WHERE (p.Estado IN ('Cerrado', 'Cancelado') 
-               OR c.Estado IN ('Cerrado', 'Cancelado'))
-        ORDER BY h.ID_Proyecto, t.ID_Hito, t.ID_Tarea
+        {self.proyectos_scope('h.ID_Proyecto = p.ID_Proyecto')}
+        {incremental_filter}
+        {order_by}
         """
-        return self.execute_query(query, "tareas")
+        return query
     
-    def extract_asignaciones(self) -> pd.DataFrame:
-        query = """
-        SELECT 
-            a.ID_Asignacion,
-            a.ID_Proyecto,
-            a.ID_Empleado,
-            a.HorasPlanificadas,
-            a.HorasReales,
-            a.FechaAsignacion,
-            e.CostoPorHora,
-            (a.HorasReales * e.CostoPorHora) as costo_real_horas,
-            (a.HorasPlanificadas * e.CostoPorHora) as costo_planificado_horas,
-            CURRENT_TIMESTAMP as fecha_extraccion
+    def extract_tareas(self) -> pd.DataFrame:
+        return self.execute_query(self.query_tareas(), "tareas")
+    
+    def query_asignaciones(self, key_range: Optional[Tuple[int, int]] = None) -> str:
+        incremental_filter = self.get_incremental_filter('asignaciones')
+        if key_range:
+            order_by = self.keyset_clause('asignaciones', key_range)
+        else:
+            order_by = "ORDER BY a.ID_Proyecto, a.FechaAsignacion"
+        
+        query = f"""
+        SELECT
+            {self.select_list('asignaciones')}
         FROM asignaciones a
         INNER JOIN empleados e ON a.ID_Empleado = e.ID_Empleado
-        INNER JOIN proyectos p ON a.ID_Proyecto = p.ID_Proyecto
-        INNER JOIN contratos c ON p.ID_Contrato = c.ID_Contrato
-        WHERE (p.Estado IN ('Cerrado', 'Cancelado') 
-               OR c.Estado IN ('Cerrado', 'Cancelado'))
-        ORDER BY a.ID_Proyecto, a.FechaAsignacion
+        {self.proyectos_scope('a.ID_Proyecto = p.ID_Proyecto')}
+        {incremental_filter}
+        {order_by}
         """
-        return self.execute_query(query, "asignaciones")
+        return query
     
-    def extract_pruebas(self) -> pd.DataFrame:
-        query = """
-        SELECT 
-            pr.ID_Prueba,
-            pr.ID_Hito,
-            h.ID_Proyecto,
-            pr.TipoPrueba,
-            pr.Fecha,
-            pr.Exitosa,
-            CURRENT_TIMESTAMP as fecha_extraccion
+    def extract_asignaciones(self) -> pd.DataFrame:
+        return self.execute_query(self.query_asignaciones(), "asignaciones")
+    
+    def query_pruebas(self) -> str:
+        incremental_filter = self.get_incremental_filter('pruebas')
+        
+        query = f"""
+        SELECT
+            {self.select_list('pruebas')}
         FROM pruebas pr
         INNER JOIN hitos h ON pr.ID_Hito = h.ID_Hito
-        INNER JOIN proyectos p ON h.ID_Proyecto = p.ID_Proyecto
-        INNER JOIN contratos c ON p.ID_Contrato = c.ID_Contrato
-        WHERE (p.Estado IN ('Cerrado', 'Cancelado') 
-               OR c.Estado IN ('Cerrado', 'Cancelado'))
+        {self.proyectos_scope('h.ID_Proyecto = p.ID_Proyecto')}
+        {incremental_filter}
         ORDER BY h.ID_Proyecto, pr.ID_Hito, pr.Fecha
         """
-        return self.execute_query(query, "pruebas")
+        return query
     
-    def extract_errores(self) -> pd.DataFrame:
-        query = """
-        SELECT 
-            e.ID_Error,
-            e.ID_Tarea,
-            t.ID_Hito,
-            h.ID_Proyecto,
-            e.TipoError,
-            e.Descripcion,
-            e.Fecha,
-            CURRENT_TIMESTAMP as fecha_extraccion
+    def extract_pruebas(self) -> pd.DataFrame:
+        return self.execute_query(self.query_pruebas(), "pruebas")
+    
+    def query_errores(self, key_range: Optional[Tuple[int, int]] = None) -> str:
+        incremental_filter = self.get_incremental_filter('errores')
+        if key_range:
+            order_by = self.keyset_clause('errores', key_range)
+        else:
+            order_by = "ORDER BY h.ID_Proyecto, e.Fecha"
+        
+        query = f"""
+        SELECT
+            {self.select_list('errores')}
         FROM errores e
         INNER JOIN tareas t ON e.ID_Tarea = t.ID_Tarea
         INNER JOIN hitos h ON t.ID_Hito = h.ID_Hito
-        INNER JOIN proyectos p ON h.ID_Proyecto = p.ID_Proyecto
-        INNER JOIN contratos c ON p.ID_Contrato = c.ID_Contrato
-        WHERE (p.Estado IN ('Cerrado', 'Cancelado') 
-               OR c.Estado IN ('Cerrado', 'Cancelado'))
-        ORDER BY h.ID_Proyecto, e.Fecha
+        {self.proyectos_scope('h.ID_Proyecto = p.ID_Proyecto')}
+        {incremental_filter}
+        {order_by}
         """
-        return self.execute_query(query, "errores")
+        return query
     
-    def extract_riesgos(self) -> pd.DataFrame:
-        query = """
-        SELECT 
-            r.ID_Riesgo,
-            r.ID_Proyecto,
-            r.TipoRiesgo,
-            r.Severidad,
-            r.Descripcion,
-            r.FechaRegistro,
-            CURRENT_TIMESTAMP as fecha_extraccion
+    def extract_errores(self) -> pd.DataFrame:
+        return self.execute_query(self.query_errores(), "errores")
+    
+    def query_riesgos(self) -> str:
+        incremental_filter = self.get_incremental_filter('riesgos')
+        
+        query = f"""
+        SELECT
+            {self.select_list('riesgos')}
         FROM riesgos r
-        INNER JOIN proyectos p ON r.ID_Proyecto = p.ID_Proyecto
-        INNER JOIN contratos c ON p.ID_Contrato = c.ID_Contrato
-        WHERE (p.Estado IN ('Cerrado', 'Cancelado') 
-               OR c.Estado IN ('Cerrado', 'Cancelado'))
+        {self.proyectos_scope('r.ID_Proyecto = p.ID_Proyecto')}
+        {incremental_filter}
         ORDER BY r.ID_Proyecto, r.FechaRegistro
         """
-        return self.execute_query(query, "riesgos")
+        return query
     
-    def extract_gastos(self) -> pd.DataFrame:
-        query = """
-        SELECT 
-            g.ID_Gasto,
-            g.ID_Proyecto,
-            g.TipoGasto,
-            g.Categoria,
-            g.Monto,
-            g.Fecha,
-            CURRENT_TIMESTAMP as fecha_extraccion
+    def extract_riesgos(self) -> pd.DataFrame:
+        return self.execute_query(self.query_riesgos(), "riesgos")
+    
+    def query_gastos(self) -> str:
+        incremental_filter = self.get_incremental_filter('gastos')
+        
+        query = f"""
+        SELECT
+            {self.select_list('gastos')}
         FROM gastos g
-        INNER JOIN proyectos p ON g.ID_Proyecto = p.ID_Proyecto
-        INNER JOIN contratos c ON p.ID_Contrato = c.ID_Contrato
-        WHERE (p.Estado IN ('Cerrado', 'Cancelado') 
-               OR c.Estado IN ('Cerrado', 'Cancelado'))
+        {self.proyectos_scope('g.ID_Proyecto = p.ID_Proyecto')}
+        {incremental_filter}
         ORDER BY g.ID_Proyecto, g.Fecha
         """
-        return self.execute_query(query, "gastos")
+        return query
     
-    def extract_penalizaciones(self) -> pd.DataFrame:
-        query = """
-        SELECT 
-            p.ID_Penalizacion,
-            p.ID_Contrato,
-            c.ID_Cliente,
-            p.Monto,
-            p.Motivo,
-            p.Fecha,
-            CURRENT_TIMESTAMP as fecha_extraccion
+    def extract_gastos(self) -> pd.DataFrame:
+        return self.execute_query(self.query_gastos(), "gastos")
+    
+    def query_penalizaciones(self) -> str:
+        incremental_filter = self.get_incremental_filter('penalizaciones')
+        
+        query = f"""
+        SELECT
+            {self.select_list('penalizaciones')}
         FROM penalizaciones p
-        INNER JOIN contratos c ON p.ID_Contrato = c.ID_Contrato
-        WHERE c.Estado IN ('Cerrado', 'Cancelado')
+        {self.contratos_scope('p.ID_Contrato = c.ID_Contrato')}
+        {incremental_filter}
         ORDER BY p.ID_Contrato, p.Fecha
         """
-        return self.execute_query(query, "penalizaciones")
+        return query
+    
+    def extract_penalizaciones(self) -> pd.DataFrame:
+        return self.execute_query(self.query_penalizaciones(), "penalizaciones")
+
+    # ================= EXTRACCIÓN PARALELA =================
+    
+    def get_size_priority(self) -> List[str]:
+        """
+        Ordenar tablas de mayor a menor según las estadísticas del origen
+        (information_schema.TABLES en MySQL). Si no hay estadísticas se usa DEFAULT_SIZE_PRIORITY.
+        """
+        try:
+            sizes = self.adapter.get_table_sizes(self.connection)
+            
+            if not sizes:
+                return list(DEFAULT_SIZE_PRIORITY)
+            
+            fallback = {t: i for i, t in enumerate(DEFAULT_SIZE_PRIORITY)}
+            return sorted(EXTRACTION_ORDER, key=lambda t: (-sizes.get(t, 0), fallback[t]))
+        except Exception as e:
+            logger.warning(f"No se pudieron leer estadísticas de tablas: {str(e)}")
+            return list(DEFAULT_SIZE_PRIORITY)
+    
+    def open_snapshot_connections(self, workers: int) -> List[Any]:
+        """
+        Abrir N conexiones que leen el mismo punto en el tiempo.
+        
+        La conexión principal toma FLUSH TABLES WITH READ LOCK mientras cada
+        worker ejecuta START TRANSACTION WITH CONSISTENT SNAPSHOT; al liberar
+        el bloqueo todos los snapshots son idénticos. Sin privilegio RELOAD
+        se continúa sin bloqueo (snapshots abiertos con milisegundos de diferencia).
+        """
+        cursor = self.connection.cursor()
+        locked = False
+        try:
+            cursor.execute("FLUSH TABLES WITH READ LOCK")
+            locked = True
+        except Exception as e:
+            logger.warning(f"Sin FLUSH TABLES WITH READ LOCK ({str(e)}). "
+                           "Los snapshots de los workers pueden diferir ligeramente")
+        
+        connections = []
+        try:
+            for _ in range(workers):
+                conn = self.adapter.connect()
+                conn.start_transaction(consistent_snapshot=True, isolation_level='REPEATABLE READ', readonly=True)
+                connections.append(conn)
+        except Exception:
+            self.close_connections(connections)
+            raise
+        finally:
+            if locked:
+                cursor.execute("UNLOCK TABLES")
+            cursor.close()
+        
+        logger.info(f"{len(connections)} conexiones abiertas con snapshot consistente")
+        return connections
+    
+    def close_connections(self, connections: List[Any]):
+        for conn in connections:
+            try:
+                if conn.is_connected():
+                    conn.rollback()
+                    conn.close()
+            except Exception as e:
+                logger.warning(f"Error cerrando conexión de worker: {str(e)}")
+    
+    # ================= EXTRACCIÓN POR RANGOS DE PK =================
+    
+    def get_key_ranges(self, table_name: str, shards: int) -> List[Tuple[int, int]]:
+        """
+        Dividir el espacio de la PK en rangos (desde_exclusivo, hasta_inclusivo).
+        MIN/MAX de la PK se resuelven con el índice primario, sin recorrer la tabla.
+        En una extracción incremental los rangos empiezan en la marca de agua de la
+        PK, así solo cubren el delta (salvo si también filtra la marca del padre).
+        """
+        pk_column = SHARDED_TABLES[table_name][1]
+        after = None
+        if (self.incremental and WATERMARKS[table_name][2] == 'id'
+                and self.watermarks.get(table_name) is not None and not self.watermark_parent(table_name)):
+            after = int(self.watermarks[table_name])
+        cursor = self.connection.cursor()
+        if after is None:
+            cursor.execute(f"SELECT MIN({pk_column}), MAX({pk_column}) FROM {table_name}")
+        else:
+            cursor.execute(f"SELECT MIN({pk_column}), MAX({pk_column}) FROM {table_name} "
+                           f"WHERE {pk_column} > %s", (after,))
+        min_id, max_id = cursor.fetchone()
+        cursor.close()
+        
+        if min_id is None:
+            return []
+        
+        step = max(1, -(-(max_id - min_id + 1) // shards))
+        return [(start - 1, min(start + step - 1, max_id)) for start in range(min_id, max_id + 1, step)]
+    
+    def keyset_clause(self, table_name: str, key_range: Tuple[int, int]) -> str:
+        """Filtro de rango + paginación por clave (sin OFFSET) sobre la PK"""
+        sql_pk = SHARDED_TABLES[table_name][0]
+        after, upto = key_range
+        return f"""AND {sql_pk} > {after} AND {sql_pk} <= {upto}
+        ORDER BY {sql_pk}
+        LIMIT {self.chunk_size}"""
+    
+    def extract_key_range(self, table_name: str, key_range: Tuple[int, int]) -> pd.DataFrame:
+        """
+        Extraer un rango de PK página a página: cada página continúa desde la
+        última clave leída, así cada consulta es corta y usa el índice primario
+        """
+        pk_column = SHARDED_TABLES[table_name][1]
+        after, upto = key_range
+        pages = []
+        while after < upto:
+            query = getattr(self, f"query_{table_name}")(key_range=(after, upto))
+            page = pd.read_sql(query, self._current_connection(),
+                               params=self.get_incremental_params(table_name) or None)
+            if page.empty:
+                break
+            pages.append(page)
+            if len(page) < self.chunk_size:
+                break
+            after = int(page[pk_column].iloc[-1])
+        
+        if not pages:
+            return pd.DataFrame()
+        return apply_schema(pd.concat(pages, ignore_index=True), table_name)
+    
+    # ================= UNIDADES Y CHECKPOINT =================
+    
+    def open_checkpoint(self):
+        """Abrir el checkpoint; solo se reanuda una extracción con las mismas marcas de agua"""
+        if self.checkpoint is None:
+            return
+        params = {"incremental": bool(self.incremental), "watermarks": self.watermarks,
+                  "columns": self.source_columns, "tables": self.tables}
+        try:
+            completed = self.checkpoint.open(params)
+        except Exception as e:
+            logger.warning(f"Checkpoint desactivado: {str(e)}")
+            self.checkpoint = None
+            return
+        if completed:
+            logger.info(f"Reanudando extracción: {completed} unidades ya completadas en checkpoint")
+    
+    def plan_units(self, tables: List[str], shards: int) -> List[Tuple[str, str, Any]]:
+        """
+        Dividir la extracción en unidades (id_unidad, tabla, tarea). Cada tabla es una
+        unidad; las tablas de SHARDED_TABLES se dividen en rangos de PK si shards > 1.
+        Al reanudar se reutilizan los rangos guardados en el checkpoint.
+        """
+        units = []
+        for table in tables:
+            ranges = None
+            if self.checkpoint is not None and not self.checkpoint.is_complete(table):
+                ranges = self.checkpoint.get_ranges(table)
+            if ranges is None and shards > 1 and table in SHARDED_TABLES:
+                ranges = self.get_key_ranges(table, shards)
+                if self.checkpoint is not None:
+                    self.checkpoint.set_ranges(table, ranges)
+            
+            if ranges is None:
+                units.append((table, table, partial(self.fetch_table, table)))
+            else:
+                for after, upto in ranges:
+                    units.append((f"{table}_{after}_{upto}", table,
+                                  partial(self.extract_key_range, table, (after, upto))))
+        return units
+    
+    def run_unit(self, unit_id: str, table_name: str, task) -> pd.DataFrame:
+        """Extraer una unidad o recuperarla del checkpoint si ya se completó"""
+        if self.checkpoint is not None and self.checkpoint.is_complete(unit_id):
+            df = self.checkpoint.load_unit(unit_id)
+            logger.info(f"{unit_id}: {len(df)} registros recuperados del checkpoint")
+            return df
+        
+        try:
+            df = task()
+        except Exception as e:
+            logger.error(f"Error extrayendo {unit_id}: {str(e)}")
+            self.failed_tables.append(table_name)
+            return pd.DataFrame()
+        
+        if self.checkpoint is not None:
+            unit_watermark = {}
+            self.collect_watermark(table_name, df, unit_watermark)
+            try:
+                self.checkpoint.save_unit(unit_id, table_name, df, unit_watermark.get(table_name))
+            except Exception as e:
+                logger.warning(f"No se pudo guardar checkpoint de {unit_id}: {str(e)}")
+        return df
+    
+    def combine_units(self, tables: List[str], units: List[Tuple[str, str, Any]],
+                      frames: Dict[int, pd.DataFrame]) -> Dict[str, pd.DataFrame]:
+        """Unir los resultados de las unidades por tabla, en el orden de planificación"""
+        results = {}
+        for table in tables:
+            table_frames = [frames[i] for i, unit in enumerate(units) if unit[1] == table]
+            if len(table_frames) == 1:
+                results[table] = table_frames[0]
+            else:
+                # Unir los rangos en orden de PK (tablas grandes sin filas no tienen rangos)
+                non_empty = [df for df in table_frames if not df.empty]
+                results[table] = pd.concat(non_empty, ignore_index=True) if non_empty else pd.DataFrame()
+                if table_frames:
+                    logger.info(f"Extraídos {len(results[table])} registros de {table} en {len(table_frames)} rangos de PK")
+        return results
+    
+    # ================= EXTRACCIÓN PARALELA =================
+    
+    def _run_with_pool(self, task, pool: Queue) -> pd.DataFrame:
+        """Ejecutar una tarea de extracción con una conexión prestada del pool"""
+        conn = pool.get()
+        self._local.connection = conn
+        try:
+            return task()
+        finally:
+            self._local.connection = None
+            pool.put(conn)
+    
+    def extract_parallel(self, workers: int = 4, shards: Optional[int] = None) -> Dict[str, pd.DataFrame]:
+        """
+        Extraer las tablas de forma concurrente sobre N conexiones con el mismo snapshot.
+        Las tablas más grandes se programan primero. Las tablas de SHARDED_TABLES se
+        dividen en rangos de PK que se extraen en paralelo y se unen en el cliente.
+        
+        Args:
+            workers: número de conexiones/hilos
+            shards: rangos por tabla grande (por defecto = workers, 1 = sin dividir)
+        """
+        tables = [t for t in self.get_size_priority() if t in self.tables]
+        workers = max(1, min(workers, len(tables)))
+        shards = workers if shards is None else shards
+        logger.info(f"--- Extracción paralela: {workers} workers, orden: {', '.join(tables)} ---")
+        
+        connections = self.open_snapshot_connections(workers)
+        self.setup_scope(connections)
+        pool = Queue()
+        for conn in connections:
+            pool.put(conn)
+        
+        # Unidades (tabla o rango de PK); las ya guardadas en checkpoint no consultan el SGP
+        units = self.plan_units(tables, shards)
+        
+        frames = {}
+        try:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='sgp_extract') as executor:
+                futures = {executor.submit(self._run_with_pool, partial(self.run_unit, *unit), pool): i
+                           for i, unit in enumerate(units)}
+                for future in as_completed(futures):
+                    frames[futures[future]] = future.result()
+        finally:
+            self.close_connections(connections)
+        
+        results = self.combine_units(tables, units, frames)
+        
+        # Devolver en el orden lógico de extracción
+        return {table: results[table] for table in EXTRACTION_ORDER if table in results}
+
+    # ================= EXTRACCIÓN EN STREAMING =================
+    
+    def stream_all(self, tables: Optional[List[str]] = None,
+                   chunk_size: Optional[int] = None,
+                   commit_watermarks: bool = False) -> Iterator[Tuple[str, pd.DataFrame]]:
+        """
+        Extraer las tablas como un generador de (tabla, lote) sin materializar
+        ninguna tabla completa. La memoria queda acotada por chunk_size.
+        
+        En modo incremental se leen las marcas de agua pero, por defecto, no se
+        guardan: un consumidor de solo lectura (análisis, pruebas) no debe hacer
+        que la siguiente ejecución incremental se salte filas que no llegaron al DW.
+        Los proyectos nuevos en el alcance llegan por WATERMARK_PARENT (sin
+        comparar las claves del alcance, que solo actualiza extract_all).
+        
+        Args:
+            tables: tablas a extraer (por defecto self.tables)
+            chunk_size: filas por lote (por defecto self.chunk_size)
+            commit_watermarks: True, guardar las marcas de agua cuando el consumidor
+                               agota el generador (solo si el consumidor cargó todos los lotes)
+        """
+        # Las claves del alcance no se comparan ni se guardan en streaming
+        self.scope_store = self.previous_scope = None
+        if not self.connect():
+            return
+        
+        new_watermarks = dict(self.watermarks)
+        try:
+            self.setup_scope([self.connection])
+            for table_name in tables or self.tables:
+                for chunk in self.stream_table(table_name, chunk_size):
+                    self.collect_watermark(table_name, chunk, new_watermarks)
+                    yield table_name, chunk
+            # Solo se llega aquí si el consumidor agotó el generador
+            if commit_watermarks:
+                self.save_watermarks(new_watermarks)
+        finally:
+            self.disconnect()
 
     # ================= MÉTODO PRINCIPAL =================
     
-    def extract_all(self) -> Dict[str, pd.DataFrame]:
+    def extract_all(self, parallel: bool = False, workers: int = 4, shards: Optional[int] = None) -> Dict[str, pd.DataFrame]:
         """
         Extraer todos los datos siguiendo el orden de dependencias
         Retorna diccionario con DataFrames de todas las tablas
+        
+        Cada tabla (o rango de PK) completada se guarda en el checkpoint. Si alguna
+        falla se devuelve {} y la siguiente ejecución continúa desde la primera
+        unidad pendiente en lugar de repetir toda la extracción.
+        
+        Args:
+            parallel: True, extrae las tablas en paralelo con snapshot consistente
+            workers: número de conexiones/hilos en modo paralelo
+            shards: rangos de PK por tabla grande (1 = sin dividir; en paralelo por defecto = workers)
         """
         if not self.connect():
             return {}
         
         extracted_data = {}
+        self.open_checkpoint()
         
         try:
             mode_msg = "INCREMENTAL" if self.incremental else "COMPLETA"
             if self.incremental and self.control:
                 last_date = self.control.get_last_extraction_date()
                 logger.info(f"=== EXTRACCIÓN {mode_msg} - Desde: {last_date} ===")
+                logger.info(f"Marcas de agua: {self.watermarks or 'ninguna (extracción completa)'}")
+            elif self.restricted:
+                logger.info(f"=== EXTRACCIÓN {mode_msg} DE {len(self.proyecto_ids)} PROYECTOS "
+                            f"Y {len(self.contrato_ids)} CONTRATOS ===")
             else:
                 logger.info(f"=== EXTRACCIÓN {mode_msg} ===")
             
             # 1. Tablas
-            logger.info("--- Extrayendo Tablas ---")
-            extracted_data['clientes'] = self.extract_clientes()
-            extracted_data['empleados'] = self.extract_empleados()
-            extracted_data['contratos'] = self.extract_contratos()
-            extracted_data['proyectos'] = self.extract_proyectos()
-            extracted_data['hitos'] = self.extract_hitos()
-            extracted_data['tareas'] = self.extract_tareas()
-            extracted_data['asignaciones'] = self.extract_asignaciones()
-            extracted_data['pruebas'] = self.extract_pruebas()
-            extracted_data['errores'] = self.extract_errores()
-            extracted_data['riesgos'] = self.extract_riesgos()
-            extracted_data['gastos'] = self.extract_gastos()
-            extracted_data['penalizaciones'] = self.extract_penalizaciones()
+            if parallel:
+                extracted_data = self.extract_parallel(workers, shards)
+            else:
+                self.setup_scope([self.connection])
+                logger.info("--- Extrayendo Tablas ---")
+                units = self.plan_units(self.tables, shards or 1)
+                frames = {i: self.run_unit(*unit) for i, unit in enumerate(units)}
+                extracted_data = self.combine_units(self.tables, units, frames)
+            
+            if not self.failed_tables and (self.new_proyectos or self.new_contratos):
+                self.extract_new_scope(extracted_data, parallel, workers)
+            
+            if self.failed_tables:
+                logger.error(f"Extracción incompleta, fallaron: {', '.join(sorted(set(self.failed_tables)))}")
+                if self.checkpoint is not None:
+                    done = len(self.checkpoint.state.get("units", {}))
+                    logger.error(f"{done} unidades guardadas en checkpoint; la próxima ejecución continuará desde la primera pendiente")
+                return {}
             
             logger.info("=== EXTRACCIÓN COMPLETADA EXITOSAMENTE ===")
             
@@ -354,40 +1203,142 @@ class SGPExtractor:
             for table_name, df in extracted_data.items():
                 logger.info(f"  - {table_name}: {len(df)} registros")
             
+            new_watermarks = dict(self.watermarks)
+            for table_name, df in extracted_data.items():
+                self.collect_watermark(table_name, df, new_watermarks)
+            
             # Actualizar fecha de control si hay datos nuevos
             if self.incremental and self.control and total_records > 0:
                 self.control.update_last_extraction_date()
                 logger.info("Fecha de control incremental actualizada")
+                self.save_watermarks(new_watermarks)
+            
+            # Guardar snapshot de los datos crudos para re-ejecuciones sin OLTP
+            # (solo extracciones completas: un snapshot parcial vaciaría tablas al recargarlo)
+            if self.snapshot_dir and not self.failed_tables and not self.targets and not self.restricted:
+                SnapshotCache(self.snapshot_dir).save(
+                    extracted_data,
+                    watermarks=new_watermarks,
+                    incremental=bool(self.incremental and self.watermarks),
+                    base_watermarks=self.watermarks
+                )
+            
+            # Extracción terminada: el checkpoint ya no hace falta
+            if self.checkpoint is not None:
+                self.checkpoint.clear()
                 
         except Exception as e:
             logger.error(f"Error durante la extracción: {str(e)}")
+            return {}
         finally:
             self.disconnect()
             
         return extracted_data
 
 
-def extract_all(incremental: bool = True) -> Dict[str, pd.DataFrame]:
+def extract_all(incremental: bool = True, parallel: bool = False, workers: int = 4,
+                shards: Optional[int] = None,
+                snapshot_dir: Optional[str] = DEFAULT_SNAPSHOT_DIR,
+                adapter: Optional[SourceAdapter] = None,
+                checkpoint_dir: Optional[str] = DEFAULT_CHECKPOINT_DIR,
+                prune_columns: bool = True,
+                targets: Optional[List[str]] = None,
+                control_path: str = DEFAULT_CONTROL_PATH,
+                scope_path: Optional[str] = DEFAULT_SCOPE_PATH) -> Dict[str, pd.DataFrame]:
     """
     Función principal para extraer todos los datos
     
     Args:
         incremental: True, solo extrae registros nuevos
                     False, carga completa
+        parallel: True, extracción concurrente con snapshot consistente
+        workers: número de conexiones en modo paralelo
+        shards: rangos de PK por tabla grande (unidades de checkpoint más pequeñas)
+        snapshot_dir: carpeta donde guardar el snapshot Parquet (None = no guardar)
+        adapter: origen de datos (por defecto MySQLSourceAdapter)
+        checkpoint_dir: carpeta del checkpoint para reanudar (None = sin checkpoint)
+        prune_columns: True, solo extrae las columnas que leen las transformaciones
+        targets: tablas del DW a construir; solo se extraen sus tablas origen (None = todas)
+        control_path: archivo del control incremental (marcas de agua)
+        scope_path: claves del alcance de la extracción anterior (None = no comparar)
     """
-    extractor = SGPExtractor(incremental=incremental)
-    return extractor.extract_all()
+    extractor = SGPExtractor(incremental=incremental, snapshot_dir=snapshot_dir, adapter=adapter,
+                             checkpoint_dir=checkpoint_dir, prune_columns=prune_columns, targets=targets,
+                             control_path=control_path, scope_path=scope_path)
+    return extractor.extract_all(parallel=parallel, workers=workers, shards=shards)
+
+def extract_projects(proyecto_ids: List[int], contrato_ids: Optional[List[int]] = None,
+                     targets: Optional[List[str]] = None, parallel: bool = False, workers: int = 4,
+                     adapter: Optional[SourceAdapter] = None) -> Dict[str, pd.DataFrame]:
+    """
+    Extracción completa (sin marcas de agua) de algunos proyectos del alcance:
+    todas sus filas hijas, sin importar cuándo se extrajeron por primera vez
+    
+    Args:
+        proyecto_ids: proyectos a extraer
+        contrato_ids: contratos cuyos proyectos también se extraen
+        targets: tablas del DW a construir; solo se extraen sus tablas origen (None = todas)
+        parallel: True, extracción concurrente con snapshot consistente
+        workers: número de conexiones en modo paralelo
+        adapter: origen de datos (por defecto MySQLSourceAdapter)
+    """
+    extractor = SGPExtractor(incremental=False, snapshot_dir=None, adapter=adapter, checkpoint_dir=None,
+                             targets=targets, proyecto_ids=proyecto_ids, contrato_ids=contrato_ids or [])
+    return extractor.extract_all(parallel=parallel, workers=workers)
+
+def stream_all(incremental: bool = True, chunk_size: int = DEFAULT_CHUNK_SIZE,
+               tables: Optional[List[str]] = None,
+               adapter: Optional[SourceAdapter] = None,
+               prune_columns: bool = True,
+               targets: Optional[List[str]] = None,
+               commit_watermarks: bool = False) -> Iterator[Tuple[str, pd.DataFrame]]:
+    """
+    Extracción en streaming: genera (tabla, DataFrame) en lotes de chunk_size filas
+    
+    Las marcas de agua solo se guardan con commit_watermarks=True (ver
+    SGPExtractor.stream_all); por defecto la extracción no cambia el control incremental.
+    
+    Ejemplo:
+        for table_name, chunk in stream_all(chunk_size=10000):
+            procesar(table_name, chunk)
+    """
+    # Sin comparación de alcance: los proyectos nuevos en el alcance llegan por WATERMARK_PARENT
+    extractor = SGPExtractor(incremental=incremental, chunk_size=chunk_size, adapter=adapter,
+                             prune_columns=prune_columns, targets=targets, scope_path=None,
+                             snapshot_dir=None, checkpoint_dir=None)
+    yield from extractor.stream_all(tables=tables, commit_watermarks=commit_watermarks)
 
 def reset_incremental_control():
     from utils.incremental_control import IncrementalControl
     control = IncrementalControl()
     control.reset_control()
+    ScopeKeysStore().clear()
 
-def get_last_extraction_info():
+def get_last_extraction_info(control_path: str = DEFAULT_CONTROL_PATH):
     from utils.incremental_control import IncrementalControl
-    control = IncrementalControl()
+    control = IncrementalControl(control_path)
     return control.get_last_extraction_date()
 
+def load_snapshot(run_id: Optional[str] = None,
+                  snapshot_dir: str = DEFAULT_SNAPSHOT_DIR) -> Dict[str, pd.DataFrame]:
+    """Cargar datos crudos desde un snapshot (el más reciente si run_id es None)"""
+    data = SnapshotCache(snapshot_dir).load(run_id)
+    # Snapshots antiguos pueden contener columnas sin tipar
+    return {table_name: apply_schema(df, table_name) for table_name, df in data.items()}
+
+def get_data_watermarks(data: Dict[str, pd.DataFrame],
+                        base: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Marcas de agua que resultan de extraer data partiendo de base (las de la extracción anterior)"""
+    watermarks = dict(base or {})
+    for table_name, df in data.items():
+        SGPExtractor.collect_watermark(table_name, df, watermarks)
+    return watermarks
+
+def get_watermarks_info(control_path: str = DEFAULT_CONTROL_PATH):
+    from utils.incremental_control import IncrementalControl
+    control = IncrementalControl(control_path)
+    return control.get_watermarks()
+
 
 if __name__ == "__main__":
     # Test de extracción
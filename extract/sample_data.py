@@ -0,0 +1,186 @@
+"""
+Datos sintéticos del SGP para la base SQLite local
+
+Genera clientes, contratos, proyectos y sus tablas hijas respetando las
+claves foráneas de DB/BD_SGP.sql. El volumen escala con n_proyectos
+(por proyecto: 4 hitos, 12 tareas, 6 errores, 8 asignaciones, 10 gastos...),
+de modo que 100.000 proyectos producen varios millones de filas.
+"""
+
+import logging
+from datetime import date
+from typing import Dict, List
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+BASE_DATE = np.datetime64(date(2019, 1, 1))
+BATCH_SIZE = 50000
+
+ESTADOS_PROYECTO = ['Cerrado', 'Cancelado', 'En Progreso', 'Planificado']
+ESTADOS_CONTRATO = ['Cerrado', 'Cancelado', 'Activo']
+ROLES = ['Desarrollador', 'QA', 'Analista', 'Project Manager', 'Arquitecto']
+SENIORITY = ['Junior', 'Semi-Senior', 'Senior']
+TIPOS_PRUEBA = ['Unitaria', 'Integración', 'Sistema', 'Aceptación']
+TIPOS_ERROR = ['Funcional', 'Rendimiento', 'Seguridad', 'Interfaz']
+TIPOS_RIESGO = ['Técnico', 'Operativo', 'Financiero', 'Legal']
+SEVERIDADES = ['Alta', 'Media', 'Baja']
+TIPOS_GASTO = ['Materiales', 'Salarios', 'Licencias', 'Penalizacion']
+CATEGORIAS = ['CAPEX', 'OPEX']
+
+def _dates(offsets: np.ndarray) -> List[str]:
+    return np.datetime_as_string(BASE_DATE + offsets.astype('timedelta64[D]'), unit='D').tolist()
+
+def _with_nulls(values: List, rng: np.random.Generator, ratio: float) -> List:
+    mask = rng.random(len(values)) < ratio
+    return [None if m else v for v, m in zip(values, mask)]
+
+def _insert(connection, table_name: str, columns: Dict[str, List]):
+    names = list(columns)
+    rows = list(zip(*columns.values()))
+    query = f"INSERT INTO {table_name} ({', '.join(names)}) VALUES ({', '.join(['%s'] * len(names))})"
+    cursor = connection.cursor()
+    for i in range(0, len(rows), BATCH_SIZE):
+        cursor.executemany(query, rows[i:i + BATCH_SIZE])
+    cursor.close()
+    connection.commit()
+    logger.info(f"{table_name}: {len(rows)} filas generadas")
+
+def populate_sample_data(adapter, n_proyectos: int = 1000, seed: int = 42) -> Dict[str, int]:
+    """
+    Llenar una base vacía con datos sintéticos
+
+    Args:
+        adapter: adaptador de origen (normalmente SQLiteSourceAdapter)
+        n_proyectos: número de proyectos; el resto de tablas escala con él
+        seed: semilla para reproducir el mismo conjunto de datos
+
+    Returns:
+        Dict con filas generadas por tabla
+    """
+    rng = np.random.default_rng(seed)
+    n_clientes = max(1, n_proyectos // 20)
+    n_contratos = max(1, n_proyectos // 2)
+    n_empleados = max(10, n_proyectos // 10)
+    n_hitos = n_proyectos * 4
+    n_tareas = n_hitos * 3
+    n_asignaciones = n_proyectos * 8
+    n_pruebas = n_hitos
+    n_errores = n_tareas // 2
+    n_riesgos = n_proyectos * 2
+    n_gastos = n_proyectos * 10
+    n_penalizaciones = n_contratos // 2
+
+    tables = {}
+    tables['clientes'] = {
+        'ID_Cliente': list(range(1, n_clientes + 1)),
+        'NombreCliente': [f"Cliente {i}" for i in range(1, n_clientes + 1)],
+    }
+    tables['empleados'] = {
+        'ID_Empleado': list(range(1, n_empleados + 1)),
+        'NombreCompleto': [f"Empleado {i}" for i in range(1, n_empleados + 1)],
+        'Rol': rng.choice(ROLES, n_empleados).tolist(),
+        'Seniority': rng.choice(SENIORITY, n_empleados).tolist(),
+        'CostoPorHora': rng.uniform(15, 90, n_empleados).round(2).tolist(),
+    }
+    tables['contratos'] = {
+        'ID_Contrato': list(range(1, n_contratos + 1)),
+        'ID_Cliente': rng.integers(1, n_clientes + 1, n_contratos).tolist(),
+        'ValorTotalContrato': rng.uniform(1e4, 1e6, n_contratos).round(2).tolist(),
+        'Estado': rng.choice(ESTADOS_CONTRATO, n_contratos).tolist(),
+    }
+
+    inicio_proyecto = rng.integers(0, 1800, n_proyectos)
+    duracion_proyecto = rng.integers(30, 600, n_proyectos)
+    tables['proyectos'] = {
+        'ID_Proyecto': list(range(1, n_proyectos + 1)),
+        'ID_Contrato': rng.integers(1, n_contratos + 1, n_proyectos).tolist(),
+        'NombreProyecto': [f"Proyecto {i}" for i in range(1, n_proyectos + 1)],
+        'Version': rng.choice(['1.0', '1.1', '2.0'], n_proyectos).tolist(),
+        'FechaInicio': _dates(inicio_proyecto),
+        'FechaFin': _with_nulls(_dates(inicio_proyecto + duracion_proyecto), rng, 0.05),
+        'Estado': rng.choice(ESTADOS_PROYECTO, n_proyectos).tolist(),
+    }
+
+    # Hitos dentro del rango de su proyecto
+    hito_proyecto = rng.integers(1, n_proyectos + 1, n_hitos)
+    hito_inicio = inicio_proyecto[hito_proyecto - 1] + rng.integers(0, 200, n_hitos)
+    hito_plan = hito_inicio + rng.integers(10, 90, n_hitos)
+    tables['hitos'] = {
+        'ID_Hito': list(range(1, n_hitos + 1)),
+        'ID_Proyecto': hito_proyecto.tolist(),
+        'Descripcion': [f"Hito {i}" for i in range(1, n_hitos + 1)],
+        'Estado': rng.choice(['Completado', 'Pendiente'], n_hitos).tolist(),
+        'FechaInicio': _dates(hito_inicio),
+        'FechaFinPlanificada': _with_nulls(_dates(hito_plan), rng, 0.05),
+        'FechaFinReal': _with_nulls(_dates(hito_plan + rng.integers(-10, 40, n_hitos)), rng, 0.1),
+    }
+
+    tarea_hito = rng.integers(1, n_hitos + 1, n_tareas)
+    tables['tareas'] = {
+        'ID_Tarea': list(range(1, n_tareas + 1)),
+        'ID_Hito': tarea_hito.tolist(),
+        'NombreTarea': [f"Tarea {i}" for i in range(1, n_tareas + 1)],
+        'Descripcion': ['Descripción de la tarea'] * n_tareas,
+        'Estado': rng.choice(['Completada', 'En Progreso', 'Pendiente'], n_tareas).tolist(),
+        'DuracionPlanificada': _with_nulls(rng.integers(1, 20, n_tareas).tolist(), rng, 0.05),
+        'DuracionReal': _with_nulls(rng.integers(1, 25, n_tareas).tolist(), rng, 0.1),
+    }
+
+    tables['asignaciones'] = {
+        'ID_Asignacion': list(range(1, n_asignaciones + 1)),
+        'ID_Proyecto': rng.integers(1, n_proyectos + 1, n_asignaciones).tolist(),
+        'ID_Empleado': rng.integers(1, n_empleados + 1, n_asignaciones).tolist(),
+        'HorasPlanificadas': rng.uniform(1, 160, n_asignaciones).round(2).tolist(),
+        'HorasReales': rng.uniform(1, 200, n_asignaciones).round(2).tolist(),
+        'FechaAsignacion': _dates(rng.integers(0, 2200, n_asignaciones)),
+    }
+    tables['pruebas'] = {
+        'ID_Prueba': list(range(1, n_pruebas + 1)),
+        'ID_Hito': rng.integers(1, n_hitos + 1, n_pruebas).tolist(),
+        'TipoPrueba': rng.choice(TIPOS_PRUEBA, n_pruebas).tolist(),
+        'Fecha': _dates(rng.integers(0, 2000, n_pruebas)),
+        'Exitosa': rng.integers(0, 2, n_pruebas).tolist(),
+    }
+    tables['errores'] = {
+        'ID_Error': list(range(1, n_errores + 1)),
+        'ID_Tarea': rng.integers(1, n_tareas + 1, n_errores).tolist(),
+        'TipoError': rng.choice(TIPOS_ERROR, n_errores).tolist(),
+        'Descripcion': ['Descripción del error'] * n_errores,
+        'Fecha': _dates(rng.integers(0, 2000, n_errores)),
+    }
+    tables['riesgos'] = {
+        'ID_Riesgo': list(range(1, n_riesgos + 1)),
+        'ID_Proyecto': rng.integers(1, n_proyectos + 1, n_riesgos).tolist(),
+        'TipoRiesgo': rng.choice(TIPOS_RIESGO, n_riesgos).tolist(),
+        'Severidad': rng.choice(SEVERIDADES, n_riesgos).tolist(),
+        'Descripcion': ['Descripción del riesgo'] * n_riesgos,
+        'FechaRegistro': _dates(rng.integers(0, 2000, n_riesgos)),
+    }
+    tables['gastos'] = {
+        'ID_Gasto': list(range(1, n_gastos + 1)),
+        'ID_Proyecto': rng.integers(1, n_proyectos + 1, n_gastos).tolist(),
+        'TipoGasto': rng.choice(TIPOS_GASTO, n_gastos).tolist(),
+        'Categoria': rng.choice(CATEGORIAS, n_gastos).tolist(),
+        'Monto': rng.uniform(10, 5000, n_gastos).round(2).tolist(),
+        'Fecha': _dates(rng.integers(0, 2200, n_gastos)),
+    }
+    tables['penalizaciones'] = {
+        'ID_Penalizacion': list(range(1, n_penalizaciones + 1)),
+        'ID_Contrato': rng.integers(1, n_contratos + 1, n_penalizaciones).tolist(),
+        'Monto': rng.uniform(100, 20000, n_penalizaciones).round(2).tolist(),
+        'Motivo': ['Retraso en entrega'] * n_penalizaciones,
+        'Fecha': _dates(rng.integers(0, 2000, n_penalizaciones)),
+    }
+
+    connection = adapter.connect()
+    try:
+        for table_name, columns in tables.items():
+            _insert(connection, table_name, columns)
+    finally:
+        connection.close()
+
+    counts = {table_name: len(next(iter(columns.values()))) for table_name, columns in tables.items()}
+    logger.info(f"Datos sintéticos generados: {sum(counts.values()):,} filas en {len(counts)} tablas")
+    return counts
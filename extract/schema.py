@@ -0,0 +1,143 @@
+"""
+Esquema tipado de las tablas extraídas del SGP
+
+pd.read_sql devuelve DECIMAL como decimal.Decimal y DATE como datetime.date,
+todo en dtype object. Aquí se declaran los tipos de cada columna para
+convertirlas UNA vez al extraer:
+- IDs          -> int32 (INT de MySQL)
+- DECIMAL      -> float64
+- DATE         -> datetime64[ns]
+- INT nulables -> Int32 / Int8 (enteros con NA de pandas)
+Las columnas de texto se dejan como object.
+"""
+
+import logging
+from typing import Dict
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+EXTRACTION_SCHEMA: Dict[str, Dict[str, str]] = {
+    'clientes': {
+        'ID_Cliente': 'int32',
+        'fecha_extraccion': 'datetime64[ns]',
+    },
+    'empleados': {
+        'ID_Empleado': 'int32',
+        'CostoPorHora': 'float64',
+        'fecha_extraccion': 'datetime64[ns]',
+    },
+    'contratos': {
+        'ID_Contrato': 'int32',
+        'ID_Cliente': 'int32',
+        'ValorTotalContrato': 'float64',
+        'fecha_extraccion': 'datetime64[ns]',
+    },
+    'proyectos': {
+        'ID_Proyecto': 'int32',
+        'ID_Contrato': 'int32',
+        'FechaInicio': 'datetime64[ns]',
+        'FechaFin': 'datetime64[ns]',
+        'ID_Cliente': 'int32',
+        'ValorTotalContrato': 'float64',
+        'fecha_extraccion': 'datetime64[ns]',
+    },
+    'hitos': {
+        'ID_Hito': 'int32',
+        'ID_Proyecto': 'int32',
+        'FechaInicio': 'datetime64[ns]',
+        'FechaFinPlanificada': 'datetime64[ns]',
+        'FechaFinReal': 'datetime64[ns]',
+        'dias_retraso': 'Int32',
+        'fecha_extraccion': 'datetime64[ns]',
+    },
+    'tareas': {
+        'ID_Tarea': 'int32',
+        'ID_Hito': 'int32',
+        'ID_Proyecto': 'int32',
+        'DuracionPlanificada': 'Int32',
+        'DuracionReal': 'Int32',
+        'desviacion_duracion': 'Int32',
+        'fecha_extraccion': 'datetime64[ns]',
+    },
+    'asignaciones': {
+        'ID_Asignacion': 'int32',
+        'ID_Proyecto': 'int32',
+        'ID_Empleado': 'int32',
+        'HorasPlanificadas': 'float64',
+        'HorasReales': 'float64',
+        'FechaAsignacion': 'datetime64[ns]',
+        'CostoPorHora': 'float64',
+        'costo_real_horas': 'float64',
+        'costo_planificado_horas': 'float64',
+        'fecha_extraccion': 'datetime64[ns]',
+    },
+    'pruebas': {
+        'ID_Prueba': 'int32',
+        'ID_Hito': 'int32',
+        'ID_Proyecto': 'int32',
+        'Fecha': 'datetime64[ns]',
+        'Exitosa': 'Int8',
+        'fecha_extraccion': 'datetime64[ns]',
+    },
+    'errores': {
+        'ID_Error': 'int32',
+        'ID_Tarea': 'int32',
+        'ID_Hito': 'int32',
+        'ID_Proyecto': 'int32',
+        'Fecha': 'datetime64[ns]',
+        'fecha_extraccion': 'datetime64[ns]',
+    },
+    'riesgos': {
+        'ID_Riesgo': 'int32',
+        'ID_Proyecto': 'int32',
+        'FechaRegistro': 'datetime64[ns]',
+        'fecha_extraccion': 'datetime64[ns]',
+    },
+    'gastos': {
+        'ID_Gasto': 'int32',
+        'ID_Proyecto': 'int32',
+        'Monto': 'float64',
+        'Fecha': 'datetime64[ns]',
+        'fecha_extraccion': 'datetime64[ns]',
+    },
+    'penalizaciones': {
+        'ID_Penalizacion': 'int32',
+        'ID_Contrato': 'int32',
+        'ID_Cliente': 'int32',
+        'Monto': 'float64',
+        'Fecha': 'datetime64[ns]',
+        'fecha_extraccion': 'datetime64[ns]',
+    },
+}
+
+def _convert_column(series: pd.Series, dtype: str) -> pd.Series:
+    if series.dtype == dtype:
+        return series
+
+    if dtype.startswith('datetime64'):
+        return pd.to_datetime(series, errors='coerce')
+
+    numeric = pd.to_numeric(series, errors='coerce')
+    if dtype in ('int32', 'int64') and numeric.isna().any():
+        # Un ID nulo no debería existir; se conserva como entero nulable
+        logger.warning(f"Columna {series.name} con nulos, se usa Int32 en lugar de {dtype}")
+        return numeric.astype('Int32')
+    return numeric.astype(dtype)
+
+def apply_schema(df: pd.DataFrame, table_name: str) -> pd.DataFrame:
+    """
+    Convertir las columnas de df a los tipos declarados para la tabla.
+    Las columnas que no están en el esquema (o no se extrajeron) se dejan igual.
+    """
+    schema = EXTRACTION_SCHEMA.get(table_name)
+    if not schema or df.empty:
+        return df
+
+    converted = {
+        column: _convert_column(df[column], dtype)
+        for column, dtype in schema.items()
+        if column in df.columns
+    }
+    return df.assign(**converted)
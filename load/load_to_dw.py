@@ -3,10 +3,11 @@ Módulo de Carga (Load) - ETL Proyecto Escolar
 Carga datos transformados al Data Warehouse (MySQL)
 """
 import pandas as pd
+import numpy as np
 import mysql.connector
 from mysql.connector import Error as MySQLError
 import logging
-from typing import Dict
+from typing import Dict, Iterable, List, Optional
 import sys
 import os
 
@@ -18,14 +19,25 @@ from config.db_config import DB_DW
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.DEBUG)
 
+# Tablas que solo crecen (calendario persistente de dim_tiempo): nunca se vacían,
+# solo se insertan las filas con clave mayor que el máximo ya cargado
+APPEND_ONLY_KEYS = {
+    'dim_tiempo': 'ID_Tiempo',
+}
+
 class DWLoader:
-    def __init__(self):
+    def __init__(self, adapter=None):
         self.connection = None
         self.cursor = None
+        # Adaptador de extract/adapters.py (None = MySQL configurado en DB_DW)
+        self.adapter = adapter
     
     def connect(self):
         try:
-            self.connection = mysql.connector.connect(**DB_DW)
+            if self.adapter is not None:
+                self.connection = self.adapter.connect()
+            else:
+                self.connection = mysql.connector.connect(**DB_DW)
             self.cursor = self.connection.cursor()
             logger.info("Conexión establecida con DW exitosamente")
             return True
@@ -88,38 +100,42 @@ class DWLoader:
             logger.warning(f"Error vaciando tabla {table_name}: {str(e)}")
             return False
     
-    def convert_pandas_types(self, df: pd.DataFrame) -> pd.DataFrame:
-        df_converted = df.copy()
+    def get_max_id(self, table_name: str, id_column: str) -> int:
+        """Obtener el máximo de una columna ID en el DW (0 si la tabla está vacía)"""
+        try:
+            self.cursor.execute(f"SELECT COALESCE(MAX({id_column}), 0) FROM {table_name}")
+            return int(self.cursor.fetchone()[0])
+        except Exception as e:
+            logger.warning(f"No se pudo leer MAX({id_column}) de {table_name}: {str(e)}")
+            return 0
+    
+    @staticmethod
+    def _native_values(column: pd.Series) -> np.ndarray:
+        """Valores de una columna como objetos Python (None en lugar de NaN/NaT)"""
+        values = column.to_numpy(dtype=object, copy=True)
+        nulls = column.isna().to_numpy()
         
-        # Convertir todos los valores a tipos Python nativos
-        for col in df_converted.columns:
-            
-            # Manejar fechas especialmente
-            if df_converted[col].dtype.name == 'object':
-                # Verificar si es una columna de fechas
-                first_non_null = df_converted[col].dropna().iloc[0] if not df_converted[col].dropna().empty else None
-                if first_non_null and hasattr(first_non_null, 'date'):
-                    # Es una fecha, convertir a string en formato MySQL
-                    df_converted[col] = df_converted[col].apply(lambda x: x.strftime('%Y-%m-%d') if x is not None else None)
-                else:
-                    # Es string u object regular
-                    df_converted[col] = df_converted[col].where(pd.notnull(df_converted[col]), None)
-            
-            # Luego convertir tipos numéricos
-            elif df_converted[col].dtype.name.startswith('int'):
-                # Convertir cualquier tipo de entero a int Python
-                df_converted[col] = df_converted[col].apply(lambda x: int(x) if pd.notnull(x) else None)
-            elif df_converted[col].dtype.name.startswith('float'):
-                # Convertir cualquier tipo de float a float Python
-                df_converted[col] = df_converted[col].apply(lambda x: float(x) if pd.notnull(x) else None)
-            elif df_converted[col].dtype.name == 'bool':
-                # Convertir bool a bool Python
-                df_converted[col] = df_converted[col].apply(lambda x: bool(x) if pd.notnull(x) else None)
+        if column.dtype.name == 'object' and not nulls.all():
+            first_non_null = values[~nulls][0]
+            if hasattr(first_non_null, 'date'):
+                # Es una fecha, convertir a string en formato MySQL
+                values[~nulls] = [x.strftime('%Y-%m-%d') for x in values[~nulls]]
             else:
-                # Para otros tipos, simplemente reemplazar NaN con None
-                df_converted[col] = df_converted[col].where(pd.notnull(df_converted[col]), None)
+                # Escalares numpy dentro de columnas object (numpy.int64 -> int)
+                values[~nulls] = [x.item() if isinstance(x, np.generic) else x for x in values[~nulls]]
+        
+        values[nulls] = None
+        return values
+    
+    def convert_pandas_types(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Convertir todos los valores a tipos Python nativos
         
-        return df_converted
+        Cada columna se convierte directamente a un arreglo de objetos, sin
+        copiar antes el DataFrame completo (int/float/bool de numpy a Python,
+        fechas en columnas object a 'YYYY-MM-DD', nulos a None).
+        """
+        return pd.DataFrame({col: self._native_values(df[col]) for col in df.columns}, index=df.index, dtype=object)
     
     def load_dataframe_to_table(self, df: pd.DataFrame, table_name: str, mode: str = 'replace'):
         if df.empty:
@@ -160,20 +176,8 @@ class DWLoader:
             # Preparar datos
             records_to_insert = len(df_converted)
             
-            # Convertir DataFrame a lista de tuplas (aplicando conversión de tipos)
-            converted_rows = []
-            for _, row in df_converted.iterrows():
-                converted_row = []
-                for value in row:
-                    if pd.isna(value):
-                        converted_row.append(None)
-                    elif hasattr(value, 'item'):  # Para tipos numpy
-                        converted_row.append(value.item())  # Convierte numpy.int64 a int Python
-                    else:
-                        converted_row.append(value)
-                converted_rows.append(tuple(converted_row))
-            
-            data_tuples = converted_rows
+            # Convertir DataFrame a lista de tuplas (los valores ya son tipos Python nativos)
+            data_tuples = list(df_converted.itertuples(index=False, name=None))
             
             # Crear placeholders para INSERT
             placeholders = ', '.join(['%s'] * len(df_converted.columns))
@@ -192,6 +196,10 @@ class DWLoader:
             
             # INSERT datos
             insert_query = f"INSERT INTO {table_name} ({columns}) VALUES ({placeholders})"
+            if mode == 'append':
+                # Carga incremental: actualizar filas existentes (upsert por PK)
+                updates = ', '.join(f"{col} = VALUES({col})" for col in df_converted.columns)
+                insert_query += f" ON DUPLICATE KEY UPDATE {updates}"
             
             # Insertar en lotes para mejor rendimiento
             batch_size = 1000
@@ -339,18 +347,24 @@ def get_table_schemas():
         """
     }
 
-def load_all_to_dw(transformed_data: Dict[str, pd.DataFrame]) -> Dict[str, int]:
+def load_all_to_dw(transformed_data: Dict[str, pd.DataFrame], mode: str = 'replace',
+                   adapter=None, tables: Optional[List[str]] = None) -> Dict[str, int]:
     """
     Cargar todos los datos transformados al Data Warehouse
     (Asume que el esquema del DW ya existe)
     
     Args:
         transformed_data: Diccionario con todas las tablas transformadas
+        mode: 'replace' vacía cada tabla antes de insertar (carga completa)
+              'append' inserta/actualiza por PK sin vaciar (carga incremental; las
+              claves subrogadas son estables, utils/key_registry.py)
+        adapter: destino alternativo (p. ej. SQLiteSourceAdapter con DB/DW_SSD.sql)
+        tables: cargar solo estas tablas (None = todas); el resto no se toca
         
     Returns:
         Dict con conteo de registros cargados por tabla
     """
-    loader = DWLoader()
+    loader = DWLoader(adapter)
     load_results = {}
     
     # Orden de carga: DIMENSIONES primero, luego HECHOS
@@ -362,6 +376,8 @@ def load_all_to_dw(transformed_data: Dict[str, pd.DataFrame]) -> Dict[str, int]:
         # Tablas de hechos al final
         'hechos_asignaciones', 'hechos_proyectos'
     ]
+    if tables:
+        load_order = [t for t in load_order if t in tables]
     
     try:
         if not loader.connect():
@@ -377,8 +393,20 @@ def load_all_to_dw(transformed_data: Dict[str, pd.DataFrame]) -> Dict[str, int]:
             if table_name in transformed_data:
                 df = transformed_data[table_name]
                 
+                if table_name in APPEND_ONLY_KEYS:
+                    id_column = APPEND_ONLY_KEYS[table_name]
+                    df = df[df[id_column] > loader.get_max_id(table_name, id_column)]
+                    if df.empty:
+                        logger.info(f" {table_name}: sin filas nuevas")
+                        load_results[table_name] = 0
+                        continue
+                    records_loaded = loader.load_dataframe_to_table(df, table_name, mode='append')
+                    load_results[table_name] = records_loaded
+                    total_records += records_loaded
+                    continue
+                
                 # Cargar datos directamente (sin crear tablas)
-                records_loaded = loader.load_dataframe_to_table(df, table_name, mode='replace')
+                records_loaded = loader.load_dataframe_to_table(df, table_name, mode=mode)
                 load_results[table_name] = records_loaded
                 total_records += records_loaded
                 
@@ -389,7 +417,7 @@ def load_all_to_dw(transformed_data: Dict[str, pd.DataFrame]) -> Dict[str, int]:
         logger.info("=" * 50)
         logger.info(" RESUMEN DE CARGA:")
         for table, count in load_results.items():
-            status = "ok" if count > 0 else "warning"
+            status = "ok" if count > 0 or table in APPEND_ONLY_KEYS else "warning"
             logger.info(f"{status} {table}: {count:,} registros")
         
         logger.info(f" TOTAL REGISTROS CARGADOS: {total_records:,}")
@@ -401,4 +429,39 @@ def load_all_to_dw(transformed_data: Dict[str, pd.DataFrame]) -> Dict[str, int]:
     finally:
         loader.disconnect()
     
-    return load_results
\ No newline at end of file
+    return load_results
+
+def load_batches_to_dw(batches: Iterable[pd.DataFrame], table_name: str, mode: str = 'replace',
+                       adapter=None) -> int:
+    """
+    Cargar una tabla del DW lote a lote con una sola conexión (p. ej. los lotes de
+    hechos_asignaciones de transform_chunks): solo el lote actual está en memoria
+    
+    Args:
+        batches: lotes de la tabla transformada
+        table_name: tabla del DW
+        mode: 'replace' vacía la tabla una vez antes del primer lote
+              'append' inserta/actualiza por PK sin vaciar
+        adapter: destino alternativo (ver load_all_to_dw)
+        
+    Returns:
+        registros cargados
+    """
+    loader = DWLoader(adapter)
+    total_records = 0
+    try:
+        if not loader.connect():
+            raise Exception("No se pudo conectar al Data Warehouse")
+        if mode == 'replace':
+            loader.truncate_table(table_name)
+        for batch in batches:
+            # La tabla ya se vació: cada lote se inserta/actualiza por PK
+            total_records += loader.load_dataframe_to_table(batch, table_name, mode='append')
+        logger.info(f" {table_name}: {total_records:,} registros cargados por lotes")
+    except Exception as e:
+        logger.error(f" Error en carga por lotes de {table_name}: {str(e)}")
+        raise
+    finally:
+        loader.disconnect()
+    
+    return total_records
@@ -2,7 +2,9 @@
 Orquesta el proceso completo de Extract, Transform, Load
 """
 import logging
-from typing import Dict
+import os
+import time
+from typing import Dict, List, Optional
 import pandas as pd
 
 # Configurar logging
@@ -13,58 +15,92 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 # Imports de módulos ETL
-from extract.extract_gestion import extract_all, reset_incremental_control, get_last_extraction_info
+from extract.extract_gestion import SGPExtractor, extract_all, extract_projects, reset_incremental_control, get_last_extraction_info, get_watermarks_info, get_data_watermarks, load_snapshot
+from extract.adapters import SQLiteSourceAdapter, DEFAULT_DW_SCHEMA
+from extract.sample_data import populate_sample_data
+from utils.snapshot_cache import SnapshotCache, ExtractionCheckpoint, DEFAULT_SNAPSHOT_DIR, DEFAULT_CHECKPOINT_DIR
 
-# Imports de transformaciones individuales - Dimensiones
-from transform.transform_dim.dim_clientes import transform as transform_dim_clientes
-from transform.transform_dim.dim_empleados import transform as transform_dim_empleados
-from transform.transform_dim.dim_proyectos import transform as transform_dim_proyectos
-from transform.transform_dim.dim_tiempo import transform as transform_dim_tiempo
-from transform.transform_dim.dim_hitos import transform as transform_dim_hitos
-from transform.transform_dim.dim_tareas import transform as transform_dim_tareas
-from transform.transform_dim.dim_pruebas import transform as transform_dim_pruebas
-from transform.transform_dim.dim_finanzas import transform as transform_dim_finanzas
-from transform.transform_dim.dim_tipo_riesgo import transform as transform_dim_tipo_riesgo
-from transform.transform_dim.dim_severidad import transform as transform_dim_severidad
-from transform.transform_dim.dim_riesgos import transform as transform_dim_riesgos
-
-# Imports de transformaciones - Hechos
-from transform.transform_fact.hechos_asignaciones import transform as transform_hechos_asignaciones
-from transform.transform_fact.hechos_proyectos import transform as transform_hechos_proyectos
+# Registro de transformaciones (dimensiones y hechos)
+from transform.registry import TRANSFORMS, resolve_targets
+from transform.common import copy_on_write
+from transform.scheduler import run_dag, DEFAULT_TRANSFORM_WORKERS
+from transform.hierarchy import HierarchyIndex, HIERARCHY_KEY
+from transform.dirty_set import compute_dirty_projects, PROJECT_FACT
+from transform.project_state import ProjectAggregates, PROJECT_STATE_KEY
+from transform.sharding import PROJECT_SHARDS_KEY
+from transform.transform_fact.hechos_asignaciones import transform_chunks, CHUNKS_KEY as ASSIGNMENT_CHUNKS_KEY, DEFAULT_CHUNK_SIZE as DEFAULT_ASSIGNMENT_CHUNK_SIZE
+from utils.key_registry import get_key_registry, reset_key_registry, DEFAULT_KEYS_DIR
+from utils.pending_projects import PendingProjectsStore, DEFAULT_PENDING_PATH
+from utils.project_state_store import ProjectStateStore, DEFAULT_STATE_DIR as DEFAULT_PROJECT_STATE_DIR
+from utils.calendar_store import CalendarStore, CALENDAR_KEY, DEFAULT_CALENDAR_PATH
+from utils.incremental_control import DEFAULT_CONTROL_PATH
+from utils.scope_keys import DEFAULT_SCOPE_PATH
 
 # Import de carga
-from load.load_to_dw import load_all_to_dw
+from load.load_to_dw import load_all_to_dw, load_batches_to_dw
 
 # from load.load_to_dw import load_all  # Comentado hasta implementar
 
-def run_transformations(raw_data: Dict[str, pd.DataFrame]) -> Dict[str, pd.DataFrame]:
+# Carpeta de estado del ETL: control incremental, alcance, snapshots, claves
+# subrogadas, calendario y estado de proyectos. Cada origen/DW usa la suya
+# (run_local usa la carpeta de sus bases SQLite)
+DEFAULT_ETL_STATE_DIR = "logs"
+
+def state_path(state_dir: str, default_path: str) -> str:
+    """Ruta de un archivo de estado dentro de state_dir (mismo nombre que en logs/)"""
+    return os.path.join(state_dir, os.path.relpath(default_path, DEFAULT_ETL_STATE_DIR))
+
+def run_transformations(raw_data: Dict[str, pd.DataFrame], targets: Optional[List[str]] = None,
+                        workers: int = DEFAULT_TRANSFORM_WORKERS,
+                        skip: Optional[List[str]] = None,
+                        project_state: Optional[ProjectAggregates] = None,
+                        project_shards: int = 1, shard_method: str = 'hash',
+                        assignment_chunk_size: int = DEFAULT_ASSIGNMENT_CHUNK_SIZE,
+                        assignment_workers: int = 1,
+                        state_dir: str = DEFAULT_ETL_STATE_DIR) -> Dict[str, pd.DataFrame]:
+    """
+    Ejecutar las transformaciones del DW
+    
+    Las transformaciones independientes corren en paralelo y cada hecho
+    arranca en cuanto terminan las dimensiones de las que depende
+    (transform/scheduler.py).
+    
+    Args:
+        raw_data: tablas crudas extraídas
+        targets: tablas del DW a construir; se ejecutan también las dimensiones
+                 de las que dependen (None = todas)
+        workers: hilos para las transformaciones (1 = en serie)
+        skip: transformaciones que se calculan aparte (p. ej. hechos_proyectos
+              en modo incremental, ver refresh_project_facts)
+        project_state: estado agregado que hechos_proyectos llena para guardarlo después
+        project_shards: procesos entre los que hechos_proyectos reparte los proyectos
+        shard_method: reparto por 'hash' o por 'range' de ID_Proyecto
+        assignment_chunk_size: filas por lote de hechos_asignaciones
+        assignment_workers: lotes de hechos_asignaciones construidos a la vez
+        state_dir: carpeta de estado del origen (calendario de dim_tiempo)
+    """
     transformed_data = {}
+    transform_names = resolve_targets(targets)[0] if targets else list(TRANSFORMS)
+    transform_names = [name for name in transform_names if name not in (skip or [])]
     
     logger.info("=== INICIANDO TRANSFORMACIONES ===")
-    
-    # Transformar dimensiones
-    logger.info("--- Transformando Dimensiones ---")
+    if targets:
+        logger.info(f"Transformaciones necesarias para {', '.join(targets)}: {', '.join(transform_names)}")
     
     try:
-        # Dimensiones
-        transformed_data['dim_clientes'] = transform_dim_clientes(raw_data)
-        transformed_data['dim_empleados'] = transform_dim_empleados(raw_data)
-        transformed_data['dim_proyectos'] = transform_dim_proyectos(raw_data)
-        transformed_data['dim_tiempo'] = transform_dim_tiempo(raw_data)
-        transformed_data['dim_hitos'] = transform_dim_hitos(raw_data)
-        transformed_data['dim_tareas'] = transform_dim_tareas(raw_data)
-        transformed_data['dim_pruebas'] = transform_dim_pruebas(raw_data)
-        transformed_data['dim_finanzas'] = transform_dim_finanzas(raw_data)
-        transformed_data['dim_tipo_riesgo'] = transform_dim_tipo_riesgo(raw_data)
-        transformed_data['dim_severidad'] = transform_dim_severidad(raw_data)
-        transformed_data['dim_riesgos'] = transform_dim_riesgos(raw_data)
+        # Índice proyecto -> hito -> tarea -> error compartido por las transformaciones
+        # (cada enlace se construye cuando una transformación lo pide)
+        raw_data = {**raw_data, HIERARCHY_KEY: HierarchyIndex(raw_data)}
+        if project_state is not None:
+            raw_data[PROJECT_STATE_KEY] = project_state
+        raw_data[PROJECT_SHARDS_KEY] = (project_shards, shard_method)
+        raw_data[ASSIGNMENT_CHUNKS_KEY] = (assignment_chunk_size, assignment_workers)
+        raw_data[CALENDAR_KEY] = CalendarStore(state_path(state_dir, DEFAULT_CALENDAR_PATH))
+        with copy_on_write():
+            transformed_data = run_dag(raw_data, transform_names, workers=workers)
         
-        # Transformar hechos (necesitan tanto datos crudos como dimensiones)
-        logger.info("--- Transformando Hechos ---")
-        # Combinar datos crudos con dimensiones transformadas para los hechos
-        combined_data = {**raw_data, **transformed_data}
-        transformed_data['hechos_asignaciones'] = transform_hechos_asignaciones(combined_data)
-        transformed_data['hechos_proyectos'] = transform_hechos_proyectos(combined_data)
+        # Persistir las claves subrogadas nuevas antes de cargar
+        get_key_registry().save()
         
         # Resumen de transformación
         logger.info("--- Resumen de Transformaciones ---")
@@ -78,28 +114,184 @@ def run_transformations(raw_data: Dict[str, pd.DataFrame]) -> Dict[str, pd.DataF
     logger.info("=== TRANSFORMACIONES COMPLETADAS ===")
     return transformed_data
 
-def run_etl_complete(incremental: bool = True, include_load: bool = True):
+def refresh_project_facts(raw_data: Dict[str, pd.DataFrame], transformed_data: Dict[str, pd.DataFrame],
+                          parallel: bool = False, workers: int = 4, source_adapter=None,
+                          distinct_employees: str = 'exact', watermarks: Optional[Dict] = None,
+                          base_watermarks: Optional[Dict] = None,
+                          state_dir: str = DEFAULT_ETL_STATE_DIR) -> pd.DataFrame:
+    """
+    Recalcular hechos_proyectos solo para los proyectos afectados por el delta
+    
+    Los proyectos se obtienen de las filas nuevas de cada tabla origen
+    (transform/dirty_set.py), más los que quedaron pendientes de una ejecución
+    anterior. Las filas del delta se suman al estado agregado guardado
+    (transform/project_state.py) y las métricas se derivan de ese estado, sin
+    volver a leer el histórico. Solo los proyectos que todavía no tienen estado
+    se extraen completos. Los hechos se insertan/actualizan por ID_Hecho.
+    
+    El delta solo se suma si el estado guardado parte de base_watermarks; si el
+    estado ya lo incluye (p. ej. al repetir un snapshot) no se vuelve a sumar, y
+    si corresponde a otra extracción los proyectos afectados se extraen completos.
+    
+    Args:
+        raw_data: tablas crudas de la extracción incremental
+        transformed_data: salidas de las demás transformaciones (dim_tiempo, dim_proyectos)
+        distinct_employees: conteo de empleados distintos del estado ('exact' o 'hll')
+        watermarks: marcas de agua después del delta (se guardan con el estado)
+        base_watermarks: marcas de agua desde las que se extrajo el delta (None = no comprobar)
+        state_dir: carpeta de estado del origen (estado agregado y proyectos pendientes)
+    """
+    fact = TRANSFORMS[PROJECT_FACT]
+    proyecto_ids, contrato_ids = compute_dirty_projects(raw_data)
+    pending = PendingProjectsStore(state_path(state_dir, DEFAULT_PENDING_PATH))
+    pending_proyectos, pending_contratos = pending.load()
+    if pending_proyectos or pending_contratos:
+        logger.info(f"Pendientes de una ejecución anterior: {len(pending_proyectos)} proyectos, "
+                    f"{len(pending_contratos)} contratos")
+    proyecto_ids = proyecto_ids.union(pd.Index(pending_proyectos, dtype='int64'))
+    contrato_ids = contrato_ids.union(pd.Index(pending_contratos, dtype='int64'))
+    if proyecto_ids.empty and contrato_ids.empty:
+        logger.info(f"{PROJECT_FACT}: ningún proyecto afectado por el delta")
+        return pd.DataFrame(columns=fact.FACT_COLUMNS)
+    pending.save(proyecto_ids, contrato_ids)
+    
+    store = ProjectStateStore(state_path(state_dir, DEFAULT_PROJECT_STATE_DIR))
+    tables = store.load()
+    estado = ProjectAggregates.from_tables(tables, distinct_employees) if tables else None
+    folded = store.load_watermarks()
+    if estado is None:
+        estado = ProjectAggregates(distinct=distinct_employees)
+        estado.fold({**raw_data, 'dim_proyectos': transformed_data['dim_proyectos']})
+    elif watermarks is not None and folded == watermarks:
+        logger.info(f"{PROJECT_FACT}: el estado ya incluye este delta, no se vuelve a sumar")
+    elif base_watermarks is None or folded == base_watermarks:
+        estado.fold({**raw_data, 'dim_proyectos': transformed_data['dim_proyectos']})
+    else:
+        logger.warning(f"{PROJECT_FACT}: el estado guardado no corresponde a esta extracción "
+                       f"({folded} frente a {base_watermarks}); los proyectos afectados se extraen completos")
+        estado.forget(proyecto_ids, contrato_ids)
+    
+    # Proyectos/contratos sin estado completo (p. ej. primera ejecución con estado): extraerlos completos
+    conocidos = estado.known_projects()
+    contratos = contrato_ids.union(pd.Index(
+        estado.proyectos.loc[proyecto_ids.intersection(conocidos), 'ID_Contrato'].astype('int64')))
+    faltan = proyecto_ids.difference(conocidos)
+    contratos_faltan = contratos.difference(estado.complete_contracts())
+    if len(faltan) or len(contratos_faltan):
+        logger.info(f"{len(faltan)} proyectos y {len(contratos_faltan)} contratos sin estado: extracción completa")
+        project_data = extract_projects(faltan.tolist(), contratos_faltan.tolist(), targets=[PROJECT_FACT],
+                                        parallel=parallel, workers=workers, adapter=source_adapter)
+        if not project_data:
+            raise RuntimeError(f"No se pudieron extraer los proyectos afectados; quedan pendientes en {pending.path}")
+        # Validar contra todos los clientes del alcance (la extracción restringida solo
+        # trae los de los contratos pedidos)
+        dim_proyectos = TRANSFORMS['dim_proyectos'].transform(
+            {**project_data, 'clientes': raw_data.get('clientes', project_data.get('clientes'))})
+        estado.fold({**project_data, 'dim_proyectos': dim_proyectos}, complete=True)
+    
+    ids = proyecto_ids.union(estado.projects_of_contracts(contrato_ids))
+    metrics = fact.metrics_from_state(estado, ids, transformed_data['dim_tiempo'])
+    result = fact.build_facts(metrics)
+    store.save(estado.to_tables(), watermarks=watermarks)
+    get_key_registry().save()
+    logger.info(f"{PROJECT_FACT}: {len(result)} proyectos recalculados desde el estado agregado")
+    return result
+
+def transform_delta(raw_data: Dict[str, pd.DataFrame], targets: Optional[List[str]] = None,
+                    parallel: bool = False, workers: int = 4, source_adapter=None,
+                    distinct_employees: str = 'exact', watermarks: Optional[Dict] = None,
+                    base_watermarks: Optional[Dict] = None,
+                    assignment_chunk_size: int = DEFAULT_ASSIGNMENT_CHUNK_SIZE,
+                    assignment_workers: int = 1,
+                    state_dir: str = DEFAULT_ETL_STATE_DIR) -> Dict[str, pd.DataFrame]:
+    """
+    Transformar un delta que se va a cargar en modo append: hechos_proyectos no se
+    calcula desde las filas del delta sino con refresh_project_facts
+    
+    Lo usan todas las entradas que cargan un delta (run_etl_complete incremental
+    y run_from_snapshot de un snapshot incremental).
+    """
+    transform_names = resolve_targets(targets)[0] if targets else list(TRANSFORMS)
+    transformed_data = run_transformations(raw_data, targets, skip=[PROJECT_FACT],
+                                           assignment_chunk_size=assignment_chunk_size,
+                                           assignment_workers=assignment_workers, state_dir=state_dir)
+    if PROJECT_FACT in transform_names:
+        with copy_on_write():
+            transformed_data[PROJECT_FACT] = refresh_project_facts(raw_data, transformed_data, parallel=parallel,
+                                                                   workers=workers, source_adapter=source_adapter,
+                                                                   distinct_employees=distinct_employees,
+                                                                   watermarks=watermarks,
+                                                                   base_watermarks=base_watermarks,
+                                                                   state_dir=state_dir)
+    return transformed_data
+
+def load_transformed(transformed_data: Dict[str, pd.DataFrame], mode: str, dw_adapter=None,
+                     tables: Optional[List[str]] = None, state_dir: str = DEFAULT_ETL_STATE_DIR) -> Dict[str, int]:
+    """Cargar al DW y, si hechos_proyectos quedó cargado, borrar los proyectos pendientes"""
+    load_results = load_all_to_dw(transformed_data, mode=mode, adapter=dw_adapter, tables=tables)
+    if PROJECT_FACT in transformed_data:
+        # Hechos de los proyectos afectados ya cargados
+        PendingProjectsStore(state_path(state_dir, DEFAULT_PENDING_PATH)).clear()
+    return load_results
+
+def run_etl_complete(incremental: bool = True, include_load: bool = True, parallel: bool = False, workers: int = 4,
+                     source_adapter=None, dw_adapter=None, targets: Optional[List[str]] = None,
+                     distinct_employees: str = 'exact', project_shards: int = 1,
+                     assignment_chunk_size: int = DEFAULT_ASSIGNMENT_CHUNK_SIZE, assignment_workers: int = 1,
+                     state_dir: str = DEFAULT_ETL_STATE_DIR):
     """
     Ejecuta el proceso ETL completo (Extract, Transform, Load)
     
     Args:
         incremental: Si True, ejecuta extracción incremental
         include_load: Si True, incluye la fase de carga al DW
+        parallel: Si True, extrae las tablas en paralelo con snapshot consistente
+        workers: Número de conexiones para la extracción paralela
+        source_adapter: Origen alternativo al MySQL del SGP (ver extract/adapters.py)
+        dw_adapter: Destino alternativo al MySQL del DW
+        targets: Tablas del DW a reconstruir; solo se extraen y transforman sus
+                 entradas y solo se cargan ellas (None = todas)
+        distinct_employees: 'exact' (por defecto) o 'hll' para contar los empleados
+                            distintos por proyecto con un sketch HyperLogLog
+        project_shards: procesos para hechos_proyectos en una extracción completa
+                        (transform/sharding.py; 1 = sin shards). Los procesos importan el
+                        script principal: debe estar protegido con if __name__ == '__main__'
+        assignment_chunk_size: filas por lote de hechos_asignaciones (la memoria de
+                               la transformación depende del lote, no de la tabla)
+        assignment_workers: lotes de hechos_asignaciones construidos a la vez
+        state_dir: carpeta de estado del origen/DW (marcas de agua, claves subrogadas,
+                   calendario, estado de proyectos, snapshots)
     """
     mode_msg = "INCREMENTAL" if incremental else "COMPLETA"
     phases_msg = "ETL COMPLETO" if include_load else "ET (Extract + Transform)"
     
     logger.info(f" INICIANDO {phases_msg} - MODO {mode_msg}")
+    control_path = state_path(state_dir, DEFAULT_CONTROL_PATH)
+    # Claves subrogadas de este origen/DW (no las de una ejecución anterior del proceso)
+    reset_key_registry(state_path(state_dir, DEFAULT_KEYS_DIR))
     
     try:
         # Mostrar info de última extracción
         if incremental:
-            last_date = get_last_extraction_info()
+            last_date = get_last_extraction_info(control_path)
             logger.info(f" Última extracción: {last_date}")
         
+        # Con marcas de agua previas solo llega el delta: hechos_proyectos se
+        # recalcula aparte para los proyectos afectados
+        transform_names = resolve_targets(targets)[0] if targets else list(TRANSFORMS)
+        base_watermarks = get_watermarks_info(control_path) if incremental else {}
+        delta = bool(base_watermarks)
+        
         # 1. EXTRACCIÓN
         logger.info(f" FASE 1: EXTRACCIÓN {mode_msg}")
-        raw_data = extract_all(incremental=incremental)
+        start = time.perf_counter()
+        raw_data = extract_all(incremental=incremental, parallel=parallel, workers=workers,
+                               adapter=source_adapter, targets=targets,
+                               snapshot_dir=state_path(state_dir, DEFAULT_SNAPSHOT_DIR),
+                               checkpoint_dir=state_path(state_dir, DEFAULT_CHECKPOINT_DIR),
+                               control_path=control_path,
+                               scope_path=state_path(state_dir, DEFAULT_SCOPE_PATH))
+        logger.info(f" Extracción: {time.perf_counter() - start:.1f}s")
         
         if not raw_data:
             logger.warning("No se extrajeron datos. Finalizando proceso.")
@@ -107,12 +299,34 @@ def run_etl_complete(incremental: bool = True, include_load: bool = True):
         
         # 2. TRANSFORMACIÓN
         logger.info(" FASE 2: TRANSFORMACIÓN")
-        transformed_data = run_transformations(raw_data)
+        start = time.perf_counter()
+        watermarks = get_data_watermarks(raw_data, base_watermarks)
+        if delta:
+            transformed_data = transform_delta(raw_data, targets, parallel=parallel, workers=workers,
+                                               source_adapter=source_adapter, distinct_employees=distinct_employees,
+                                               watermarks=watermarks, base_watermarks=base_watermarks,
+                                               assignment_chunk_size=assignment_chunk_size,
+                                               assignment_workers=assignment_workers, state_dir=state_dir)
+        else:
+            # Extracción completa: el estado agregado se reconstruye desde cero
+            project_state = ProjectAggregates(distinct=distinct_employees) if PROJECT_FACT in transform_names else None
+            transformed_data = run_transformations(raw_data, targets, project_state=project_state,
+                                                   project_shards=project_shards,
+                                                   assignment_chunk_size=assignment_chunk_size,
+                                                   assignment_workers=assignment_workers, state_dir=state_dir)
+            if project_state is not None:
+                ProjectStateStore(state_path(state_dir, DEFAULT_PROJECT_STATE_DIR)).save(
+                    project_state.to_tables(), watermarks=watermarks)
+        logger.info(f" Transformación: {time.perf_counter() - start:.1f}s")
         
         # 3. CARGA (opcional)
         if include_load:
             logger.info(" FASE 3: CARGA AL DATA WAREHOUSE")
-            load_results = load_all_to_dw(transformed_data)
+            start = time.perf_counter()
+            # Extracción incremental -> solo deltas: insertar/actualizar sin vaciar el DW
+            load_results = load_transformed(transformed_data, mode='append' if incremental else 'replace',
+                                            dw_adapter=dw_adapter, tables=targets, state_dir=state_dir)
+            logger.info(f" Carga: {time.perf_counter() - start:.1f}s")
             logger.info(f" ETL COMPLETO (Extract + Transform + Load) completado exitosamente")
             return transformed_data, load_results
         else:
@@ -123,9 +337,179 @@ def run_etl_complete(incremental: bool = True, include_load: bool = True):
         logger.error(f" Error en {phases_msg} {mode_msg}: {str(e)}")
         raise
 
-def run_extract_transform(incremental: bool = True):
+def run_from_snapshot(run_id: str = None, include_load: bool = False, source_adapter=None,
+                      dw_adapter=None, distinct_employees: str = 'exact',
+                      assignment_chunk_size: int = DEFAULT_ASSIGNMENT_CHUNK_SIZE, assignment_workers: int = 1,
+                      state_dir: str = DEFAULT_ETL_STATE_DIR):
+    """
+    Re-ejecutar Transform (+ Load) desde un snapshot Parquet, sin tocar el OLTP
+    
+    Un snapshot incremental es un delta: hechos_proyectos se recalcula desde el
+    estado agregado para los proyectos afectados, como en run_etl_complete. Solo
+    los proyectos sin estado se leen del SGP (source_adapter).
+    
+    Args:
+        run_id: Snapshot a usar (por defecto el más reciente)
+        include_load: Si True, incluye la fase de carga al DW
+        source_adapter: Origen para extraer completos los proyectos sin estado
+        dw_adapter: Destino alternativo al MySQL del DW
+        distinct_employees: 'exact' o 'hll' (ver run_etl_complete)
+        assignment_chunk_size: filas por lote de hechos_asignaciones (ver run_etl_complete)
+        assignment_workers: lotes de hechos_asignaciones a la vez (ver run_etl_complete)
+        state_dir: carpeta de estado del origen/DW (ver run_etl_complete)
+    """
+    snapshot_dir = state_path(state_dir, DEFAULT_SNAPSHOT_DIR)
+    cache = SnapshotCache(snapshot_dir)
+    manifest = cache.get_manifest(run_id)
+    if not manifest:
+        logger.warning("No hay snapshots disponibles. Ejecute primero una extracción.")
+        return None
+    
+    logger.info(f" FASE 1: EXTRACCIÓN DESDE SNAPSHOT {manifest['run_id']} ({manifest['created_at']})")
+    raw_data = load_snapshot(manifest['run_id'], snapshot_dir=snapshot_dir)
+    reset_key_registry(state_path(state_dir, DEFAULT_KEYS_DIR))
+    
+    logger.info(" FASE 2: TRANSFORMACIÓN")
+    if manifest['incremental']:
+        transformed_data = transform_delta(raw_data, source_adapter=source_adapter,
+                                           distinct_employees=distinct_employees,
+                                           watermarks=manifest['watermarks'],
+                                           base_watermarks=manifest.get('base_watermarks', {}),
+                                           assignment_chunk_size=assignment_chunk_size,
+                                           assignment_workers=assignment_workers, state_dir=state_dir)
+    else:
+        project_state = ProjectAggregates(distinct=distinct_employees)
+        transformed_data = run_transformations(raw_data, project_state=project_state,
+                                               assignment_chunk_size=assignment_chunk_size,
+                                               assignment_workers=assignment_workers, state_dir=state_dir)
+        ProjectStateStore(state_path(state_dir, DEFAULT_PROJECT_STATE_DIR)).save(
+            project_state.to_tables(), watermarks=manifest['watermarks'])
+    
+    if include_load:
+        logger.info(" FASE 3: CARGA AL DATA WAREHOUSE")
+        load_results = load_transformed(transformed_data, mode='append' if manifest['incremental'] else 'replace',
+                                        dw_adapter=dw_adapter, state_dir=state_dir)
+        return transformed_data, load_results
+    return transformed_data
+
+def run_local(n_proyectos: int = 1000, include_load: bool = False, parallel: bool = False,
+              workers: int = 4, data_dir: str = "logs/local", project_shards: int = 1,
+              distinct_employees: str = 'exact', assignment_chunk_size: int = DEFAULT_ASSIGNMENT_CHUNK_SIZE,
+              assignment_workers: int = 1):
+    """
+    Ejecutar el ETL contra bases SQLite locales (sin MySQL), para medir
+    tiempos en un portátil o en CI. El SGP local se llena con datos
+    sintéticos la primera vez; el DW local se crea desde DB/DW_SSD.sql.
+    
+    Args:
+        n_proyectos: Proyectos sintéticos a generar si el SGP local no existe
+        include_load: Si True, incluye la carga al DW local
+        parallel: Si True, extracción paralela
+        workers: Número de conexiones para la extracción paralela
+        data_dir: Carpeta de las bases SQLite locales y de su estado (claves
+                  subrogadas, calendario, estado de proyectos, snapshots)
+        project_shards: procesos para hechos_proyectos (ver run_etl_complete)
+        distinct_employees: 'exact' o 'hll' (ver run_etl_complete)
+        assignment_chunk_size, assignment_workers: lotes de hechos_asignaciones (ver run_etl_complete)
+    """
+    sgp_path = os.path.join(data_dir, f"sgp_{n_proyectos}.sqlite")
+    new_source = not os.path.exists(sgp_path)
+    source = SQLiteSourceAdapter(sgp_path)
+    if new_source:
+        logger.info(f" Generando SGP local con {n_proyectos} proyectos en {sgp_path}")
+        populate_sample_data(source, n_proyectos=n_proyectos)
+    
+    dw = SQLiteSourceAdapter(os.path.join(data_dir, "dw.sqlite"), schema_path=DEFAULT_DW_SCHEMA) if include_load else None
+    return run_etl_complete(incremental=False, include_load=include_load, parallel=parallel, workers=workers,
+                            source_adapter=source, dw_adapter=dw, state_dir=data_dir,
+                            project_shards=project_shards, distinct_employees=distinct_employees,
+                            assignment_chunk_size=assignment_chunk_size, assignment_workers=assignment_workers)
+
+def run_only(targets: List[str], include_load: bool = False, parallel: bool = False, workers: int = 4,
+             project_shards: int = 1, distinct_employees: str = 'exact',
+             assignment_chunk_size: int = DEFAULT_ASSIGNMENT_CHUNK_SIZE, assignment_workers: int = 1):
+    """
+    Reconstruir solo algunas tablas del DW (extracción completa de sus tablas origen)
+    
+    Args:
+        targets: Tablas del DW, p. ej. ['hechos_asignaciones']
+        include_load: Si True, carga (reemplaza) solo esas tablas en el DW
+        project_shards: procesos para hechos_proyectos (ver run_etl_complete)
+        distinct_employees: 'exact' o 'hll' (ver run_etl_complete)
+        assignment_chunk_size, assignment_workers: lotes de hechos_asignaciones (ver run_etl_complete)
+    """
+    transforms, source_tables = resolve_targets(targets)
+    logger.info(f" RECONSTRUYENDO {', '.join(targets)}")
+    logger.info(f" Tablas origen: {', '.join(source_tables)}")
+    logger.info(f" Transformaciones: {', '.join(transforms)}")
+    return run_etl_complete(incremental=False, include_load=include_load, parallel=parallel,
+                            workers=workers, targets=targets, project_shards=project_shards,
+                            distinct_employees=distinct_employees, assignment_chunk_size=assignment_chunk_size,
+                            assignment_workers=assignment_workers)
+
+def run_stream_assignments(include_load: bool = True,
+                           assignment_chunk_size: int = DEFAULT_ASSIGNMENT_CHUNK_SIZE, assignment_workers: int = 1,
+                           source_adapter=None, dw_adapter=None, state_dir: str = DEFAULT_ETL_STATE_DIR) -> int:
+    """
+    Reconstruir hechos_asignaciones en streaming: los lotes de asignaciones del SGP
+    (SGPExtractor.stream_all) se transforman (transform_chunks) y se cargan al DW
+    uno a uno, sin materializar la tabla origen ni la de hechos. La memoria depende
+    del tamaño de lote y no del de la tabla.
+    
+    Antes del primer lote se leen empleados (costo por hora) y el rango de
+    FechaAsignacion, con el que se extiende y carga el calendario de dim_tiempo.
+    Es una reconstrucción completa de la tabla: no lee ni guarda marcas de agua.
+    
+    Args:
+        include_load: Si False, solo se construyen los lotes (sin cargarlos)
+        assignment_chunk_size: filas por lote
+        assignment_workers: lotes construidos a la vez
+        source_adapter: Origen alternativo al MySQL del SGP
+        dw_adapter: Destino alternativo al MySQL del DW
+        state_dir: carpeta de estado del origen/DW (claves subrogadas y calendario)
+    
+    Returns:
+        hechos construidos
+    """
+    logger.info(f" RECONSTRUYENDO hechos_asignaciones EN STREAMING (lotes de {assignment_chunk_size} filas)")
+    reset_key_registry(state_path(state_dir, DEFAULT_KEYS_DIR))
+    extractor = SGPExtractor(incremental=False, chunk_size=assignment_chunk_size, adapter=source_adapter,
+                             targets=['hechos_asignaciones'], snapshot_dir=None, checkpoint_dir=None,
+                             scope_path=None)
+    if not extractor.connect():
+        raise RuntimeError("No se pudo conectar al SGP")
+    try:
+        extractor.setup_scope([extractor.connection])
+        empleados = extractor.fetch_table('empleados')
+        fecha_min, fecha_max = extractor.column_range('asignaciones', 'FechaAsignacion')
+    finally:
+        extractor.disconnect()
+    
+    # Calendario que cubre todas las asignaciones (los IDs de dim_tiempo no cambian al extenderlo)
+    fechas = pd.DataFrame({'FechaAsignacion': pd.to_datetime([fecha_min, fecha_max])})
+    dim_tiempo = TRANSFORMS['dim_tiempo'].transform({
+        CALENDAR_KEY: CalendarStore(state_path(state_dir, DEFAULT_CALENDAR_PATH)),
+        'asignaciones': fechas,
+    })
+    
+    lotes = transform_chunks(extractor.stream_all(tables=['asignaciones']), empleados, dim_tiempo,
+                             workers=assignment_workers)
+    if include_load:
+        load_all_to_dw({'dim_tiempo': dim_tiempo}, mode='append', adapter=dw_adapter, tables=['dim_tiempo'])
+        total = load_batches_to_dw(lotes, 'hechos_asignaciones', mode='replace', adapter=dw_adapter)
+    else:
+        total = sum(len(lote) for lote in lotes)
+    
+    # Claves subrogadas nuevas de los lotes
+    get_key_registry().save()
+    logger.info(f" hechos_asignaciones: {total} hechos en streaming")
+    return total
+
+def run_extract_transform(incremental: bool = True, distinct_employees: str = 'exact',
+                          assignment_chunk_size: int = DEFAULT_ASSIGNMENT_CHUNK_SIZE, assignment_workers: int = 1):
     """Solo ejecuta Extract + Transform (sin Load)"""
-    return run_etl_complete(incremental=incremental, include_load=False)
+    return run_etl_complete(incremental=incremental, include_load=False, distinct_employees=distinct_employees,
+                            assignment_chunk_size=assignment_chunk_size, assignment_workers=assignment_workers)
 
 def run_etl():
     """
@@ -151,22 +535,26 @@ def run_etl():
         logger.error(f" Error en ETL completo: {str(e)}")
         raise
 
-def test_etl(include_load: bool = False):
+def test_etl(include_load: bool = False, distinct_employees: str = 'exact',
+             assignment_chunk_size: int = DEFAULT_ASSIGNMENT_CHUNK_SIZE, assignment_workers: int = 1):
     """
     Función de prueba del ETL
     
     Args:
         include_load: Si True, ejecuta ETL completo con carga al DW
+        distinct_employees: 'exact' o 'hll' (ver run_etl_complete)
+        assignment_chunk_size, assignment_workers: lotes de hechos_asignaciones (ver run_etl_complete)
     """
+    chunks = dict(assignment_chunk_size=assignment_chunk_size, assignment_workers=assignment_workers)
     test_type = "ETL COMPLETO (con carga)" if include_load else "ETL (solo Extract + Transform)"
     print(f" EJECUTANDO PRUEBA DE {test_type}")
     
     try:
         if include_load:
-            result = run_etl_complete(include_load=True)
+            result = run_etl_complete(include_load=True, distinct_employees=distinct_employees, **chunks)
             transformed_data, load_results = result if result else (None, None)
         else:
-            transformed_data = run_extract_transform()
+            transformed_data = run_extract_transform(distinct_employees=distinct_employees, **chunks)
             load_results = None
         
         if transformed_data:
@@ -193,26 +581,41 @@ def test_etl(include_load: bool = False):
         print(f"\n❌ Error en prueba: {str(e)}")
         return None
 
-def run_full_load(include_load: bool = False):
+def run_full_load(include_load: bool = False, parallel: bool = False, workers: int = 4,
+                  project_shards: int = 1, distinct_employees: str = 'exact',
+                  assignment_chunk_size: int = DEFAULT_ASSIGNMENT_CHUNK_SIZE, assignment_workers: int = 1):
     """
     Ejecutar carga completa (no incremental)
     
     Args:
         include_load: Si True, incluye carga al DW
+        parallel: Si True, extracción paralela con snapshot consistente
+        workers: Número de conexiones para la extracción paralela
+        project_shards: procesos para hechos_proyectos (ver run_etl_complete)
+        distinct_employees: 'exact' o 'hll' (ver run_etl_complete)
+        assignment_chunk_size, assignment_workers: lotes de hechos_asignaciones (ver run_etl_complete)
     """
     logger.info("FORZANDO CARGA COMPLETA")
-    return run_etl_complete(incremental=False, include_load=include_load)
+    return run_etl_complete(incremental=False, include_load=include_load, parallel=parallel, workers=workers,
+                            project_shards=project_shards, distinct_employees=distinct_employees,
+                            assignment_chunk_size=assignment_chunk_size, assignment_workers=assignment_workers)
 
-def reset_and_run(include_load: bool = False):
+def reset_and_run(include_load: bool = False, project_shards: int = 1, distinct_employees: str = 'exact',
+                  assignment_chunk_size: int = DEFAULT_ASSIGNMENT_CHUNK_SIZE, assignment_workers: int = 1):
     """
     Resetear control incremental y ejecutar carga completa
     
     Args:
         include_load: Si True, incluye carga al DW
+        project_shards: procesos para hechos_proyectos (ver run_etl_complete)
+        distinct_employees: 'exact' o 'hll' (ver run_etl_complete)
+        assignment_chunk_size, assignment_workers: lotes de hechos_asignaciones (ver run_etl_complete)
     """
     logger.info(" RESETEANDO CONTROL INCREMENTAL")
     reset_incremental_control()
-    return run_full_load(include_load=include_load)
+    return run_full_load(include_load=include_load, project_shards=project_shards,
+                         distinct_employees=distinct_employees, assignment_chunk_size=assignment_chunk_size,
+                         assignment_workers=assignment_workers)
 
 def show_incremental_status():
     """
@@ -220,29 +623,83 @@ def show_incremental_status():
     """
     last_date = get_last_extraction_info()
     print(f" Última extracción: {last_date}")
+    watermarks = get_watermarks_info()
+    if watermarks:
+        print(" Marcas de agua por tabla:")
+        for table_name, value in watermarks.items():
+            print(f"   - {table_name}: {value}")
     print(f" Próxima extracción será: INCREMENTAL (solo cambios desde {last_date})")
     print(" Para carga completa usar: reset_and_run() o run_full_load()")
+    snapshots = SnapshotCache().list_snapshots()
+    if snapshots:
+        print(f" Snapshots disponibles: {', '.join(snapshots)}")
+    checkpoint_state = ExtractionCheckpoint().read()
+    if checkpoint_state:
+        units = checkpoint_state.get("units", {})
+        print(f" Extracción interrumpida ({checkpoint_state['created_at']}): {len(units)} unidades en checkpoint, "
+              "la próxima ejecución la reanudará")
 
 if __name__ == "__main__":
     import sys
     
-    if len(sys.argv) > 1:
-        if sys.argv[1] == "--full":
+    # Opciones que se pueden añadir a los comandos de carga
+    args = sys.argv[1:]
+    options = {}
+    if "--shards" in args:
+        position = args.index("--shards")
+        options["project_shards"] = int(args[position + 1])
+        del args[position:position + 2]
+    # --hll, --chunk-size y --chunk-workers valen también para la ejecución
+    # incremental y --from-snapshot
+    common = {}
+    if "--hll" in args:
+        args.remove("--hll")
+        common["distinct_employees"] = "hll"
+    for flag, option in (("--chunk-size", "assignment_chunk_size"), ("--chunk-workers", "assignment_workers")):
+        if flag in args:
+            position = args.index(flag)
+            common[option] = int(args[position + 1])
+            del args[position:position + 2]
+    options.update(common)
+    
+    if args:
+        if args[0] == "--full":
             print("Ejecutando carga completa (Extract + Transform)...")
-            run_full_load(include_load=False)
-        elif sys.argv[1] == "--full-load":
+            run_full_load(include_load=False, **options)
+        elif args[0] == "--full-load":
             print("Ejecutando ETL COMPLETO con carga al DW...")
-            run_full_load(include_load=True)
-        elif sys.argv[1] == "--reset":
+            run_full_load(include_load=True, **options)
+        elif args[0] == "--reset":
             print("Reseteando control y ejecutando carga completa...")
-            reset_and_run(include_load=False)
-        elif sys.argv[1] == "--reset-load":
+            reset_and_run(include_load=False, **options)
+        elif args[0] == "--reset-load":
             print("Reseteando control y ejecutando ETL COMPLETO con carga al DW...")
-            reset_and_run(include_load=True)
-        elif sys.argv[1] == "--test-load":
+            reset_and_run(include_load=True, **options)
+        elif args[0] == "--test-load":
             print("Ejecutando prueba ETL COMPLETO con carga al DW...")
-            test_etl(include_load=True)
-        elif sys.argv[1] == "--status":
+            test_etl(include_load=True, **common)
+        elif args[0] in ("--parallel", "--parallel-load"):
+            workers = int(args[1]) if len(args) > 1 else 4
+            include_load = args[0] == "--parallel-load"
+            print(f"Ejecutando carga completa con extracción paralela ({workers} conexiones)...")
+            run_full_load(include_load=include_load, parallel=True, workers=workers, **options)
+        elif args[0] in ("--from-snapshot", "--from-snapshot-load"):
+            run_id = args[1] if len(args) > 1 else None
+            print(f"Re-ejecutando desde snapshot {run_id or '(más reciente)'}...")
+            run_from_snapshot(run_id, include_load=args[0] == "--from-snapshot-load", **common)
+        elif args[0] in ("--local", "--local-load"):
+            n_proyectos = int(args[1]) if len(args) > 1 else 1000
+            print(f"Ejecutando ETL contra SQLite local ({n_proyectos} proyectos sintéticos)...")
+            run_local(n_proyectos, include_load=args[0] == "--local-load", **options)
+        elif args[0] in ("--only", "--only-load") and len(args) > 1:
+            targets = [t.strip() for t in args[1].split(',') if t.strip()]
+            print(f"Reconstruyendo solo {', '.join(targets)}...")
+            run_only(targets, include_load=args[0] == "--only-load", **options)
+        elif args[0] == "--stream-asignaciones":
+            print("Reconstruyendo hechos_asignaciones en streaming con carga al DW...")
+            chunks = {k: v for k, v in common.items() if k.startswith("assignment_")}
+            run_stream_assignments(include_load=True, **chunks)
+        elif args[0] == "--status":
             show_incremental_status()
         else:
             print("Opciones disponibles:")
@@ -251,7 +708,26 @@ if __name__ == "__main__":
             print("  --reset       : Reset + carga completa")
             print("  --reset-load  : Reset + ETL completo con carga al DW")
             print("  --test-load   : Prueba ETL completo con carga")
+            print("  --parallel [N]: Carga completa con extracción paralela en N conexiones")
+            print("  --parallel-load [N]: Igual que --parallel, con carga al DW")
+            print("  --from-snapshot [ID]     : Transform desde snapshot Parquet (sin OLTP)")
+            print("  --from-snapshot-load [ID]: Transform + carga al DW desde snapshot")
+            print("  --local [N]   : Carga completa desde un SGP SQLite local con N proyectos sintéticos")
+            print("  --local-load [N]: Igual que --local, con carga a un DW SQLite local")
+            print("  --only T1[,T2]     : Extract + Transform solo de esas tablas del DW y sus entradas")
+            print("  --only-load T1[,T2]: Igual que --only, cargando solo esas tablas al DW")
+            print("  --stream-asignaciones: Carga hechos_asignaciones lote a lote desde el SGP")
+            print("                  (extracción, transformación y carga en streaming)")
             print("  --status      : Mostrar estado incremental")
+            print("Opciones para --full, --reset, --parallel, --local y --only:")
+            print("  --shards N    : Reparte hechos_proyectos en N procesos (transform/sharding.py).")
+            print("                  Un script propio que llame al ETL con shards debe proteger su")
+            print("                  código con if __name__ == '__main__' (los procesos lo importan)")
+            print("Opciones para cualquier comando:")
+            print("  --hll         : Cuenta los empleados distintos por proyecto con HyperLogLog")
+            print("                  (error ~6.5%, tamaño fijo por proyecto) en lugar de pares exactos")
+            print(f"  --chunk-size N: Filas por lote de hechos_asignaciones (por defecto {DEFAULT_ASSIGNMENT_CHUNK_SIZE})")
+            print("  --chunk-workers W: Lotes de hechos_asignaciones construidos a la vez (por defecto 1)")
     else:
         # Ejecución normal (incremental, solo Extract + Transform)
-        test_etl(include_load=False)
+        test_etl(include_load=False, **common)
@@ -0,0 +1,57 @@
+"""
+Adaptador SQLite: las construcciones MySQL que usa el ETL deben traducirse
+y ejecutarse sobre el esquema del SGP y del DW creados desde los DDL de MySQL
+"""
+
+import sys
+import os
+
+import pytest
+
+# Agregar el directorio padre al path para importar módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from extract.adapters import SQLiteSourceAdapter, SGP_TABLES, DEFAULT_DW_SCHEMA, translate_mysql_to_sqlite
+
+@pytest.mark.parametrize("mysql, sqlite", [
+    ("SELECT IFNULL(a, 0) FROM t WHERE b > %s", "SELECT COALESCE(a, 0) FROM t WHERE b > ?"),
+    ("SELECT DATEDIFF(IFNULL(f, CURDATE()), g) FROM t",
+     "SELECT CAST(julianday(COALESCE(f, DATE('now'))) - julianday(g) AS INTEGER) FROM t"),
+    ("TRUNCATE TABLE hechos", "DELETE FROM hechos"),
+    ("INSERT INTO t (a, b) VALUES (%s, %s) ON DUPLICATE KEY UPDATE a = VALUES(a), b = VALUES(b)",
+     "INSERT OR REPLACE INTO t (a, b) VALUES (?, ?)"),
+    ("DROP TEMPORARY TABLE IF EXISTS scope_proyectos", "DROP TABLE IF EXISTS temp.scope_proyectos"),
+    ("SET FOREIGN_KEY_CHECKS = 0", "PRAGMA foreign_keys = OFF"),
+    ("FLUSH TABLES WITH READ LOCK", "SELECT 1"),
+])
+def test_translate_mysql_to_sqlite(mysql, sqlite):
+    assert translate_mysql_to_sqlite(mysql) == sqlite
+
+def test_sgp_schema_and_parameters(tmp_path):
+    adapter = SQLiteSourceAdapter(str(tmp_path / "sgp.sqlite"))
+    connection = adapter.connect()
+    try:
+        assert set(adapter.get_table_sizes(connection)) == set(SGP_TABLES)
+        cursor = connection.cursor()
+        cursor.execute("SELECT DATEDIFF(%s, %s)", ('2024-03-01', '2024-02-01'))
+        assert cursor.fetchone() == (29,)
+        cursor.close()
+    finally:
+        connection.close()
+
+def test_dw_upsert_by_primary_key(tmp_path):
+    adapter = SQLiteSourceAdapter(str(tmp_path / "dw.sqlite"), schema_path=DEFAULT_DW_SCHEMA)
+    connection = adapter.connect()
+    try:
+        cursor = connection.cursor()
+        upsert = ("INSERT INTO dim_severidad (ID_Severidad, Nivel) VALUES (%s, %s) "
+                  "ON DUPLICATE KEY UPDATE Nivel = VALUES(Nivel)")
+        cursor.executemany(upsert, [(1, 'Baja'), (2, 'Alta')])
+        cursor.execute(upsert, (2, 'Media'))
+        cursor.execute("SELECT ID_Severidad, Nivel FROM dim_severidad ORDER BY ID_Severidad")
+        assert cursor.fetchall() == [(1, 'Baja'), (2, 'Media')]
+        cursor.execute("TRUNCATE TABLE dim_severidad")
+        cursor.execute("SELECT COUNT(*) FROM dim_severidad")
+        assert cursor.fetchone() == (0,)
+    finally:
+        connection.close()
@@ -0,0 +1,59 @@
+"""
+Resolución fecha -> ID_Tiempo: el desplazamiento aritmético (calendario
+continuo) y la búsqueda binaria deben dar las mismas claves que un mapeo
+directo sobre dim_tiempo
+"""
+
+import sys
+import os
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+# Agregar el directorio padre al path para importar módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from transform.date_keys import DateKeyResolver
+
+def calendar(start='2023-01-01', end='2023-12-31', first_id=1) -> pd.DataFrame:
+    fechas = pd.date_range(start, end, freq='D')
+    return pd.DataFrame({'ID_Tiempo': range(first_id, first_id + len(fechas)), 'Fecha': fechas})
+
+FECHAS = pd.Series(['2023-01-01', '2023-03-15 17:45', '2023-12-31', '2022-12-31', '2024-01-01', None, 'no-es-fecha'])
+
+def expected(dim_tiempo: pd.DataFrame, missing=0) -> np.ndarray:
+    mapping = dict(zip(dim_tiempo['Fecha'], dim_tiempo['ID_Tiempo']))
+    dias = pd.to_datetime(FECHAS, errors='coerce').dt.normalize()
+    return np.array([mapping.get(d, missing) for d in dias])
+
+def test_contiguous_offset_matches_searchsorted():
+    dim_tiempo = calendar(first_id=100)
+    offset = DateKeyResolver(dim_tiempo)
+    assert offset.contiguous
+
+    search = DateKeyResolver(dim_tiempo)
+    search.contiguous = False
+    np.testing.assert_array_equal(offset.resolve(FECHAS), expected(dim_tiempo))
+    np.testing.assert_array_equal(search.resolve(FECHAS), expected(dim_tiempo))
+    np.testing.assert_array_equal(offset.resolve(FECHAS, missing=-1), search.resolve(FECHAS, missing=-1))
+
+def test_calendar_with_gaps_uses_searchsorted():
+    # Sin marzo y desordenado: IDs no consecutivos por fecha
+    dim_tiempo = calendar()
+    dim_tiempo = dim_tiempo[dim_tiempo['Fecha'].dt.month != 3].sample(frac=1, random_state=0)
+    resolver = DateKeyResolver(dim_tiempo)
+    assert not resolver.contiguous
+    np.testing.assert_array_equal(resolver.resolve(FECHAS), expected(dim_tiempo))
+
+def test_missing_as_nan_and_date_objects():
+    resolver = DateKeyResolver(calendar())
+    keys = resolver.resolve([date(2023, 1, 2), None], missing=None)
+    assert keys[0] == 2 and np.isnan(keys[1])
+    # Sin fechas faltantes el resultado sigue siendo entero
+    assert resolver.resolve(pd.Series(pd.to_datetime(['2023-01-05']))).dtype == np.int64
+
+def test_empty_calendar():
+    resolver = DateKeyResolver(pd.DataFrame(columns=['ID_Tiempo', 'Fecha']))
+    assert len(resolver) == 0 and not resolver.contiguous
+    np.testing.assert_array_equal(resolver.resolve(FECHAS), np.zeros(len(FECHAS)))
@@ -0,0 +1,72 @@
+"""
+Conteo de empleados distintos: el sketch HyperLogLog debe quedar dentro de
+su error esperado respecto al conteo exacto
+"""
+
+import sys
+import os
+
+import numpy as np
+import pytest
+
+# Agregar el directorio padre al path para importar módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from transform.distinct_counter import DEFAULT_PRECISION, ExactDistinctCounter, HyperLogLogCounter
+
+# Error estándar de HyperLogLog: 1.04 / sqrt(m)
+STANDARD_ERROR = 1.04 / np.sqrt(1 << DEFAULT_PRECISION)
+
+def assignments(cardinalities, seed=7):
+    """Pares (ID_Proyecto, ID_Empleado) con repetidos: proyecto i tiene cardinalities[i] empleados"""
+    rng = np.random.default_rng(seed)
+    proyectos, empleados = [], []
+    for proyecto, n in enumerate(cardinalities, start=1):
+        ids = rng.choice(10_000_000, size=n, replace=False)
+        ids = np.concatenate([ids, rng.choice(ids, size=n // 2 + 1)])
+        proyectos.append(np.full(len(ids), proyecto))
+        empleados.append(ids)
+    return np.concatenate(proyectos), np.concatenate(empleados)
+
+def counters(proyectos, empleados):
+    exact, hll = ExactDistinctCounter(), HyperLogLogCounter()
+    exact.add(proyectos, empleados)
+    hll.add(proyectos, empleados)
+    return exact, hll
+
+@pytest.mark.parametrize('cardinality', [5, 50, 500, 5_000, 50_000])
+def test_hll_within_error_bound(cardinality):
+    # 20 proyectos con la misma cardinalidad y empleados distintos
+    proyectos, empleados = assignments([cardinality] * 20)
+    exact, hll = counters(proyectos, empleados)
+    ids = list(range(1, 21))
+
+    expected = exact.count(ids)
+    error = np.abs(hll.count(ids) - expected) / expected
+
+    assert list(expected) == [cardinality] * 20
+    # Ningún proyecto fuera de 4 errores estándar y el error medio cerca del teórico
+    assert error.max() <= 4 * STANDARD_ERROR
+    assert error.mean() <= 1.5 * STANDARD_ERROR
+
+def test_hll_small_counts_are_exact():
+    proyectos, empleados = assignments([1, 2, 3, 8, 15])
+    exact, hll = counters(proyectos, empleados)
+    ids = [1, 2, 3, 4, 5, 99]
+
+    assert list(hll.count(ids)) == list(exact.count(ids)) == [1, 2, 3, 8, 15, 0]
+
+def test_hll_merge_and_round_trip_match_single_pass():
+    proyectos, empleados = assignments([300, 3_000])
+    _, single = counters(proyectos, empleados)
+
+    # Dos mitades de la misma extracción combinadas por max de registros
+    half = len(proyectos) // 2
+    hll = HyperLogLogCounter()
+    hll.add(proyectos[:half], empleados[:half])
+    hll.add(proyectos[half:], empleados[half:])
+    restored = HyperLogLogCounter.from_frame(hll.to_frame())
+
+    np.testing.assert_array_equal(restored.registers[restored.index.get_indexer([1, 2])],
+                                  single.registers[single.index.get_indexer([1, 2])])
+    assert list(restored.count([1, 2])) == list(single.count([1, 2]))
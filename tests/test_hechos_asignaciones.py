@@ -0,0 +1,82 @@
+"""
+hechos_asignaciones por lotes: el resultado no depende del tamaño de lote ni
+de cuántos lotes se construyen a la vez, y cada lote reserva en orden el
+bloque de ID_HechoAsignacion de sus asignaciones nuevas
+"""
+
+import sys
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# Agregar el directorio padre al path para importar módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.key_registry import get_key_registry, reset_key_registry
+from transform.transform_fact.hechos_asignaciones import CHUNKS_KEY, FACT_COLUMNS, iter_chunks, transform, transform_chunks
+
+def inputs(n: int = 23) -> dict:
+    rng = np.random.default_rng(7)
+    fechas = pd.date_range('2023-01-01', '2023-03-31', freq='D')
+    return {
+        'asignaciones': pd.DataFrame({
+            'ID_Asignacion': rng.permutation(np.arange(100, 100 + n)),
+            'ID_Empleado': rng.integers(1, 5, n),
+            'ID_Proyecto': rng.integers(1, 4, n),
+            # Una fecha fuera de dim_tiempo y una nula
+            'FechaAsignacion': [*rng.choice(fechas, n - 2), pd.Timestamp('2030-01-01'), pd.NaT],
+            'HorasPlanificadas': rng.integers(1, 40, n).astype(float),
+            'HorasReales': [*rng.integers(1, 40, n - 1).astype(float), np.nan],
+        }),
+        'empleados': pd.DataFrame({'ID_Empleado': [1, 2, 3], 'CostoPorHora': [10.0, 20.0, None]}),
+        'dim_tiempo': pd.DataFrame({'ID_Tiempo': range(1, len(fechas) + 1), 'Fecha': fechas}),
+    }
+
+@pytest.fixture
+def registry(tmp_path):
+    """Registro de claves vacío por prueba (no usa logs/)"""
+    yield reset_key_registry(str(tmp_path))
+    reset_key_registry()
+
+def run(df_dict, tmp_path, name, **kwargs) -> pd.DataFrame:
+    """Ejecución con un registro de claves nuevo"""
+    reset_key_registry(str(tmp_path / name))
+    return transform(df_dict, **kwargs)
+
+def test_chunked_matches_unchunked(registry, tmp_path):
+    df_dict = inputs()
+    whole = run(df_dict, tmp_path, 'entera', chunk_size=len(df_dict['asignaciones']))
+    assert list(whole.columns) == FACT_COLUMNS and len(whole) == len(df_dict['asignaciones'])
+
+    for chunk_size, workers in [(1, 1), (4, 1), (5, 3), (100, 2)]:
+        chunked = run(df_dict, tmp_path, f'lotes_{chunk_size}_{workers}', chunk_size=chunk_size, workers=workers)
+        pd.testing.assert_frame_equal(chunked, whole)
+
+    # Tamaño de lote publicado por run_transformations
+    published = run({**df_dict, CHUNKS_KEY: (6, 2)}, tmp_path, 'publicado')
+    pd.testing.assert_frame_equal(published, whole)
+
+def test_new_ids_are_reserved_per_chunk_in_order(registry):
+    df_dict = inputs()
+    asignaciones = df_dict['asignaciones']
+    # Asignaciones ya registradas en una ejecución anterior
+    conocidas = asignaciones['ID_Asignacion'].iloc[[3, 10]]
+    registry.assign('hechos_asignaciones', conocidas)
+
+    lotes = (('asignaciones', lote) for lote in iter_chunks(asignaciones, 4))
+    partes = list(transform_chunks(lotes, df_dict['empleados'], df_dict['dim_tiempo'], workers=3))
+    ids = pd.concat(partes, ignore_index=True)['ID_HechoAsignacion']
+
+    nuevas = ~asignaciones['ID_Asignacion'].isin(conocidas).to_numpy()
+    np.testing.assert_array_equal(ids[~nuevas], [1, 2])
+    np.testing.assert_array_equal(ids[nuevas], np.arange(3, 3 + nuevas.sum()))
+
+def test_other_tables_and_empty_chunks_are_skipped(registry):
+    df_dict = inputs(5)
+    lotes = [('empleados', df_dict['empleados']), ('asignaciones', df_dict['asignaciones'].iloc[:0]),
+             ('asignaciones', df_dict['asignaciones'])]
+    partes = list(transform_chunks(lotes, df_dict['empleados'], df_dict['dim_tiempo']))
+    assert len(partes) == 1 and len(partes[0]) == 5
+    assert get_key_registry() is registry
@@ -0,0 +1,54 @@
+"""
+Índice jerárquico: los conteos y sumas por proyecto deben coincidir con un
+groupby sobre las tablas, y crear el índice no debe construir ningún enlace
+"""
+
+import sys
+import os
+
+import numpy as np
+import pandas as pd
+
+# Agregar el directorio padre al path para importar módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from transform.hierarchy import HierarchyIndex
+
+def tables() -> dict:
+    return {
+        'proyectos': pd.DataFrame({'ID_Proyecto': [1, 2, 3, 4]}),
+        'hitos': pd.DataFrame({'ID_Hito': [10, 11, 12, 13], 'ID_Proyecto': [1, 1, 3, 5]}),
+        'tareas': pd.DataFrame({
+            'ID_Tarea': [100, 101, 102, 103, 104],
+            'ID_Hito': [10, 10, 11, 12, 13],
+            'ID_Proyecto': [1, 1, 1, 3, None],
+            'DuracionReal': [3.0, None, 7.0, 2.0, 4.0],
+        }),
+    }
+
+def test_index_is_built_on_first_use():
+    index = HierarchyIndex(tables())
+    assert not index._keys and not index._links
+    index.count_by('hitos', 'ID_Proyecto', [1])
+    assert set(index._links) == {('hitos', 'ID_Proyecto')}
+
+def test_count_and_sum_match_groupby():
+    df_dict = tables()
+    index = HierarchyIndex(df_dict)
+    ids = [1, 2, 3, 4, 5, 99]
+    tareas = df_dict['tareas']
+
+    expected = df_dict['hitos'].groupby('ID_Proyecto').size().reindex(ids, fill_value=0)
+    np.testing.assert_array_equal(index.count_by('hitos', 'ID_Proyecto', ids), expected.to_numpy())
+
+    expected = tareas.groupby('ID_Proyecto')['DuracionReal'].sum().reindex(ids, fill_value=0.0)
+    np.testing.assert_allclose(index.sum_by('tareas', 'ID_Proyecto', tareas['DuracionReal'], ids),
+                               expected.to_numpy())
+
+    expected = tareas.groupby('ID_Hito').size().reindex([10, 11, 14], fill_value=0)
+    np.testing.assert_array_equal(index.count_by('tareas', 'ID_Hito', [10, 11, 14]), expected.to_numpy())
+
+def test_missing_table_counts_zero():
+    index = HierarchyIndex(tables())
+    np.testing.assert_array_equal(index.count_by('errores', 'ID_Proyecto', [1, 2]), [0, 0])
+    np.testing.assert_array_equal(index.sum_by('errores', 'ID_Proyecto', [], [1, 2]), [0.0, 0.0])
@@ -0,0 +1,54 @@
+"""
+Registro de claves subrogadas: una entidad conserva su ID entre ejecuciones
+aunque cambie el orden de los datos, y las nuevas reciben el siguiente
+"""
+
+import sys
+import os
+
+import numpy as np
+import pandas as pd
+
+# Agregar el directorio padre al path para importar módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.key_registry import SurrogateKeyRegistry, get_key_registry, reset_key_registry
+from transform.registry import TRANSFORMS
+
+def test_first_run_numbers_in_order_of_appearance(tmp_path):
+    registry = SurrogateKeyRegistry(str(tmp_path))
+    ids = registry.assign('dim_x', pd.Series(['b', 'a', None, 'b', 'c']))
+    np.testing.assert_array_equal(ids, [1, 2, 0, 1, 3])
+    # 5 y 5.0 (p. ej. una columna de IDs con nulos) son la misma clave natural
+    np.testing.assert_array_equal(registry.assign('dim_y', [5, 7]), registry.assign('dim_y', pd.Series([5.0, 7.0])))
+
+def test_ids_are_stable_across_runs(tmp_path):
+    first = SurrogateKeyRegistry(str(tmp_path))
+    first.assign('hechos_x', pd.Series([10, 20, 30]))
+    first.save()
+
+    # Siguiente ejecución: otro orden, una clave nueva y sin una de las anteriores
+    second = SurrogateKeyRegistry(str(tmp_path))
+    np.testing.assert_array_equal(second.assign('hechos_x', pd.Series([40, 30, 10])), [4, 3, 1])
+    second.save()
+    third = SurrogateKeyRegistry(str(tmp_path))
+    np.testing.assert_array_equal(third.assign('hechos_x', pd.Series([20, 40])), [2, 4])
+
+def test_unsaved_keys_are_not_persisted(tmp_path):
+    SurrogateKeyRegistry(str(tmp_path)).assign('dim_x', ['a'])
+    assert SurrogateKeyRegistry(str(tmp_path)).assign('dim_x', ['z']).tolist() == [1]
+
+def test_dimension_ids_survive_reordered_extraction(tmp_path):
+    riesgos = pd.DataFrame({'TipoRiesgo': ['Técnico', 'Legal', 'Financiero', 'Legal']})
+    # Cada ejecución empieza con el registro guardado por la anterior
+    reset_key_registry(str(tmp_path))
+    first = TRANSFORMS['dim_tipo_riesgo'].transform({'riesgos': riesgos})
+    get_key_registry().save()
+
+    reset_key_registry(str(tmp_path))
+    reordered = pd.DataFrame({'TipoRiesgo': ['Operativo', 'Financiero', 'Técnico']})
+    second = TRANSFORMS['dim_tipo_riesgo'].transform({'riesgos': reordered})
+    ids = dict(zip(first['NombreTipo'], first['ID_TipoRiesgo']))
+    for nombre, id_tipo in zip(second['NombreTipo'], second['ID_TipoRiesgo']):
+        assert id_tipo == ids.get(nombre, 4)
+    reset_key_registry()
@@ -0,0 +1,126 @@
+"""
+Estado agregado de hechos_proyectos: sumar un delta al estado guardado debe
+dar los mismos hechos que recalcular todo desde la extracción completa
+"""
+
+import sys
+import os
+
+import pandas as pd
+import pytest
+
+# Agregar el directorio padre al path para importar módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from transform.project_state import ProjectAggregates
+from transform.transform_fact.hechos_proyectos import calculate_projects_metrics, metrics_from_state
+
+def dim_tiempo() -> pd.DataFrame:
+    fechas = pd.date_range('2023-01-01', '2024-12-31', freq='D')
+    return pd.DataFrame({'ID_Tiempo': range(1, len(fechas) + 1), 'Fecha': fechas})
+
+def frame(columns, rows) -> pd.DataFrame:
+    return pd.DataFrame(rows, columns=columns)
+
+def first_extraction() -> dict:
+    """Proyectos 1 y 2 (contrato 10) y 3 (contrato 20)"""
+    return {
+        'proyectos': frame(['ID_Proyecto', 'ID_Contrato', 'FechaInicio', 'FechaFin', 'ValorTotalContrato'], [
+            (1, 10, '2023-01-10', '2023-06-30', 50000.0),
+            (2, 10, '2023-02-01', '2023-09-15', 50000.0),
+            (3, 20, '2023-03-01', '2023-12-01', 80000.0),
+        ]),
+        'contratos': frame(['ID_Contrato'], [(10,), (20,)]),
+        'hitos': frame(['ID_Hito', 'ID_Proyecto', 'FechaFinPlanificada', 'FechaFinReal'], [
+            (100, 1, '2023-03-01', '2023-03-05'),
+            (101, 1, '2023-06-01', '2023-05-30'),
+            (102, 2, '2023-08-01', None),
+            (103, 3, '2023-11-01', '2023-11-20'),
+        ]),
+        'tareas': frame(['ID_Tarea', 'ID_Hito', 'ID_Proyecto', 'DuracionPlanificada', 'DuracionReal'], [
+            (1000, 100, 1, 5, 7),
+            (1001, 101, 1, 3, 2),
+            (1002, 102, 2, 4, None),
+            (1003, 103, 3, 6, 9),
+        ]),
+        'errores': frame(['ID_Error', 'ID_Tarea', 'ID_Proyecto'], [(1, 1000, 1), (2, 1003, 3)]),
+        'asignaciones': frame(['ID_Asignacion', 'ID_Proyecto', 'ID_Empleado'], [
+            (1, 1, 501), (2, 1, 502), (3, 2, 501), (4, 3, 503),
+        ]),
+        'gastos': frame(['ID_Gasto', 'ID_Proyecto', 'TipoGasto', 'Categoria', 'Monto'], [
+            (1, 1, 'Materiales', 'CAPEX', 1000.0),
+            (2, 1, 'Salarios', 'OPEX', 400.0),
+            (3, 3, 'Penalizacion', 'OPEX', 250.0),
+        ]),
+        'riesgos': frame(['ID_Riesgo', 'ID_Proyecto'], [(1, 2)]),
+        'penalizaciones': frame(['ID_Penalizacion', 'ID_Contrato', 'Monto'], [(1, 10, 300.0)]),
+    }
+
+def delta_extraction() -> dict:
+    """Filas nuevas de proyectos ya cargados y el proyecto 4 completo (contrato 20)"""
+    return {
+        'proyectos': frame(['ID_Proyecto', 'ID_Contrato', 'FechaInicio', 'FechaFin', 'ValorTotalContrato'], [
+            (4, 20, '2024-01-05', '2024-04-30', 80000.0),
+        ]),
+        'contratos': frame(['ID_Contrato'], []),
+        'hitos': frame(['ID_Hito', 'ID_Proyecto', 'FechaFinPlanificada', 'FechaFinReal'], [
+            (104, 2, '2023-09-01', '2023-09-10'),
+            (105, 4, '2024-04-01', '2024-04-20'),
+        ]),
+        'tareas': frame(['ID_Tarea', 'ID_Hito', 'ID_Proyecto', 'DuracionPlanificada', 'DuracionReal'], [
+            (1004, 104, 2, 2, 5),
+            (1005, 105, 4, 8, 8),
+        ]),
+        'errores': frame(['ID_Error', 'ID_Tarea', 'ID_Proyecto'], [(3, 1002, 2), (4, 1005, 4)]),
+        'asignaciones': frame(['ID_Asignacion', 'ID_Proyecto', 'ID_Empleado'], [
+            (5, 1, 501), (6, 2, 504), (7, 4, 505),
+        ]),
+        'gastos': frame(['ID_Gasto', 'ID_Proyecto', 'TipoGasto', 'Categoria', 'Monto'], [
+            (4, 2, 'Licencias', 'CAPEX', 700.0),
+            (5, 4, 'Materiales', 'OPEX', 90.0),
+        ]),
+        'riesgos': frame(['ID_Riesgo', 'ID_Proyecto'], [(2, 1)]),
+        'penalizaciones': frame(['ID_Penalizacion', 'ID_Contrato', 'Monto'], [(2, 10, 125.0), (3, 20, 60.0)]),
+    }
+
+def full_extraction() -> dict:
+    """Extracción completa después del delta"""
+    first, delta = first_extraction(), delta_extraction()
+    return {name: pd.concat([first[name], delta[name]], ignore_index=True) for name in first}
+
+def with_dims(tables: dict) -> dict:
+    return {**tables, 'dim_proyectos': tables['proyectos'][['ID_Proyecto']], 'dim_tiempo': dim_tiempo()}
+
+@pytest.mark.parametrize('distinct', ['exact', 'hll'])
+def test_fold_delta_matches_full_recompute(distinct):
+    full = with_dims(full_extraction())
+    ids = full['proyectos']['ID_Proyecto']
+    expected = calculate_projects_metrics(ids, full, estado=ProjectAggregates(distinct=distinct))
+
+    estado = ProjectAggregates(distinct=distinct)
+    estado.fold(with_dims(first_extraction()), complete=True)
+    # El estado se guarda y se vuelve a leer entre ejecuciones
+    estado = ProjectAggregates.from_tables(estado.to_tables(), distinct)
+    estado.fold(with_dims(delta_extraction()))
+    result = metrics_from_state(estado, ids, dim_tiempo())
+
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+
+def test_forget_requires_full_extraction():
+    estado = ProjectAggregates()
+    estado.fold(with_dims(first_extraction()), complete=True)
+    estado.forget([1], [10])
+
+    assert 1 not in estado.known_projects()
+    assert 10 not in estado.complete_contracts()
+    assert list(estado.employees([1, 2])) == [0, 1]
+
+def test_fold_delta_without_hitos():
+    estado = ProjectAggregates()
+    estado.fold(with_dims(first_extraction()), complete=True)
+    antes = estado.proyectos['FinPlanificadaMax'].copy()
+    # Delta con solo un gasto nuevo: FinPlanificadaMax llega vacía
+    estado.fold({'gastos': frame(['ID_Gasto', 'ID_Proyecto', 'TipoGasto', 'Categoria', 'Monto'],
+                                 [(9, 1, 'Materiales', 'CAPEX', 10.0)])})
+
+    pd.testing.assert_series_equal(estado.proyectos['FinPlanificadaMax'], antes)
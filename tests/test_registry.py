@@ -0,0 +1,42 @@
+"""
+Registro de transformaciones: las tablas del DW pedidas se resuelven a las
+transformaciones de las que dependen (en orden de ejecución) y a sus tablas origen
+"""
+
+import sys
+import os
+
+import pytest
+
+# Agregar el directorio padre al path para importar módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from transform.registry import TRANSFORMS, get_source_columns, resolve_targets
+
+def test_fact_pulls_its_dimensions_and_their_sources():
+    transforms, source_tables = resolve_targets(['hechos_asignaciones'])
+    assert transforms == ['dim_tiempo', 'hechos_asignaciones']
+    # dim_tiempo lee las fechas de todas sus tablas origen
+    assert source_tables == ['asignaciones', 'empleados', 'gastos', 'hitos', 'penalizaciones', 'proyectos']
+
+def test_dimension_alone():
+    assert resolve_targets(['dim_clientes']) == (['dim_clientes'], ['clientes', 'contratos'])
+
+def test_targets_are_closed_under_dependencies():
+    transforms, source_tables = resolve_targets(['hechos_proyectos', 'dim_hitos'])
+    for position, name in enumerate(transforms):
+        for dependency in TRANSFORMS[name].get_dependencies():
+            if dependency in TRANSFORMS:
+                assert dependency in transforms[:position]
+            else:
+                assert dependency in source_tables
+    assert transforms == [name for name in TRANSFORMS if name in transforms]
+
+def test_unknown_target():
+    with pytest.raises(ValueError, match="dim_inexistente"):
+        resolve_targets(['dim_clientes', 'dim_inexistente'])
+
+def test_source_columns_of_targets():
+    columns = get_source_columns(resolve_targets(['hechos_asignaciones'])[0])
+    assert 'HorasReales' in columns['asignaciones']
+    assert 'clientes' not in columns
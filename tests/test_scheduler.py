@@ -0,0 +1,81 @@
+"""
+Planificador de transformaciones: cada transformación arranca cuando terminan
+sus dependencias y recibe sus salidas; las independientes corren a la vez
+"""
+
+import sys
+import os
+import threading
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+# Agregar el directorio padre al path para importar módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from transform import scheduler
+from transform.scheduler import build_dag, run_dag
+
+def fake_transforms(barrier=None):
+    """dim_a y dim_b (independientes) -> hechos (depende de las dos)"""
+    events = []
+
+    def node(name, dependencies):
+        def transform(df_dict):
+            if barrier is not None and name.startswith('dim_'):
+                # Solo pasa si las dos dimensiones están corriendo a la vez
+                barrier.wait(timeout=5)
+            events.append(name)
+            inputs = sorted(k for k in df_dict if k != 'origen')
+            return pd.DataFrame({'entradas': [','.join(inputs)], 'filas': [len(df_dict['origen'])]})
+        return SimpleNamespace(get_dependencies=lambda: ['origen', *dependencies], transform=transform)
+
+    transforms = {
+        'dim_a': node('dim_a', []),
+        'dim_b': node('dim_b', []),
+        'hechos': node('hechos', ['dim_a', 'dim_b']),
+    }
+    return transforms, events
+
+def test_dependencies_run_first_and_pass_their_outputs(monkeypatch):
+    transforms, events = fake_transforms()
+    monkeypatch.setattr(scheduler, 'TRANSFORMS', transforms)
+    results = run_dag({'origen': pd.DataFrame({'x': [1, 2, 3]})}, workers=1)
+
+    assert list(results) == ['dim_a', 'dim_b', 'hechos']
+    assert events.index('hechos') == 2
+    assert results['hechos']['entradas'].iloc[0] == 'dim_a,dim_b'
+    assert results['dim_a']['entradas'].iloc[0] == ''
+    assert (pd.concat(results.values())['filas'] == 3).all()
+
+def test_independent_transforms_run_concurrently(monkeypatch):
+    transforms, events = fake_transforms(barrier=threading.Barrier(2))
+    monkeypatch.setattr(scheduler, 'TRANSFORMS', transforms)
+    results = run_dag({'origen': pd.DataFrame({'x': [1]})}, workers=2)
+    assert events[-1] == 'hechos'
+    assert len(results) == 3
+
+def test_missing_dependency(monkeypatch):
+    transforms, _ = fake_transforms()
+    monkeypatch.setattr(scheduler, 'TRANSFORMS', transforms)
+    with pytest.raises(ValueError, match="dim_b"):
+        build_dag(['dim_a', 'hechos'])
+
+def test_circular_dependencies(monkeypatch):
+    transforms, _ = fake_transforms()
+    transforms['dim_a'] = SimpleNamespace(get_dependencies=lambda: ['hechos'], transform=None)
+    monkeypatch.setattr(scheduler, 'TRANSFORMS', transforms)
+    with pytest.raises(ValueError, match="circulares"):
+        run_dag({'origen': pd.DataFrame()})
+
+def test_error_propagates(monkeypatch):
+    transforms, _ = fake_transforms()
+
+    def fail(df_dict):
+        raise RuntimeError("fallo en dim_b")
+
+    transforms['dim_b'] = SimpleNamespace(get_dependencies=lambda: ['origen'], transform=fail)
+    monkeypatch.setattr(scheduler, 'TRANSFORMS', transforms)
+    with pytest.raises(RuntimeError, match="fallo en dim_b"):
+        run_dag({'origen': pd.DataFrame({'x': [1]})})
@@ -0,0 +1,53 @@
+"""
+Esquema tipado de la extracción: Decimal, date y enteros nulables llegan
+de pd.read_sql como object y deben salir con los tipos declarados
+"""
+
+import sys
+import os
+from datetime import date
+from decimal import Decimal
+
+import pandas as pd
+
+# Agregar el directorio padre al path para importar módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from extract.schema import apply_schema
+
+def test_object_columns_are_typed():
+    df = pd.DataFrame({
+        'ID_Tarea': [1, 2],
+        'ID_Hito': [10, 11],
+        'DuracionReal': [3, None],
+        'NombreTarea': ['a', 'b'],
+    }, dtype=object)
+    asignaciones = pd.DataFrame({
+        'ID_Asignacion': [1, 2],
+        'HorasReales': [Decimal('1.50'), None],
+        'FechaAsignacion': [date(2023, 1, 2), None],
+    }, dtype=object)
+
+    tareas = apply_schema(df, 'tareas')
+    assert tareas['ID_Tarea'].dtype == 'int32'
+    assert tareas['DuracionReal'].dtype == 'Int32'
+    assert tareas['DuracionReal'].isna().tolist() == [False, True]
+    # Columnas fuera del esquema: sin cambios
+    assert tareas['NombreTarea'].dtype == object
+
+    asignaciones = apply_schema(asignaciones, 'asignaciones')
+    assert asignaciones['HorasReales'].dtype == 'float64'
+    assert asignaciones['HorasReales'].iloc[0] == 1.5
+    assert asignaciones['FechaAsignacion'].dtype == 'datetime64[ns]'
+    assert asignaciones['FechaAsignacion'].iloc[0] == pd.Timestamp('2023-01-02')
+    assert pd.isna(asignaciones['FechaAsignacion'].iloc[1])
+
+def test_null_id_keeps_nullable_integer():
+    df = apply_schema(pd.DataFrame({'ID_Proyecto': [1, None]}, dtype=object), 'gastos')
+    assert df['ID_Proyecto'].dtype == 'Int32'
+
+def test_typed_and_unknown_tables_are_unchanged():
+    df = pd.DataFrame({'ID_Tarea': pd.array([1, 2], dtype='int32')})
+    assert apply_schema(df, 'tareas')['ID_Tarea'].dtype == 'int32'
+    unknown = pd.DataFrame({'x': ['1']}, dtype=object)
+    assert apply_schema(unknown, 'otra_tabla') is unknown
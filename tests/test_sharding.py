@@ -0,0 +1,58 @@
+"""
+hechos_proyectos por shards: plegar cada shard en un proceso y unir los
+estados debe dar el mismo estado y las mismas métricas que plegar todo junto
+"""
+
+import sys
+import os
+
+import pandas as pd
+import pytest
+
+# Agregar el directorio padre al path para importar módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from transform.hierarchy import project_keys
+from transform.project_state import ProjectAggregates
+from transform.sharding import PROJECT_TABLES, fold_sharded, split_by_project
+from transform.transform_fact.hechos_proyectos import metrics_from_state
+from test_project_state import dim_tiempo, full_extraction, with_dims
+
+def canonical(df: pd.DataFrame) -> pd.DataFrame:
+    """Tablas del estado sin depender del orden de filas (los pares por empleado no tienen índice)"""
+    if isinstance(df.index, pd.RangeIndex):
+        return df.sort_values(list(df.columns)).reset_index(drop=True)
+    return df.sort_index()
+
+@pytest.mark.parametrize('method', ['hash', 'range'])
+def test_split_keeps_each_project_in_one_shard(method):
+    tables = full_extraction()
+    parts = split_by_project(tables, 3, method)
+    for table_name in PROJECT_TABLES:
+        if table_name not in tables:
+            continue
+        rows = pd.concat([part[table_name] for part in parts])
+        pd.testing.assert_frame_equal(rows.sort_index(), tables[table_name])
+        for part in parts:
+            # Las filas de un shard solo son de proyectos de ese shard
+            assert set(project_keys(part, table_name).dropna()) <= set(part['proyectos']['ID_Proyecto'])
+    for part in parts:
+        # Cada shard trae los contratos y penalizaciones de sus proyectos
+        assert set(part['contratos']['ID_Contrato']) == set(part['proyectos']['ID_Contrato'])
+        assert set(part['penalizaciones']['ID_Contrato']) <= set(part['proyectos']['ID_Contrato'])
+
+@pytest.mark.parametrize('method, distinct', [('hash', 'exact'), ('range', 'exact'), ('hash', 'hll')])
+def test_sharded_fold_matches_serial(method, distinct):
+    full = with_dims(full_extraction())
+    ids = full['proyectos']['ID_Proyecto']
+    serial = ProjectAggregates(distinct=distinct)
+    serial.fold(full, complete=True)
+
+    sharded = fold_sharded(ProjectAggregates(distinct=distinct), full, shards=2, method=method)
+
+    expected, result = serial.to_tables(), sharded.to_tables()
+    assert list(result) == list(expected)
+    for name, df in expected.items():
+        pd.testing.assert_frame_equal(canonical(result[name]), canonical(df), obj=name)
+    pd.testing.assert_frame_equal(metrics_from_state(sharded, ids, dim_tiempo()),
+                                  metrics_from_state(serial, ids, dim_tiempo()))
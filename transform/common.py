@@ -3,6 +3,15 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+def copy_on_write():
+    """
+    Contexto con copy-on-write activo: las transformaciones reciben las tablas
+    crudas y las salidas de otras transformaciones sin copiarlas; una columna
+    solo se copia si se modifica. Se activa solo mientras se transforma, no al
+    importar el módulo.
+    """
+    return pd.option_context('mode.copy_on_write', True)
+
 def ensure_df(df: pd.DataFrame) -> pd.DataFrame:
     if df is None:
         return pd.DataFrame()
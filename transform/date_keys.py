@@ -0,0 +1,100 @@
+"""
+Resolución de fechas a claves de dim_tiempo (ID_Tiempo)
+
+DateKeyResolver se construye una vez a partir de dim_tiempo y convierte
+arreglos completos de fechas en ID_Tiempo con np.searchsorted sobre las
+fechas ordenadas (o con un desplazamiento aritmético cuando dim_tiempo es
+un rango continuo de días, que es el caso normal). Todas las
+transformaciones que generan claves de fecha lo usan, así las claves son
+siempre las mismas que las de dim_tiempo.
+"""
+
+import logging
+import threading
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+class DateKeyResolver:
+    """Fecha -> ID_Tiempo vectorizado a partir de dim_tiempo"""
+
+    # Día que representa una fecha nula
+    NAT_DAY = np.iinfo(np.int64).min
+
+    def __init__(self, dim_tiempo: pd.DataFrame):
+        if dim_tiempo is None or dim_tiempo.empty:
+            self.days = np.empty(0, dtype=np.int64)
+            self.ids = np.empty(0, dtype=np.int64)
+        else:
+            days = self.to_days(dim_tiempo['Fecha'])
+            ids = dim_tiempo['ID_Tiempo'].to_numpy(dtype=np.int64)
+            valid = days != self.NAT_DAY
+            order = np.argsort(days[valid], kind='stable')
+            self.days = days[valid][order]
+            self.ids = ids[valid][order]
+
+        # Rango continuo de días con IDs consecutivos: basta con restar el primer día
+        self.contiguous = bool(len(self.days)) and bool(
+            (np.diff(self.days) == 1).all() and (np.diff(self.ids) == 1).all()
+        )
+
+    @classmethod
+    def to_days(cls, fechas) -> np.ndarray:
+        """Días desde 1970-01-01 (NAT_DAY si la fecha es nula o inválida)"""
+        fechas = pd.to_datetime(pd.Series(fechas), errors='coerce').dt.normalize()
+        return fechas.to_numpy(dtype='datetime64[ns]').astype('datetime64[D]').astype(np.int64)
+
+    def __len__(self) -> int:
+        return len(self.days)
+
+    def resolve(self, fechas, missing: Optional[int] = 0) -> np.ndarray:
+        """
+        Convertir fechas a ID_Tiempo
+
+        Args:
+            fechas: Series/arreglo de fechas (datetime64, date o texto)
+            missing: clave para fechas nulas o fuera de dim_tiempo;
+                     None = NaN (el resultado es float solo si hay alguna)
+
+        Returns:
+            arreglo de ID_Tiempo alineado con fechas
+        """
+        days = self.to_days(fechas)
+        if self.contiguous:
+            pos = days - self.days[0]
+            found = (days != self.NAT_DAY) & (pos >= 0) & (pos < len(self.days))
+        else:
+            # side='right' - 1: con fechas repetidas gana la última fila de dim_tiempo
+            pos = np.searchsorted(self.days, days, side='right') - 1
+            found = (pos >= 0) & (days != self.NAT_DAY)
+            found[found] = self.days[pos[found]] == days[found]
+
+        keys = np.zeros(len(days), dtype=np.int64)
+        keys[found] = self.ids[pos[found]]
+        if found.all():
+            return keys
+        if missing is None:
+            keys = keys.astype(float)
+            keys[~found] = np.nan
+        else:
+            keys[~found] = missing
+        return keys
+
+_cache_lock = threading.Lock()
+_cached = (None, None)
+
+def get_date_key_resolver(dim_tiempo: pd.DataFrame) -> DateKeyResolver:
+    """
+    Resolver de un dim_tiempo, construido una sola vez aunque varias
+    transformaciones (en paralelo) lo pidan para el mismo DataFrame
+    """
+    global _cached
+    with _cache_lock:
+        frame, resolver = _cached
+        if frame is not dim_tiempo:
+            resolver = DateKeyResolver(dim_tiempo)
+            _cached = (dim_tiempo, resolver)
+        return resolver
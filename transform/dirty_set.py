@@ -0,0 +1,70 @@
+"""
+Proyectos afectados por una extracción incremental
+
+Cada fila nueva o modificada de una tabla origen de hechos_proyectos
+"ensucia" el proyecto al que pertenece: un gasto nuevo su ID_Proyecto, un
+error el proyecto de su ID_Tarea, una penalización todos los proyectos de
+su contrato. Solo esos proyectos se vuelven a calcular, así el coste de
+una ejecución incremental depende del tamaño del delta y no del histórico.
+"""
+
+import logging
+from typing import Dict, Tuple
+import sys
+import os
+
+import pandas as pd
+
+# Agregar path para imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from transform.registry import TRANSFORMS
+from transform.hierarchy import project_keys
+
+logger = logging.getLogger(__name__)
+
+# Hecho que se recalcula por proyecto
+PROJECT_FACT = 'hechos_proyectos'
+
+# Tablas cuyas filas afectan a todos los proyectos de un contrato
+CONTRACT_TABLES = ('contratos', 'penalizaciones')
+
+def get_fact_sources(fact: str = PROJECT_FACT) -> list:
+    """Tablas origen que lee el hecho (las que pueden ensuciar un proyecto)"""
+    return [t for t in TRANSFORMS[fact].get_dependencies() if t not in TRANSFORMS]
+
+def compute_dirty_projects(raw_data: Dict[str, pd.DataFrame],
+                           fact: str = PROJECT_FACT) -> Tuple[pd.Index, pd.Index]:
+    """
+    Proyectos (y contratos) a recalcular a partir de las filas de una extracción incremental
+
+    Args:
+        raw_data: tablas crudas del delta
+        fact: hecho cuyas tablas origen se consideran
+
+    Returns:
+        (ID_Proyecto afectados, ID_Contrato cuyos proyectos están todos afectados)
+    """
+    proyectos, contratos = [], []
+    for table_name in get_fact_sources(fact):
+        df = raw_data.get(table_name)
+        if df is None or df.empty:
+            continue
+        if table_name in CONTRACT_TABLES:
+            contratos.append(df['ID_Contrato'])
+            continue
+        keys = project_keys(raw_data, table_name)
+        unresolved = int(keys.isna().sum())
+        if unresolved:
+            logger.warning(f"{table_name}: {unresolved} filas sin proyecto en el delta, no ensucian ningún proyecto")
+        proyectos.append(keys)
+
+    def unique_ids(values) -> pd.Index:
+        if not values:
+            return pd.Index([], dtype='int64')
+        ids = pd.concat(values, ignore_index=True).dropna().astype('int64')
+        return pd.Index(pd.unique(ids)).sort_values()
+
+    dirty_proyectos, dirty_contratos = unique_ids(proyectos), unique_ids(contratos)
+    logger.info(f"Delta: {len(dirty_proyectos)} proyectos y {len(dirty_contratos)} contratos afectados")
+    return dirty_proyectos, dirty_contratos
@@ -0,0 +1,142 @@
+"""
+Conteo de valores distintos por proyecto (empleados asignados)
+
+Un conteo distinto no se puede actualizar con sumas, por eso el estado de
+hechos_proyectos guarda algo que sí se puede combinar con cada delta:
+  'exact' -> pares distintos (ID_Proyecto, valor); exacto, crece con los pares
+  'hll'   -> registros HyperLogLog por proyecto (2^precision bytes); aproximado,
+             tamaño fijo por proyecto y se combina con max registro a registro
+Ambos exponen reset/add/count y se guardan como una tabla más del estado.
+"""
+
+import logging
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+DISTINCT_MODES = ('exact', 'hll')
+
+# 2^8 = 256 registros por proyecto: error estándar ~6.5% (casi exacto con pocos empleados)
+DEFAULT_PRECISION = 8
+
+class ExactDistinctCounter:
+    """Pares distintos (ID_Proyecto, valor)"""
+
+    MODE = 'exact'
+    TABLE = 'empleados'
+
+    def __init__(self, pairs: Optional[pd.DataFrame] = None):
+        self.pairs = pairs if pairs is not None else pd.DataFrame(
+            {'ID_Proyecto': pd.Series(dtype='int64'), 'ID_Empleado': pd.Series(dtype='int64')})
+
+    def reset(self, proyecto_ids):
+        """Olvidar los valores de estos proyectos"""
+        self.pairs = self.pairs[~self.pairs['ID_Proyecto'].isin(proyecto_ids)]
+
+    def add(self, proyecto_ids, values):
+        """Sumar valores (alineados con proyecto_ids)"""
+        pares = pd.DataFrame({'ID_Proyecto': np.asarray(proyecto_ids, dtype=np.int64),
+                              'ID_Empleado': np.asarray(values, dtype=np.int64)})
+        self.pairs = pd.concat([self.pairs, pares], ignore_index=True).drop_duplicates()
+
+    def merge(self, other: 'ExactDistinctCounter'):
+        """Tomar los proyectos de other (reemplazan a los propios)"""
+        self.reset(other.pairs['ID_Proyecto'])
+        self.pairs = pd.concat([self.pairs, other.pairs], ignore_index=True)
+
+    def count(self, proyecto_ids) -> np.ndarray:
+        """Valores distintos por proyecto, alineados con proyecto_ids"""
+        counts = self.pairs.groupby('ID_Proyecto')['ID_Empleado'].nunique()
+        return counts.reindex(proyecto_ids, fill_value=0).to_numpy()
+
+    def to_frame(self) -> pd.DataFrame:
+        return self.pairs.reset_index(drop=True)
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> 'ExactDistinctCounter':
+        return cls(df)
+
+def _bit_length(values: np.ndarray) -> np.ndarray:
+    """Bits significativos de enteros uint64 (0 para 0), exacto con float64 en dos mitades"""
+    hi = (values >> np.uint64(32)).astype(np.float64)
+    lo = (values & np.uint64(0xFFFFFFFF)).astype(np.float64)
+    return np.where(hi > 0, np.frexp(hi)[1] + 32, np.frexp(lo)[1])
+
+class HyperLogLogCounter:
+    """Registros HyperLogLog por proyecto (una fila de 2^precision uint8 por proyecto)"""
+
+    MODE = 'hll'
+    TABLE = 'empleados_hll'
+
+    def __init__(self, precision: int = DEFAULT_PRECISION):
+        self.precision = precision
+        self.m = 1 << precision
+        self.index = pd.Index([], dtype='int64', name='ID_Proyecto')
+        self.registers = np.zeros((0, self.m), dtype=np.uint8)
+
+    def reset(self, proyecto_ids):
+        """Olvidar los valores de estos proyectos"""
+        keep = ~self.index.isin(proyecto_ids)
+        self.index, self.registers = self.index[keep], self.registers[keep]
+
+    def add(self, proyecto_ids, values):
+        """Sumar valores (alineados con proyecto_ids): max del rango en cada registro"""
+        proyecto_ids = np.asarray(proyecto_ids, dtype=np.int64)
+        if not len(proyecto_ids):
+            return
+        nuevos = pd.Index(pd.unique(proyecto_ids)).difference(self.index)
+        if len(nuevos):
+            self.index = self.index.append(nuevos.rename('ID_Proyecto'))
+            self.registers = np.vstack([self.registers, np.zeros((len(nuevos), self.m), dtype=np.uint8)])
+
+        # Hash estable entre ejecuciones: los primeros bits eligen el registro,
+        # el rango es la posición del primer 1 en el resto
+        hashes = pd.util.hash_array(np.asarray(values, dtype=np.int64))
+        bits = 64 - self.precision
+        registro = (hashes >> np.uint64(bits)).astype(np.intp)
+        resto = hashes & np.uint64((1 << bits) - 1)
+        rango = (bits - _bit_length(resto) + 1).astype(np.uint8)
+        np.maximum.at(self.registers, (self.index.get_indexer(proyecto_ids), registro), rango)
+
+    def merge(self, other: 'HyperLogLogCounter'):
+        """Tomar los proyectos de other (reemplazan a los propios)"""
+        if other.m != self.m:
+            raise ValueError(f"Sketches con distinta precisión: {self.precision} y {other.precision}")
+        self.reset(other.index)
+        self.index = self.index.append(other.index)
+        self.registers = np.vstack([self.registers, other.registers])
+
+    def count(self, proyecto_ids) -> np.ndarray:
+        """Estimación de valores distintos por proyecto (entera), alineada con proyecto_ids"""
+        codes = self.index.get_indexer(pd.Index(proyecto_ids))
+        registers = self.registers[np.where(codes >= 0, codes, 0)].astype(np.float64)
+        m = self.m
+        alpha = {16: 0.673, 32: 0.697, 64: 0.709}.get(m, 0.7213 / (1 + 1.079 / m))
+        estimate = alpha * m * m / np.sum(np.exp2(-registers), axis=1)
+        # Rango pequeño: conteo lineal sobre los registros vacíos
+        vacios = np.sum(registers == 0, axis=1)
+        pequeno = (estimate <= 2.5 * m) & (vacios > 0)
+        estimate[pequeno] = m * np.log(m / vacios[pequeno])
+        return np.where(codes >= 0, np.rint(estimate), 0).astype(np.int64)
+
+    def to_frame(self) -> pd.DataFrame:
+        return pd.DataFrame({'ID_Proyecto': self.index.to_numpy(),
+                             'registros': [row.tobytes() for row in self.registers]})
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> 'HyperLogLogCounter':
+        size = len(df['registros'].iloc[0]) if len(df) else 1 << DEFAULT_PRECISION
+        counter = cls(precision=int(size).bit_length() - 1)
+        counter.index = pd.Index(df['ID_Proyecto'].astype('int64'), name='ID_Proyecto')
+        counter.registers = np.frombuffer(b''.join(df['registros']), dtype=np.uint8) \
+            .reshape(len(df), counter.m).copy()
+        return counter
+
+def make_distinct_counter(mode: str = 'exact'):
+    """Contador vacío del modo pedido ('exact' o 'hll')"""
+    if mode not in DISTINCT_MODES:
+        raise ValueError(f"Modo de conteo distinto desconocido: {mode}. Disponibles: {', '.join(DISTINCT_MODES)}")
+    return HyperLogLogCounter() if mode == 'hll' else ExactDistinctCounter()
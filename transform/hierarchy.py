@@ -0,0 +1,128 @@
+"""
+Índice jerárquico proyecto -> hito -> tarea -> error
+
+Por cada enlace hijo -> padre (p. ej. tareas.ID_Hito) guarda el código
+factorizado del padre de cada fila hija y el número de filas por padre, así
+una transformación agrega hacia arriba (count_by, sum_by) con un bincount
+sin recorrer las tablas con una máscara por proyecto.
+
+Crear el índice no recorre las tablas: cada enlace se construye la primera
+vez que se pide, por eso run_transformations lo publica aunque ninguna de
+las transformaciones programadas lo use.
+
+Las tablas hijas ya traen ID_Proyecto desde la extracción, por eso cada
+nivel se enlaza también directamente con el proyecto (sirve aunque falte
+el padre intermedio, p. ej. en extracciones incrementales).
+"""
+
+import logging
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Clave bajo la que run_transformations publica el índice en df_dict
+HIERARCHY_KEY = '_jerarquia'
+
+# (tabla hija, columna del padre)
+HIERARCHY_LINKS = [
+    ('hitos', 'ID_Proyecto'),
+    ('tareas', 'ID_Proyecto'),
+    ('tareas', 'ID_Hito'),
+    ('errores', 'ID_Proyecto'),
+    ('errores', 'ID_Tarea'),
+]
+
+# Tabla que define las claves de cada columna padre
+KEY_TABLES = {'ID_Proyecto': 'proyectos', 'ID_Hito': 'hitos', 'ID_Tarea': 'tareas'}
+
+# Tabla -> (columna, tabla padre) para llegar a ID_Proyecto cuando la fila no lo trae
+PARENT_LINKS = {
+    'errores': ('ID_Tarea', 'tareas'),
+    'tareas': ('ID_Hito', 'hitos'),
+    'pruebas': ('ID_Hito', 'hitos'),
+}
+
+class HierarchyIndex:
+    """Filas de hitos, tareas y errores agrupadas por su padre (cada enlace al primer uso)"""
+
+    def __init__(self, df_dict: Dict[str, pd.DataFrame]):
+        self.tables = {t: df_dict.get(t) for t in ('proyectos', 'hitos', 'tareas', 'errores')}
+        self.tables = {t: df for t, df in self.tables.items() if df is not None and not df.empty}
+        self._keys = {}
+        self._links = {}
+
+    def parent_keys(self, key: str) -> Optional[pd.Index]:
+        """Claves de un nivel: IDs de la tabla padre más los que aparecen en los hijos"""
+        if key not in self._keys:
+            values = [df[key] for t, df in self.tables.items()
+                      if key in df.columns and (t == KEY_TABLES[key] or (t, key) in HIERARCHY_LINKS)]
+            self._keys[key] = (pd.Index(pd.unique(pd.concat(values, ignore_index=True).dropna())).sort_values()
+                               if values else None)
+        return self._keys[key]
+
+    def link(self, table_name: str, key: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """(código del padre por fila, filas por padre) del enlace, o None si no hay datos"""
+        if (table_name, key) not in self._links:
+            df = self.tables.get(table_name)
+            link = None
+            if (table_name, key) in HIERARCHY_LINKS and df is not None and key in df.columns:
+                keys = self.parent_keys(key)
+                codes = keys.get_indexer(df[key])
+                link = codes, np.bincount(codes[codes >= 0], minlength=len(keys))
+            self._links[(table_name, key)] = link
+        return self._links[(table_name, key)]
+
+    def _parent_codes(self, key: str, parent_ids) -> np.ndarray:
+        keys = self.parent_keys(key)
+        return keys.get_indexer(parent_ids) if keys is not None else np.full(len(parent_ids), -1)
+
+    def count_by(self, table_name: str, key: str, parent_ids) -> np.ndarray:
+        """Filas hijas por padre, alineadas con parent_ids (0 si no tiene)"""
+        link = self.link(table_name, key)
+        if link is None:
+            return np.zeros(len(parent_ids), dtype=np.int64)
+        _, counts = link
+        codes = self._parent_codes(key, parent_ids)
+        return np.where(codes >= 0, counts[codes], 0)
+
+    def sum_by(self, table_name: str, key: str, values, parent_ids) -> np.ndarray:
+        """
+        Suma de values (una por fila de table_name) por padre, alineada con
+        parent_ids; los nulos no suman
+        """
+        link = self.link(table_name, key)
+        if link is None:
+            return np.zeros(len(parent_ids))
+        row_codes, counts = link
+        values = np.nan_to_num(np.asarray(values, dtype=float))
+        valid = row_codes >= 0
+        sums = np.bincount(row_codes[valid], weights=values[valid], minlength=len(counts))
+        codes = self._parent_codes(key, parent_ids)
+        return np.where(codes >= 0, sums[codes], 0.0)
+
+def project_keys(raw_data: Dict[str, pd.DataFrame], table_name: str) -> pd.Series:
+    """ID_Proyecto de cada fila de table_name (NaN si no se puede resolver con las tablas de raw_data)"""
+    df = raw_data.get(table_name)
+    if df is None or df.empty:
+        return pd.Series(dtype=float)
+    if 'ID_Proyecto' in df.columns:
+        return df['ID_Proyecto']
+    if table_name not in PARENT_LINKS:
+        return pd.Series(dtype=float)
+
+    column, parent = PARENT_LINKS[table_name]
+    parent_df = raw_data.get(parent)
+    if column not in df.columns or parent_df is None or column not in parent_df.columns:
+        return pd.Series(float('nan'), index=df.index)
+    parent_keys = project_keys(raw_data, parent)
+    mapping = pd.Series(parent_keys.to_numpy(), index=parent_df[column].to_numpy())
+    mapping = mapping[~mapping.index.duplicated()]
+    return df[column].map(mapping)
+
+def get_hierarchy_index(df_dict: Dict[str, pd.DataFrame]) -> HierarchyIndex:
+    """Índice publicado por run_transformations, o uno nuevo si se llama a la transformación suelta"""
+    index = df_dict.get(HIERARCHY_KEY)
+    return index if index is not None else HierarchyIndex(df_dict)
@@ -0,0 +1,312 @@
+"""
+Estado agregado por proyecto para hechos_proyectos
+
+Las métricas de hechos_proyectos son sumas y conteos descomponibles
+(gastos, penalizaciones, errores, tareas/hitos retrasados, CAPEX/OPEX) más
+algunos máximos y atributos del proyecto. En lugar de recalcularlas desde
+todo el histórico se guarda por proyecto el estado parcial (sumas, conteos,
+fechas máximas) y cada extracción incremental se "pliega" sobre él: las
+filas nuevas suman y los ratios se derivan del estado. Así una ejecución
+incremental no vuelve a leer gastos o tareas antiguos.
+
+Un proyecto que aparece en la tabla proyectos del delta llega con todo su
+subárbol (al entrar al alcance se extrae completo), por eso su estado se
+reinicia antes de sumar; lo mismo con los contratos y sus penalizaciones.
+Un contrato está completo cuando sus penalizaciones se sumaron desde una
+extracción que las trae todas; si no, su proyecto se extrae completo.
+"""
+
+import logging
+from typing import Dict, Optional
+import sys
+import os
+
+import numpy as np
+import pandas as pd
+
+# Agregar path para imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from transform.common import ensure_df
+from transform.hierarchy import get_hierarchy_index, project_keys
+from transform.distinct_counter import (ExactDistinctCounter, HyperLogLogCounter,
+                                        make_distinct_counter)
+
+logger = logging.getLogger(__name__)
+
+# Clave bajo la que run_transformations publica el estado en df_dict
+PROJECT_STATE_KEY = '_estado_proyectos'
+
+# Atributos del proyecto: se reemplazan cuando el proyecto llega en el delta
+ATTRIBUTE_COLUMNS = ['ID_Contrato', 'FechaInicio', 'FechaFin', 'ValorTotalContrato', 'Valido']
+# Sumas y conteos: se acumulan
+SUM_COLUMNS = ['Hitos', 'HitosRetrasados', 'HitosConFinReal', 'Tareas', 'TareasRetrasadas', 'Errores',
+               'Gastos', 'GastosPenalizacion', 'CAPEX', 'OPEX']
+# Máximos: se combinan con max
+MAX_COLUMNS = ['FinPlanificadaMax']
+# Primera fila vista (gasto / riesgo de referencia, 0 = ninguna): se conserva la existente
+FIRST_COLUMNS = ['ID_Finanza', 'ID_Riesgo']
+
+STATE_COLUMNS = ATTRIBUTE_COLUMNS + SUM_COLUMNS + MAX_COLUMNS + FIRST_COLUMNS
+
+def _ids(values) -> pd.Index:
+    """Claves enteras sin nulos ni repetidos"""
+    values = pd.Series(values).dropna()
+    return pd.Index(pd.unique(values.astype('int64')), dtype='int64')
+
+def _by_project(df: pd.DataFrame, values: Dict[str, pd.Series]) -> pd.DataFrame:
+    """Suma por ID_Proyecto de varias columnas alineadas con df"""
+    frame = pd.DataFrame(values)
+    frame['ID_Proyecto'] = df['ID_Proyecto'].to_numpy()
+    frame = frame.dropna(subset=['ID_Proyecto'])
+    frame['ID_Proyecto'] = frame['ID_Proyecto'].astype('int64')
+    return frame.groupby('ID_Proyecto').sum()
+
+def _first_by_project(df: pd.DataFrame, column: str) -> pd.Series:
+    """Valor de la primera fila de cada proyecto"""
+    primero = df.dropna(subset=['ID_Proyecto']).drop_duplicates('ID_Proyecto')
+    return pd.Series(primero[column].to_numpy(), index=primero['ID_Proyecto'].astype('int64'))
+
+class ProjectAggregates:
+    """
+    Estado parcial de las métricas de hechos_proyectos (proyectos, contratos, empleados)
+
+    distinct elige cómo se cuentan los empleados distintos: 'exact' (por
+    defecto) o 'hll' (sketch de tamaño fijo por proyecto, aproximado).
+    """
+
+    def __init__(self, proyectos: Optional[pd.DataFrame] = None, contratos: Optional[pd.DataFrame] = None,
+                 empleados=None, distinct: str = 'exact'):
+        # Por ID_Proyecto: STATE_COLUMNS
+        self.proyectos = proyectos if proyectos is not None else self._empty_proyectos()
+        # Por ID_Contrato: suma de penalizaciones del contrato y si la suma está completa
+        self.contratos = contratos if contratos is not None else pd.DataFrame(
+            {'Penalizaciones': pd.Series(dtype=float), 'Completo': pd.Series(dtype=bool)},
+            index=pd.Index([], dtype='int64', name='ID_Contrato'))
+        # Empleados distintos por proyecto: pares exactos o sketch HyperLogLog (transform/distinct_counter.py)
+        self.empleados = empleados if empleados is not None else make_distinct_counter(distinct)
+
+    @staticmethod
+    def _empty_proyectos() -> pd.DataFrame:
+        df = pd.DataFrame(index=pd.Index([], dtype='int64', name='ID_Proyecto'), columns=STATE_COLUMNS)
+        for column in ['ID_Contrato', 'ValorTotalContrato'] + SUM_COLUMNS:
+            df[column] = df[column].astype(float)
+        for column in ['FechaInicio', 'FechaFin'] + MAX_COLUMNS:
+            df[column] = df[column].astype('datetime64[ns]')
+        for column in FIRST_COLUMNS:
+            df[column] = df[column].astype('int64')
+        df['Valido'] = df['Valido'].astype(bool)
+        return df
+
+    def __len__(self) -> int:
+        return len(self.proyectos)
+
+    def fold(self, df_dict: Dict[str, pd.DataFrame], complete: bool = False) -> pd.Index:
+        """
+        Sumar al estado las filas de una extracción (completa o incremental)
+
+        Args:
+            df_dict: tablas crudas (y dim_proyectos, que marca los proyectos válidos)
+            complete: df_dict trae también todas las penalizaciones de los contratos
+                      de sus proyectos (extracción completa o extract_projects)
+
+        Returns:
+            ID_Proyecto cuyo estado cambió
+        """
+        proyectos = ensure_df(df_dict.get('proyectos'))
+        contratos = ensure_df(df_dict.get('contratos'))
+        dim_proyectos = df_dict.get('dim_proyectos')
+
+        # Proyectos y contratos que llegan completos: se reinicia su estado
+        reset = _ids(proyectos['ID_Proyecto']) if 'ID_Proyecto' in proyectos.columns else pd.Index([], dtype='int64')
+        self.proyectos = self.proyectos.drop(reset, errors='ignore')
+        self.empleados.reset(reset)
+        reset_contratos = _ids(contratos['ID_Contrato']) if 'ID_Contrato' in contratos.columns \
+            else pd.Index([], dtype='int64')
+        if complete and 'ID_Contrato' in proyectos.columns:
+            reset_contratos = reset_contratos.union(_ids(proyectos['ID_Contrato']))
+        self.contratos = self.contratos.drop(reset_contratos, errors='ignore')
+
+        delta = self._delta(df_dict)
+        if not reset.empty:
+            proyecto = proyectos.dropna(subset=['ID_Proyecto']).drop_duplicates('ID_Proyecto')
+            proyecto = proyecto.set_index(proyecto['ID_Proyecto'].astype('int64'))
+            validos = reset if dim_proyectos is None else _ids(dim_proyectos['ID_Proyecto'])
+            atributos = pd.DataFrame({
+                'ID_Contrato': pd.to_numeric(proyecto['ID_Contrato'], errors='coerce').astype(float),
+                'FechaInicio': pd.to_datetime(proyecto['FechaInicio'], errors='coerce'),
+                'FechaFin': pd.to_datetime(proyecto['FechaFin'], errors='coerce'),
+                'ValorTotalContrato': pd.to_numeric(proyecto['ValorTotalContrato'], errors='coerce').astype(float)
+                if 'ValorTotalContrato' in proyecto.columns else 0.0,
+                'Valido': proyecto.index.isin(validos),
+            }, index=proyecto.index)
+            delta = atributos.join(delta, how='outer')
+
+        changed = delta.index
+        if not changed.empty:
+            index = self.proyectos.index.union(changed)
+            state = self.proyectos.reindex(index)
+            new = delta.reindex(index=index, columns=STATE_COLUMNS)
+            llega = index.isin(reset)
+            if llega.any():
+                for column in ATTRIBUTE_COLUMNS:
+                    state[column] = new[column].where(llega, state[column])
+            for column in SUM_COLUMNS:
+                state[column] = state[column].fillna(0.0) + new[column].fillna(0.0)
+            for column in MAX_COLUMNS:
+                # Sin filas de la tabla en el delta la columna llega como NaN (float)
+                state[column] = pd.concat([pd.to_datetime(state[column]), pd.to_datetime(new[column])],
+                                          axis=1).max(axis=1)
+            for column in FIRST_COLUMNS:
+                state[column] = state[column].where(state[column] > 0, new[column]).fillna(0).astype('int64')
+            state['Valido'] = state['Valido'].eq(True)
+            self.proyectos = state
+
+        # Penalizaciones por contrato
+        penalizaciones = ensure_df(df_dict.get('penalizaciones'))
+        monto = pd.Series(dtype=float)
+        if not penalizaciones.empty:
+            monto = pd.to_numeric(penalizaciones['Monto'], errors='coerce').astype(float) \
+                .groupby(penalizaciones['ID_Contrato'].astype('int64')).sum()
+        index = self.contratos.index.union(reset_contratos).union(monto.index)
+        self.contratos = pd.DataFrame({
+            'Penalizaciones': self.contratos['Penalizaciones'].reindex(index, fill_value=0.0)
+            + monto.reindex(index, fill_value=0.0),
+            'Completo': self.contratos['Completo'].reindex(index, fill_value=False).astype(bool)
+            | index.isin(reset_contratos),
+        }, index=index.rename('ID_Contrato'))
+
+        # Empleados distintos por proyecto
+        asignaciones = ensure_df(df_dict.get('asignaciones'))
+        if not asignaciones.empty:
+            pares = asignaciones[['ID_Proyecto', 'ID_Empleado']].dropna().astype('int64')
+            self.empleados.add(pares['ID_Proyecto'], pares['ID_Empleado'])
+            changed = changed.union(_ids(pares['ID_Proyecto']))
+
+        logger.info(f"Estado de proyectos: {len(changed)} proyectos actualizados, {len(self.proyectos)} en total")
+        return changed
+
+    def forget(self, proyecto_ids, contrato_ids=()):
+        """Descartar el estado de estos proyectos y contratos (se vuelven a extraer completos)"""
+        proyecto_ids, contrato_ids = _ids(proyecto_ids), _ids(contrato_ids)
+        self.proyectos = self.proyectos.drop(proyecto_ids, errors='ignore')
+        self.empleados.reset(proyecto_ids)
+        self.contratos = self.contratos.drop(contrato_ids, errors='ignore')
+
+    def merge(self, other: 'ProjectAggregates'):
+        """
+        Tomar el estado de otro (p. ej. el de un shard): sus proyectos, contratos
+        y empleados reemplazan a los propios
+        """
+        self.proyectos = pd.concat([self.proyectos.drop(other.proyectos.index, errors='ignore'),
+                                    other.proyectos]).sort_index()
+        contratos = pd.concat([self.contratos.drop(other.contratos.index, errors='ignore'), other.contratos])
+        # Un contrato con proyectos en varios shards llega igual desde cada uno
+        self.contratos = contratos[~contratos.index.duplicated(keep='last')].sort_index()
+        self.empleados.merge(other.empleados)
+
+    def _delta(self, df_dict: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+        """Sumas, conteos y máximos de las filas de df_dict por ID_Proyecto"""
+        hitos = ensure_df(df_dict.get('hitos'))
+        tareas = ensure_df(df_dict.get('tareas'))
+        errores = ensure_df(df_dict.get('errores'))
+        gastos = ensure_df(df_dict.get('gastos'))
+        riesgos = ensure_df(df_dict.get('riesgos'))
+        jerarquia = get_hierarchy_index(df_dict)
+        parts = []
+
+        if not hitos.empty:
+            fin_planificada = pd.to_datetime(hitos['FechaFinPlanificada'], errors='coerce')
+            fin_real = pd.to_datetime(hitos['FechaFinReal'], errors='coerce')
+            ids = _ids(hitos['ID_Proyecto'])
+            parts.append(pd.DataFrame({
+                'Hitos': jerarquia.count_by('hitos', 'ID_Proyecto', ids),
+                'HitosRetrasados': jerarquia.sum_by('hitos', 'ID_Proyecto', (fin_real - fin_planificada).dt.days > 0, ids),
+                'HitosConFinReal': jerarquia.sum_by('hitos', 'ID_Proyecto', fin_real.notna(), ids),
+            }, index=ids))
+            parts.append(pd.DataFrame({'FinPlanificadaMax': fin_planificada.to_numpy(),
+                                       'ID_Proyecto': hitos['ID_Proyecto'].to_numpy()})
+                         .dropna(subset=['ID_Proyecto'])
+                         .astype({'ID_Proyecto': 'int64'}).groupby('ID_Proyecto').max())
+
+        if not tareas.empty:
+            duracion_real = pd.to_numeric(tareas['DuracionReal'], errors='coerce').astype(float)
+            duracion_plan = pd.to_numeric(tareas['DuracionPlanificada'], errors='coerce').astype(float)
+            ids = _ids(tareas['ID_Proyecto'])
+            parts.append(pd.DataFrame({
+                'Tareas': jerarquia.count_by('tareas', 'ID_Proyecto', ids),
+                'TareasRetrasadas': jerarquia.sum_by('tareas', 'ID_Proyecto', (duracion_real - duracion_plan) > 0, ids),
+            }, index=ids))
+
+        if not errores.empty:
+            proyecto = project_keys(df_dict, 'errores')
+            parts.append(pd.DataFrame({'Errores': proyecto.dropna().astype('int64').value_counts()}))
+
+        if not gastos.empty:
+            monto = pd.to_numeric(gastos['Monto'], errors='coerce').astype(float)
+            es_penalizacion = gastos['TipoGasto'].str.lower().str.contains('penalizacion', na=False)
+            categoria = gastos['Categoria'].str.upper()
+            parts.append(_by_project(gastos, {
+                'Gastos': monto.to_numpy(),
+                'GastosPenalizacion': monto.where(es_penalizacion, 0.0).to_numpy(),
+                'CAPEX': monto.where(categoria == 'CAPEX', 0.0).to_numpy(),
+                'OPEX': monto.where(categoria == 'OPEX', 0.0).to_numpy(),
+            }))
+            parts.append(_first_by_project(gastos, 'ID_Gasto').rename('ID_Finanza').to_frame())
+
+        if not riesgos.empty:
+            parts.append(_first_by_project(riesgos, 'ID_Riesgo').rename('ID_Riesgo').to_frame())
+
+        if not parts:
+            return pd.DataFrame(index=pd.Index([], dtype='int64', name='ID_Proyecto'))
+        delta = pd.concat(parts, axis=1)
+        delta.index = delta.index.astype('int64').rename('ID_Proyecto')
+        return delta
+
+    @classmethod
+    def from_tables(cls, tables: Dict[str, pd.DataFrame], distinct: str = 'exact') -> Optional['ProjectAggregates']:
+        """
+        Reconstruir el estado desde las tablas guardadas (utils/project_state_store.py)
+
+        Un estado exacto se puede pasar a 'hll'; uno guardado como sketch no
+        sirve para el modo exacto y devuelve None (se reconstruye).
+        """
+        if distinct == 'hll' and HyperLogLogCounter.TABLE in tables:
+            empleados = HyperLogLogCounter.from_frame(tables[HyperLogLogCounter.TABLE])
+        elif ExactDistinctCounter.TABLE in tables:
+            empleados = ExactDistinctCounter.from_frame(tables[ExactDistinctCounter.TABLE])
+            if distinct == 'hll':
+                pares = empleados.pairs
+                empleados = HyperLogLogCounter()
+                empleados.add(pares['ID_Proyecto'], pares['ID_Empleado'])
+        else:
+            logger.warning(f"El estado guardado no tiene empleados en modo '{distinct}', se reconstruye")
+            return None
+        proyectos = tables['proyectos'].set_index('ID_Proyecto')
+        contratos = tables['contratos'].set_index('ID_Contrato')
+        return cls(proyectos[STATE_COLUMNS], contratos, empleados)
+
+    def to_tables(self) -> Dict[str, pd.DataFrame]:
+        """Tablas planas para guardar el estado"""
+        return {
+            'proyectos': self.proyectos.reset_index(),
+            'contratos': self.contratos.reset_index(),
+            self.empleados.TABLE: self.empleados.to_frame(),
+        }
+
+    def known_projects(self) -> pd.Index:
+        """Proyectos cuyo estado está completo (vistos en la tabla proyectos)"""
+        return self.proyectos.index[self.proyectos['ID_Contrato'].notna()]
+
+    def complete_contracts(self) -> pd.Index:
+        """Contratos con todas sus penalizaciones sumadas"""
+        return self.contratos.index[self.contratos['Completo']]
+
+    def projects_of_contracts(self, contrato_ids) -> pd.Index:
+        """Proyectos del estado que pertenecen a alguno de los contratos"""
+        contrato = self.proyectos['ID_Contrato']
+        return self.proyectos.index[contrato.isin(pd.Index(contrato_ids).astype(float))]
+
+    def employees(self, proyecto_ids) -> np.ndarray:
+        """Empleados distintos por proyecto (estimados en modo 'hll'), alineados con proyecto_ids"""
+        return self.empleados.count(proyecto_ids)
@@ -0,0 +1,81 @@
+"""
+Registro de transformaciones del DW
+
+Cada módulo de transform_dim / transform_fact expone transform(),
+get_dependencies() y get_source_columns(). Aquí se reúnen en el orden
+en que se ejecutan para poder consultar sus declaraciones en conjunto.
+"""
+
+import importlib
+from typing import Dict, List, Optional, Tuple
+import sys
+import os
+
+# Agregar path para imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Tabla del DW -> módulo que la genera (en orden de ejecución).
+# Se importa por ruta completa: los __init__ de los paquetes exportan
+# la función transform() con el nombre del módulo.
+TRANSFORM_MODULES = {
+    'dim_clientes': 'transform.transform_dim.dim_clientes',
+    'dim_empleados': 'transform.transform_dim.dim_empleados',
+    'dim_proyectos': 'transform.transform_dim.dim_proyectos',
+    'dim_tiempo': 'transform.transform_dim.dim_tiempo',
+    'dim_hitos': 'transform.transform_dim.dim_hitos',
+    'dim_tareas': 'transform.transform_dim.dim_tareas',
+    'dim_pruebas': 'transform.transform_dim.dim_pruebas',
+    'dim_finanzas': 'transform.transform_dim.dim_finanzas',
+    'dim_tipo_riesgo': 'transform.transform_dim.dim_tipo_riesgo',
+    'dim_severidad': 'transform.transform_dim.dim_severidad',
+    'dim_riesgos': 'transform.transform_dim.dim_riesgos',
+    'hechos_asignaciones': 'transform.transform_fact.hechos_asignaciones',
+    'hechos_proyectos': 'transform.transform_fact.hechos_proyectos',
+}
+
+TRANSFORMS = {name: importlib.import_module(path) for name, path in TRANSFORM_MODULES.items()}
+
+def get_source_columns(transforms: Optional[List[str]] = None) -> Dict[str, List[str]]:
+    """
+    Unión de las columnas origen que leen las transformaciones (tabla -> columnas)
+
+    Args:
+        transforms: transformaciones a considerar (por defecto todas)
+    """
+    columns = {}
+    for name in transforms or TRANSFORMS:
+        for table_name, table_columns in TRANSFORMS[name].get_source_columns().items():
+            merged = columns.setdefault(table_name, [])
+            merged.extend(c for c in table_columns if c not in merged)
+    return columns
+
+def resolve_targets(targets: List[str]) -> Tuple[List[str], List[str]]:
+    """
+    Recorrer get_dependencies() hacia atrás desde las tablas del DW pedidas
+
+    Args:
+        targets: tablas del DW a construir (p. ej. ['hechos_asignaciones'])
+
+    Returns:
+        (transformaciones necesarias en orden de ejecución, tablas origen necesarias)
+    """
+    unknown = [t for t in targets if t not in TRANSFORMS]
+    if unknown:
+        raise ValueError(f"Tablas del DW desconocidas: {', '.join(unknown)}. "
+                         f"Disponibles: {', '.join(TRANSFORMS)}")
+
+    needed_transforms, source_tables = set(), set()
+    pending = list(targets)
+    while pending:
+        name = pending.pop()
+        if name in needed_transforms:
+            continue
+        needed_transforms.add(name)
+        for dependency in TRANSFORMS[name].get_dependencies():
+            if dependency in TRANSFORMS:
+                pending.append(dependency)
+            else:
+                source_tables.add(dependency)
+
+    transforms = [name for name in TRANSFORMS if name in needed_transforms]
+    return transforms, sorted(source_tables)
@@ -0,0 +1,150 @@
+"""
+Ejecución por shards de hechos_proyectos en varios procesos
+
+Los proyectos se reparten en N shards por hash de ID_Proyecto o por rangos
+contiguos de ID_Proyecto. Cada shard recibe solo sus filas de proyectos,
+hitos, tareas, errores, gastos, riesgos y asignaciones (y los contratos y
+penalizaciones de sus contratos) y pliega su propio estado agregado
+(transform/project_state.py) en un ProcessPoolExecutor. Los estados se
+combinan en el proceso principal, que deriva las métricas y asigna ID_Hecho
+una sola vez: el resultado es el mismo que sin shards.
+"""
+
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+import sys
+import os
+
+import numpy as np
+import pandas as pd
+
+# Agregar path para imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from transform.common import copy_on_write, ensure_df
+from transform.hierarchy import project_keys
+from transform.project_state import ProjectAggregates
+
+logger = logging.getLogger(__name__)
+
+# Clave bajo la que run_transformations publica el número de shards en df_dict
+PROJECT_SHARDS_KEY = '_shards_proyectos'
+
+SHARD_METHODS = ('hash', 'range')
+
+# Tablas que se reparten por el proyecto de cada fila
+PROJECT_TABLES = ('proyectos', 'hitos', 'tareas', 'errores', 'gastos', 'riesgos', 'asignaciones', 'dim_proyectos')
+# Tablas que se reparten por contrato (un contrato puede ir a varios shards)
+CONTRACT_TABLES = ('contratos', 'penalizaciones')
+# Claves que se envían siempre (enlaces de la jerarquía)
+LINK_COLUMNS = ['ID_Proyecto', 'ID_Contrato', 'ID_Hito', 'ID_Tarea']
+# dim_proyectos solo marca los proyectos válidos
+DIM_COLUMNS = {'dim_proyectos': ['ID_Proyecto']}
+
+def get_start_method() -> str:
+    """forkserver si la plataforma lo tiene, si no spawn"""
+    return 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+
+def shard_of(proyecto_ids, shards: int, method: str = 'hash', bounds=None) -> np.ndarray:
+    """
+    Shard (0..shards-1) de cada ID_Proyecto
+
+    Args:
+        proyecto_ids: IDs (NaN = sin proyecto, shard -1)
+        method: 'hash' (reparto uniforme, estable entre ejecuciones) o 'range'
+        bounds: para 'range', primer ID de cada shard a partir del segundo
+    """
+    ids = pd.Series(proyecto_ids).reset_index(drop=True)
+    result = np.full(len(ids), -1, dtype=np.int64)
+    valid = ids.notna().to_numpy()
+    values = ids[valid].astype('int64').to_numpy()
+    if method == 'hash':
+        result[valid] = (pd.util.hash_array(values) % np.uint64(shards)).astype(np.int64)
+    else:
+        result[valid] = np.searchsorted(bounds, values, side='right')
+    return result
+
+def range_bounds(proyecto_ids, shards: int) -> np.ndarray:
+    """Límites de rangos contiguos con el mismo número de proyectos por shard"""
+    ids = np.sort(pd.unique(pd.Series(proyecto_ids).dropna().astype('int64')))
+    return np.array([part[0] for part in np.array_split(ids, shards)[1:] if len(part)], dtype=np.int64)
+
+def split_by_project(df_dict: Dict[str, pd.DataFrame], shards: int, method: str = 'hash',
+                     columns: Optional[Dict[str, List[str]]] = None) -> List[Dict[str, pd.DataFrame]]:
+    """
+    Tablas de cada shard (solo las filas de sus proyectos y de sus contratos)
+
+    Args:
+        columns: columnas que lee el hecho por tabla (get_source_columns); las
+                 demás no se envían a los procesos
+    """
+    if method not in SHARD_METHODS:
+        raise ValueError(f"Reparto desconocido: {method}. Disponibles: {', '.join(SHARD_METHODS)}")
+    proyectos = ensure_df(df_dict.get('proyectos'))
+    bounds = range_bounds(proyectos.get('ID_Proyecto', []), shards) if method == 'range' else None
+
+    parts = [{} for _ in range(shards)]
+    for table_name in PROJECT_TABLES:
+        df = df_dict.get(table_name)
+        if df is None or df.empty:
+            continue
+        keys = project_keys(df_dict, table_name)
+        shard = shard_of(keys, shards, method, bounds)
+        df = _project_columns(df, table_name, columns)
+        for s, part in enumerate(parts):
+            part[table_name] = df[shard == s]
+
+    for table_name in CONTRACT_TABLES:
+        df = df_dict.get(table_name)
+        if df is None or df.empty:
+            continue
+        df = _project_columns(df, table_name, columns)
+        for part in parts:
+            contratos = part.get('proyectos', pd.DataFrame(columns=['ID_Contrato']))['ID_Contrato']
+            part[table_name] = df[df['ID_Contrato'].isin(contratos)]
+    return parts
+
+def _project_columns(df: pd.DataFrame, table_name: str, columns: Optional[Dict[str, List[str]]]) -> pd.DataFrame:
+    """Solo las columnas que lee el hecho más las claves de enlace"""
+    if columns is None:
+        return df
+    columns = {**columns, **DIM_COLUMNS}
+    if table_name not in columns:
+        return df
+    needed = set(columns[table_name]) | set(LINK_COLUMNS)
+    return df[[c for c in df.columns if c in needed]]
+
+def fold_shard(shard_dict: Dict[str, pd.DataFrame], distinct: str = 'exact') -> Dict[str, pd.DataFrame]:
+    """Plegar un shard completo sobre un estado vacío (se ejecuta en un proceso aparte)"""
+    with copy_on_write():
+        estado = ProjectAggregates(distinct=distinct)
+        estado.fold(shard_dict, complete=True)
+        return estado.to_tables()
+
+def fold_sharded(estado: ProjectAggregates, df_dict: Dict[str, pd.DataFrame], shards: int,
+                 method: str = 'hash', columns: Optional[Dict[str, List[str]]] = None) -> ProjectAggregates:
+    """
+    Plegar df_dict (extracción completa de sus proyectos) sobre estado repartiendo
+    los proyectos en shards procesos
+
+    Returns:
+        estado, con los proyectos de df_dict reemplazados por los de los shards
+    """
+    parts = [part for part in split_by_project(df_dict, shards, method, columns) if part]
+    distinct = estado.empleados.MODE
+    logger.info(f"hechos_proyectos: {len(parts)} shards por {method} de ID_Proyecto")
+
+    # forkserver: el proceso principal ya tiene hilos (planificador) y fork no es
+    # seguro; el servidor importa pandas y este módulo una vez para todos los shards.
+    # Donde no existe (Windows) se usa spawn. Con ambos los procesos importan el
+    # script principal: quien llame al ETL debe protegerse con if __name__ == '__main__'
+    context = multiprocessing.get_context(get_start_method())
+    if context.get_start_method() == 'forkserver':
+        context.set_forkserver_preload([__name__])
+    with ProcessPoolExecutor(max_workers=len(parts) or 1, mp_context=context) as executor:
+        futures = [executor.submit(fold_shard, part, distinct) for part in parts]
+        for future in futures:
+            estado.merge(ProjectAggregates.from_tables(future.result(), distinct))
+    return estado
@@ -15,6 +15,12 @@ def get_dependencies():
     """Tablas origen necesarias"""
     return ['clientes', 'contratos']
 
+def get_source_columns():
+    """Columnas de las tablas origen que lee esta transformación"""
+    return {
+        'clientes': ['ID_Cliente'],
+    }
+
 def transform(df_dict: Dict[str, pd.DataFrame]) -> pd.DataFrame:
     # Obtener datos de entrada
     clientes = ensure_df(df_dict.get('clientes', pd.DataFrame()))
@@ -24,13 +30,13 @@ def transform(df_dict: Dict[str, pd.DataFrame]) -> pd.DataFrame:
         return pd.DataFrame(columns=['ID_Cliente', 'CodigoClienteReal'])
     
     # Transformación simple
-    df = clientes.copy()
+    df = clientes[['ID_Cliente']]
     
     # Crear CodigoClienteReal (mapea al ID original del SGP)
     df['CodigoClienteReal'] = df['ID_Cliente']
     
     # Seleccionar SOLO las columnas requeridas para el DW
-    result = df[['ID_Cliente', 'CodigoClienteReal']].copy()
+    result = df[['ID_Cliente', 'CodigoClienteReal']]
     
     # Log del resultado
     log_transform_info('dim_clientes', len(clientes), len(result))
@@ -14,6 +14,12 @@ logger = logging.getLogger(__name__)
 def get_dependencies():
     return ['empleados', 'asignaciones']
 
+def get_source_columns():
+    """Columnas de las tablas origen que lee esta transformación"""
+    return {
+        'empleados': ['ID_Empleado', 'Rol', 'Seniority'],
+    }
+
 def transform(df_dict: Dict[str, pd.DataFrame]) -> pd.DataFrame:
     empleados = ensure_df(df_dict.get('empleados', pd.DataFrame()))
     
@@ -21,7 +27,7 @@ def transform(df_dict: Dict[str, pd.DataFrame]) -> pd.DataFrame:
         logger.warning('dim_empleados: No hay datos de empleados')
         return pd.DataFrame(columns=['ID_Empleado','CodigoEmpleado','Rol','Seniority'])
 
-    df = empleados.copy()
+    df = empleados[['ID_Empleado', 'Rol', 'Seniority']]
     df['CodigoEmpleado'] = df['ID_Empleado']
     
     # Limpiar datos (sin incluir NombreCompleto)
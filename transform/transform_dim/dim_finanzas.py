@@ -1,6 +1,6 @@
 import pandas as pd
 import logging
-from typing import Dict
+from typing import Dict, Iterable, Iterator, Tuple
 import sys
 import os
 
@@ -8,12 +8,74 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
 from transform.common import ensure_df, log_transform_info
+from utils.key_registry import get_key_registry
 
 logger = logging.getLogger(__name__)
 
 def get_dependencies():
     return ['gastos', 'penalizaciones']
 
+def get_source_columns():
+    """Columnas de las tablas origen que lee esta transformación"""
+    return {
+        'gastos': ['ID_Gasto', 'TipoGasto', 'Categoria', 'Monto'],
+        'penalizaciones': ['ID_Penalizacion', 'Monto'],
+    }
+
+FINANZAS_COLUMNS = ['ID_Finanza', 'TipoGasto', 'Categoria', 'Monto']
+
+def _column(df: pd.DataFrame, column: str, default):
+    """Columna como arreglo (sin índice) o el valor por defecto si no existe"""
+    return df[column].to_numpy() if column in df.columns else default
+
+def project_chunk(table_name: str, chunk: pd.DataFrame) -> pd.DataFrame:
+    """
+    Proyectar un lote de gastos o penalizaciones a TipoGasto, Categoria, Monto
+    
+    - gastos: sus propias columnas ('No especificado' si faltan)
+    - penalizaciones: TipoGasto='Penalizaciones', Categoria='OPEX' (gasto operativo)
+    """
+    if table_name == 'gastos':
+        return pd.DataFrame({
+            'TipoGasto': _column(chunk, 'TipoGasto', 'No especificado'),
+            'Categoria': _column(chunk, 'Categoria', 'No especificado'),
+            'Monto': _column(chunk, 'Monto', 0),
+        }, index=pd.RangeIndex(len(chunk)))
+    return pd.DataFrame({
+        'TipoGasto': 'Penalizaciones',
+        'Categoria': 'OPEX',
+        'Monto': _column(chunk, 'Monto', 0),
+    }, index=pd.RangeIndex(len(chunk)))
+
+def transform_chunks(chunks: Iterable[Tuple[str, pd.DataFrame]]) -> Iterator[pd.DataFrame]:
+    """
+    Construir dim_finanzas en streaming a partir de lotes (tabla, DataFrame),
+    p. ej. los de extract_gestion.stream_all(). Los lotes de otras tablas se
+    ignoran. ID_Finanza sale del registro de claves subrogadas (clave natural
+    'gastos:<ID_Gasto>' / 'penalizaciones:<ID_Penalizacion>'), así que es el
+    mismo en streaming, en transform() y entre ejecuciones.
+    
+    Yields:
+        lotes de dim_finanzas ya limpios
+    """
+    registry = get_key_registry()
+    for table_name, chunk in chunks:
+        if table_name not in ('gastos', 'penalizaciones') or chunk is None or chunk.empty:
+            continue
+        
+        result = project_chunk(table_name, chunk)
+        
+        # ID estable por gasto / penalización
+        id_column = 'ID_Gasto' if table_name == 'gastos' else 'ID_Penalizacion'
+        natural_keys = f'{table_name}:' + chunk[id_column].astype(str).reset_index(drop=True)
+        result.insert(0, 'ID_Finanza', registry.assign('dim_finanzas', natural_keys))
+        
+        # Limpiar datos
+        result['TipoGasto'] = result['TipoGasto'].astype(str).str.strip()
+        result['Categoria'] = result['Categoria'].astype(str).str.strip()
+        result['Monto'] = pd.to_numeric(result['Monto'], errors='coerce').astype(float).fillna(0)
+        yield result
+
 def transform(df_dict: Dict[str, pd.DataFrame]) -> pd.DataFrame:
     """
     Combina:
@@ -23,43 +85,17 @@ def transform(df_dict: Dict[str, pd.DataFrame]) -> pd.DataFrame:
     gastos = ensure_df(df_dict.get('gastos', pd.DataFrame()))
     penalizaciones = ensure_df(df_dict.get('penalizaciones', pd.DataFrame()))
     
-    finanzas_data = []
-    
-    # Procesar gastos regulares
-    if not gastos.empty:
-        for _, row in gastos.iterrows():
-            finanzas_data.append({
-                'TipoGasto': row.get('TipoGasto', 'No especificado'),
-                'Categoria': row.get('Categoria', 'No especificado'),
-                'Monto': float(row.get('Monto', 0))
-            })
-    
-    # Procesar penalizaciones como tipo de gasto especial
-    if not penalizaciones.empty:
-        for _, row in penalizaciones.iterrows():
-            finanzas_data.append({
-                'TipoGasto': 'Penalizaciones',
-                'Categoria': 'OPEX',  # Las penalizaciones son gastos operativos
-                'Monto': float(row.get('Monto', 0))
-            })
+    partes = list(transform_chunks([('gastos', gastos), ('penalizaciones', penalizaciones)]))
     
     # Crear DataFrame resultado
-    if not finanzas_data:
+    if not partes:
         logger.warning('dim_finanzas: No hay datos financieros para procesar')
-        return pd.DataFrame(columns=['ID_Finanza', 'TipoGasto', 'Categoria', 'Monto'])
-    
-    result = pd.DataFrame(finanzas_data)
-    
-    # Agregar ID secuencial
-    result.insert(0, 'ID_Finanza', range(1, len(result) + 1))
+        return pd.DataFrame(columns=FINANZAS_COLUMNS)
     
-    # Limpiar datos
-    result['TipoGasto'] = result['TipoGasto'].astype(str).str.strip()
-    result['Categoria'] = result['Categoria'].astype(str).str.strip()
-    result['Monto'] = pd.to_numeric(result['Monto'], errors='coerce').fillna(0)
+    result = pd.concat(partes, ignore_index=True)
     
     # Log del resultado
     total_input = len(gastos) + len(penalizaciones)
     log_transform_info('dim_finanzas', total_input, len(result))
     
-    return result
\ No newline at end of file
+    return result
@@ -8,58 +8,48 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
 from transform.common import ensure_df, log_transform_info
+from transform.date_keys import get_date_key_resolver
 
 logger = logging.getLogger(__name__)
 
 def get_dependencies():
-    return ['hitos', 'proyectos']
+    return ['hitos', 'proyectos', 'dim_tiempo']
+
+def get_source_columns():
+    """Columnas de las tablas origen que lee esta transformación"""
+    return {
+        'hitos': ['ID_Hito', 'ID_Proyecto', 'FechaInicio', 'FechaFinPlanificada', 'FechaFinReal'],
+    }
 
 def transform(df_dict: Dict[str, pd.DataFrame]) -> pd.DataFrame:
     hitos = ensure_df(df_dict.get('hitos', pd.DataFrame()))
+    dim_tiempo = ensure_df(df_dict.get('dim_tiempo', pd.DataFrame()))
     
     if hitos.empty:
         logger.warning('dim_hitos: No hay datos de hitos')
         return pd.DataFrame(columns=['ID_Hito','CodigoHito','ID_Proyecto','ID_FechaInicio','ID_FechaFinalizacion','Retraso_days'])
 
-    df = hitos.copy()
+    df = hitos[['ID_Hito', 'ID_Proyecto', 'FechaInicio']]
     df['CodigoHito'] = df['ID_Hito']
     
-    # Función para convertir fecha a ID de dim_tiempo
-    def fecha_to_tiempo_id(fecha_str):
-        if pd.isna(fecha_str) or str(fecha_str) == 'None':
-            return None
-        try:
-            fecha = pd.to_datetime(fecha_str)
-            # Generar ID basado en días desde 2019-01-01 (fecha base de dim_tiempo)
-            base_date = pd.to_datetime('2019-01-01')
-            days_diff = (fecha - base_date).days + 1
-            return max(1, days_diff) if days_diff > 0 else 1
-        except:
-            return 1  # Default al primer ID de tiempo
-    
-    # Mapear fechas a IDs de dim_tiempo
-    df['ID_FechaInicio'] = df['FechaInicio'].apply(fecha_to_tiempo_id)
-    df['ID_FechaFinalizacion'] = df['FechaFinReal'].apply(fecha_to_tiempo_id)
+    # Las fechas llegan como datetime64 desde la extracción (extract/schema.py);
+    # se parsean una sola vez por columna
+    fecha_fin_real = pd.to_datetime(hitos['FechaFinReal'], errors='coerce')
+    fecha_fin_planificada = pd.to_datetime(hitos['FechaFinPlanificada'], errors='coerce')
     
-    # Calcular retraso: FechaFinReal - FechaFinPlanificada
-    def calcular_retraso(fecha_real, fecha_planificada):
-        """Calcula días de retraso entre fecha real y planificada"""
-        try:
-            if pd.isna(fecha_real) or pd.isna(fecha_planificada):
-                return 0
-            real = pd.to_datetime(fecha_real)
-            planificada = pd.to_datetime(fecha_planificada)
-            return (real - planificada).days
-        except:
-            return 0
+    # Mapear fechas a IDs de dim_tiempo (nulo si no hay fecha)
+    if dim_tiempo.empty:
+        logger.warning('dim_hitos: dim_tiempo vacía, fechas sin ID_Tiempo')
+    resolver = get_date_key_resolver(dim_tiempo)
+    df['ID_FechaInicio'] = resolver.resolve(df['FechaInicio'], missing=None)
+    df['ID_FechaFinalizacion'] = resolver.resolve(fecha_fin_real, missing=None)
     
-    df['Retraso_days'] = df.apply(
-        lambda row: calcular_retraso(row['FechaFinReal'], row['FechaFinPlanificada']), 
-        axis=1
-    )
+    # Calcular retraso: FechaFinReal - FechaFinPlanificada (0 si falta alguna fecha)
+    con_fechas = fecha_fin_real.notna() & fecha_fin_planificada.notna()
+    df['Retraso_days'] = (fecha_fin_real - fecha_fin_planificada).dt.days.where(con_fechas, 0).astype(int)
 
     # Seleccionar columnas finales para el DW
-    result = df[['ID_Hito','CodigoHito','ID_Proyecto','ID_FechaInicio','ID_FechaFinalizacion','Retraso_days']].copy()
+    result = df[['ID_Hito','CodigoHito','ID_Proyecto','ID_FechaInicio','ID_FechaFinalizacion','Retraso_days']]
     
     # Renombrar la columna para que coincida con el esquema del DW
     result = result.rename(columns={'ID_Proyecto': 'ID_proyectos'})
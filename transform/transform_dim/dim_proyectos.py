@@ -14,6 +14,13 @@ logger = logging.getLogger(__name__)
 def get_dependencies():
     return ['proyectos', 'contratos', 'clientes']  # Agregar clientes para validar FK
 
+def get_source_columns():
+    """Columnas de las tablas origen que lee esta transformación"""
+    return {
+        'proyectos': ['ID_Proyecto', 'Version', 'EstadoProyecto', 'ID_Cliente'],
+        'clientes': ['ID_Cliente'],
+    }
+
 def transform(df_dict: Dict[str, pd.DataFrame]) -> pd.DataFrame:
     proyectos = ensure_df(df_dict.get('proyectos', pd.DataFrame()))
     clientes = ensure_df(df_dict.get('clientes', pd.DataFrame()))
@@ -22,12 +29,12 @@ def transform(df_dict: Dict[str, pd.DataFrame]) -> pd.DataFrame:
         logger.warning('dim_proyectos: No hay datos de proyectos')
         return pd.DataFrame(columns=['ID_Proyecto','CodigoProyecto','Version','Cancelado','ID_Cliente'])
 
-    df = proyectos.copy()
+    df = proyectos[['ID_Proyecto', 'Version', 'ID_Cliente']]
     df['CodigoProyecto'] = df['ID_Proyecto']
     
     # Determinar si está cancelado
-    if 'EstadoProyecto' in df.columns:
-        df['Cancelado'] = df['EstadoProyecto'].apply(lambda x: 1 if str(x).upper() == 'CANCELADO' else 0)
+    if 'EstadoProyecto' in proyectos.columns:
+        df['Cancelado'] = proyectos['EstadoProyecto'].apply(lambda x: 1 if str(x).upper() == 'CANCELADO' else 0)
     else:
         df['Cancelado'] = 0
     
@@ -41,6 +48,6 @@ def transform(df_dict: Dict[str, pd.DataFrame]) -> pd.DataFrame:
         if len(df) < len(proyectos):
             logger.info(f'dim_proyectos: Filtrados {len(proyectos) - len(df)} proyectos con clientes inexistentes')
 
-    result = df[['ID_Proyecto','CodigoProyecto','Version','Cancelado','ID_Cliente']].copy()
+    result = df[['ID_Proyecto','CodigoProyecto','Version','Cancelado','ID_Cliente']]
     log_transform_info('dim_proyectos', len(proyectos), len(result))
     return result
@@ -14,6 +14,13 @@ logger = logging.getLogger(__name__)
 def get_dependencies():
     return ['pruebas', 'hitos']
 
+def get_source_columns():
+    """Columnas de las tablas origen que lee esta transformación"""
+    return {
+        'pruebas': ['ID_Prueba', 'ID_Hito', 'TipoPrueba', 'Exitosa'],
+        'hitos': ['ID_Hito'],
+    }
+
 def transform(df_dict: Dict[str, pd.DataFrame]) -> pd.DataFrame:
     pruebas = ensure_df(df_dict.get('pruebas', pd.DataFrame()))
     hitos = ensure_df(df_dict.get('hitos', pd.DataFrame()))
@@ -22,7 +29,7 @@ def transform(df_dict: Dict[str, pd.DataFrame]) -> pd.DataFrame:
         logger.warning('dim_pruebas: No hay datos de pruebas')
         return pd.DataFrame(columns=['ID_Prueba','CodigoPrueba','ID_Hito','TipoPrueba','PruebaExitosa'])
 
-    df = pruebas.copy()
+    df = pruebas[['ID_Prueba', 'ID_Hito', 'TipoPrueba', 'Exitosa']]
     df['CodigoPrueba'] = df['ID_Prueba']
     
     # Normalizar resultado de prueba
@@ -8,23 +8,18 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
 from transform.common import ensure_df, log_transform_info
+from utils.key_registry import get_key_registry
 
 logger = logging.getLogger(__name__)
 
 def get_dependencies():
     return ['riesgos']
 
-def create_mapping_dictionaries(riesgos_df: pd.DataFrame) -> tuple:
-    """Crea diccionarios de mapeo para tipos y severidades"""
-    # Mapeo tipos de riesgo
-    tipos_unicos = riesgos_df['TipoRiesgo'].dropna().unique()
-    tipo_map = {tipo: idx + 1 for idx, tipo in enumerate(tipos_unicos)}
-    
-    # Mapeo severidades
-    severidades_unicas = riesgos_df['Severidad'].dropna().unique()
-    severidad_map = {sev: idx + 1 for idx, sev in enumerate(severidades_unicas)}
-    
-    return tipo_map, severidad_map
+def get_source_columns():
+    """Columnas de las tablas origen que lee esta transformación"""
+    return {
+        'riesgos': ['ID_Riesgo', 'TipoRiesgo', 'Severidad'],
+    }
 
 def transform(df_dict: Dict[str, pd.DataFrame]) -> pd.DataFrame:
     """Transformación para dim_riesgos"""
@@ -34,14 +29,13 @@ def transform(df_dict: Dict[str, pd.DataFrame]) -> pd.DataFrame:
         logger.warning('dim_riesgos: No hay datos de riesgos')
         return pd.DataFrame(columns=['ID_Riesgo', 'ID_TipoRiesgo', 'ID_Severidad'])
 
-    # Crear mapeos
-    tipo_map, severidad_map = create_mapping_dictionaries(riesgos)
-    
-    df = riesgos.copy()
+    df = riesgos[['ID_Riesgo']]
     
-    # Mapear tipos y severidades a IDs
-    df['ID_TipoRiesgo'] = df['TipoRiesgo'].map(tipo_map).fillna(0).astype(int)
-    df['ID_Severidad'] = df['Severidad'].map(severidad_map).fillna(0).astype(int)
+    # Mapear tipos y severidades a los mismos IDs que dim_tipo_riesgo / dim_severidad
+    # (registro de claves subrogadas; 0 si el valor es nulo)
+    registry = get_key_registry()
+    df['ID_TipoRiesgo'] = registry.assign('dim_tipo_riesgo', riesgos['TipoRiesgo'])
+    df['ID_Severidad'] = registry.assign('dim_severidad', riesgos['Severidad'])
     
     # Seleccionar columnas finales
     result = df[['ID_Riesgo', 'ID_TipoRiesgo', 'ID_Severidad']]
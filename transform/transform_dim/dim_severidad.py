@@ -8,12 +8,19 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
 from transform.common import ensure_df, log_transform_info
+from utils.key_registry import get_key_registry
 
 logger = logging.getLogger(__name__)
 
 def get_dependencies():
     return ['riesgos']
 
+def get_source_columns():
+    """Columnas de las tablas origen que lee esta transformación"""
+    return {
+        'riesgos': ['Severidad'],
+    }
+
 def transform(df_dict: Dict[str, pd.DataFrame]) -> pd.DataFrame:
     riesgos = ensure_df(df_dict.get('riesgos', pd.DataFrame()))
     
@@ -30,7 +37,7 @@ def transform(df_dict: Dict[str, pd.DataFrame]) -> pd.DataFrame:
     
     # Crear dimensión
     result = pd.DataFrame({
-        'ID_Severidad': range(1, len(niveles_unicos) + 1),
+        'ID_Severidad': get_key_registry().assign('dim_severidad', niveles_unicos),
         'Nivel': niveles_unicos
     })
     
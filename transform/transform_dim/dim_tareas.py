@@ -14,6 +14,12 @@ logger = logging.getLogger(__name__)
 def get_dependencies():
     return ['tareas', 'hitos']
 
+def get_source_columns():
+    """Columnas de las tablas origen que lee esta transformación"""
+    return {
+        'tareas': ['ID_Tarea', 'ID_Hito', 'DuracionPlanificada', 'DuracionReal'],
+    }
+
 def transform(df_dict: Dict[str, pd.DataFrame]) -> pd.DataFrame:
     tareas = ensure_df(df_dict.get('tareas', pd.DataFrame()))
     
@@ -21,15 +27,15 @@ def transform(df_dict: Dict[str, pd.DataFrame]) -> pd.DataFrame:
         logger.warning('dim_tareas: No hay datos de tareas')
         return pd.DataFrame(columns=['ID_Tarea','CodigoTarea','ID_Hito','DuracionDias','RetrasoDias'])
 
-    df = tareas.copy()
+    df = tareas[['ID_Tarea', 'ID_Hito']]
     df['CodigoTarea'] = df['ID_Tarea']
     
     # DuracionDias = DuracionReal del SGP
-    df['DuracionDias'] = pd.to_numeric(df['DuracionReal'], errors='coerce').fillna(0).astype(int)
+    duracion_real = pd.to_numeric(tareas['DuracionReal'], errors='coerce').fillna(0)
+    df['DuracionDias'] = duracion_real.astype(int)
     
     # RetrasoDias = DuracionReal - DuracionPlanificada
-    duracion_real = pd.to_numeric(df['DuracionReal'], errors='coerce').fillna(0)
-    duracion_planificada = pd.to_numeric(df['DuracionPlanificada'], errors='coerce').fillna(0)
+    duracion_planificada = pd.to_numeric(tareas['DuracionPlanificada'], errors='coerce').fillna(0)
     df['RetrasoDias'] = (duracion_real - duracion_planificada).astype(int)
 
     result = df[['ID_Tarea','CodigoTarea','ID_Hito','DuracionDias','RetrasoDias']]
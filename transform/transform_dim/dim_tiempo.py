@@ -1,7 +1,7 @@
 import pandas as pd
+import numpy as np
 import logging
-from typing import Dict
-from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
 import sys
 import os
 
@@ -9,12 +9,23 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
 from transform.common import ensure_df, log_transform_info
+from utils.calendar_store import CalendarStore, CALENDAR_KEY
 
 logger = logging.getLogger(__name__)
 
 def get_dependencies():
     return ['proyectos', 'hitos', 'asignaciones', 'gastos', 'penalizaciones']
 
+def get_source_columns():
+    """Columnas de las tablas origen que lee esta transformación"""
+    return {
+        'proyectos': ['FechaInicio', 'FechaFin'],
+        'hitos': ['FechaInicio', 'FechaFinPlanificada', 'FechaFinReal'],
+        'asignaciones': ['FechaAsignacion'],
+        'gastos': ['Fecha'],
+        'penalizaciones': ['Fecha'],
+    }
+
 def create_subdimensions():
     """Crear subdimensiones de tiempo"""
     # Días de la semana
@@ -37,107 +48,85 @@ def create_subdimensions():
     
     return dias_semana, meses, anios
 
-def extract_dates_from_data(df_dict: Dict[str, pd.DataFrame]) -> list:
-    fechas = set()
-    
-    # Proyectos
-    proyectos = df_dict.get('proyectos', pd.DataFrame())
-    if not proyectos.empty:
-        for col in ['FechaInicio', 'FechaFin']:
-            if col in proyectos.columns:
-                fechas.update(proyectos[col].dropna().tolist())
-    
-    # Hitos
-    hitos = df_dict.get('hitos', pd.DataFrame())
-    if not hitos.empty:
-        for col in ['FechaInicio', 'FechaFinPlanificada', 'FechaFinReal']:
-            if col in hitos.columns:
-                fechas.update(hitos[col].dropna().tolist())
-    
-    # Asignaciones
-    asignaciones = df_dict.get('asignaciones', pd.DataFrame())
-    if not asignaciones.empty and 'FechaAsignacion' in asignaciones.columns:
-        fechas.update(asignaciones['FechaAsignacion'].dropna().tolist())
-    
-    # Gastos
-    gastos = df_dict.get('gastos', pd.DataFrame())
-    if not gastos.empty and 'Fecha' in gastos.columns:
-        fechas.update(gastos['Fecha'].dropna().tolist())
-    
-    # Penalizaciones  
-    penalizaciones = df_dict.get('penalizaciones', pd.DataFrame())
-    if not penalizaciones.empty and 'Fecha' in penalizaciones.columns:
-        fechas.update(penalizaciones['Fecha'].dropna().tolist())
+# Rango mínimo del calendario (cubre todo el SGP)
+CALENDAR_START = pd.Timestamp('2019-01-01')
+CALENDAR_END = pd.Timestamp('2025-12-31')
+
+def get_data_date_range(df_dict: Dict[str, pd.DataFrame]) -> Optional[Tuple[pd.Timestamp, pd.Timestamp]]:
+    """Fecha mínima y máxima de los datos (None si no hay fechas)"""
+    # Columnas de fecha por tabla (ya tipadas como datetime64 en la extracción)
+    columnas_fecha = {
+        'proyectos': ['FechaInicio', 'FechaFin'],
+        'hitos': ['FechaInicio', 'FechaFinPlanificada', 'FechaFinReal'],
+        'asignaciones': ['FechaAsignacion'],
+        'gastos': ['Fecha'],
+        'penalizaciones': ['Fecha'],
+    }
     
-    # Filtrar fechas válidas y convertir
-    fechas_validas = []
-    for fecha in fechas:
-        try:
-            if isinstance(fecha, str):
-                fecha_dt = pd.to_datetime(fecha)
-            else:
-                fecha_dt = pd.to_datetime(fecha)
-            fechas_validas.append(fecha_dt.date())
-        except:
+    minimos, maximos = [], []
+    for table_name, columnas in columnas_fecha.items():
+        df = df_dict.get(table_name, pd.DataFrame())
+        if df.empty:
             continue
+        for col in columnas:
+            if col in df.columns:
+                # No-op si ya es datetime64
+                fechas = pd.to_datetime(df[col], errors='coerce')
+                if fechas.notna().any():
+                    minimos.append(fechas.min())
+                    maximos.append(fechas.max())
     
-    return sorted(list(set(fechas_validas)))
+    if not minimos:
+        return None
+    return min(minimos).normalize(), max(maximos).normalize()
+
+def build_calendar(fechas: pd.DatetimeIndex, first_id: int) -> pd.DataFrame:
+    """Filas de dim_tiempo para fechas, con ID_Tiempo consecutivos desde first_id"""
+    return pd.DataFrame({
+        'ID_Tiempo': np.arange(first_id, first_id + len(fechas), dtype=np.int64),
+        'Fecha': fechas.date,
+        'ID_DiaSemana': (fechas.weekday + 1).astype(np.int64),  # 1=Lunes, 7=Domingo
+        'ID_Mes': fechas.month.astype(np.int64),
+        # Mapear años correctamente (2019=1, 2020=2, etc.)
+        'ID_Anio': (fechas.year - 2018).astype(np.int64),
+    })
 
 def transform(df_dict: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+    """
+    Calendario persistente (utils/calendar_store.py): se genera la primera vez
+    y después solo se extiende con los días que quedan fuera del rango guardado.
+    Siempre devuelve el calendario completo para que los hechos resuelvan
+    cualquier fecha; el loader inserta únicamente los ID_Tiempo nuevos.
+    El calendario es el publicado por run_transformations (uno por origen/DW).
+    """
+    store = df_dict.get(CALENDAR_KEY) or CalendarStore()
+    calendario = store.load()
     
-    # Extraer fechas de los datos
-    fechas_encontradas = extract_dates_from_data(df_dict)
-    
-    if not fechas_encontradas:
+    # Rango necesario: el de los datos, ampliado al menos a 2019-2025
+    rango = get_data_date_range(df_dict)
+    if rango is None:
         logger.warning('dim_tiempo: No se encontraron fechas en los datos')
-        # Crear rango desde 2019 hasta actualidad para cubrir todo el SGP
-        start_date = datetime(2019, 1, 1).date()
-        end_date = datetime(2025, 12, 31).date()
-        fechas_rango = []
-        current_date = start_date
-        while current_date <= end_date:
-            fechas_rango.append(current_date)
-            current_date += timedelta(days=1)
-        fechas_encontradas = fechas_rango
+        inicio, fin = CALENDAR_START, CALENDAR_END
     else:
-        # Si encontramos fechas, expandir el rango para asegurar cobertura completa
-        min_fecha = min(fechas_encontradas)
-        max_fecha = max(fechas_encontradas)
-        
-        # Expandir hacia atrás hasta 2019 si es necesario
-        start_expand = datetime(2019, 1, 1).date()
-        if min_fecha > start_expand:
-            min_fecha = start_expand
-            
-        # Expandir hacia adelante hasta 2025 si es necesario  
-        end_expand = datetime(2025, 12, 31).date()
-        if max_fecha < end_expand:
-            max_fecha = end_expand
-        
-        # Generar rango completo de fechas
-        fechas_completas = []
-        current_date = min_fecha
-        while current_date <= max_fecha:
-            fechas_completas.append(current_date)
-            current_date += timedelta(days=1)
-        fechas_encontradas = sorted(fechas_completas)
+        inicio, fin = min(rango[0], CALENDAR_START), max(rango[1], CALENDAR_END)
     
-    logger.info(f'dim_tiempo: Generando {len(fechas_encontradas)} fechas desde {fechas_encontradas[0]} hasta {fechas_encontradas[-1]}')
+    if calendario is None or calendario.empty:
+        nuevas = pd.date_range(inicio, fin, freq='D')
+        calendario = build_calendar(nuevas, 1)
+    else:
+        fechas = pd.to_datetime(calendario['Fecha'])
+        un_dia = pd.Timedelta(days=1)
+        nuevas = pd.date_range(inicio, fechas.min() - un_dia, freq='D').append(
+            pd.date_range(fechas.max() + un_dia, fin, freq='D'))
+        if len(nuevas) == 0:
+            logger.info(f'dim_tiempo: calendario sin cambios ({len(calendario)} días)')
+            log_transform_info('dim_tiempo', 0, len(calendario))
+            return calendario
+        calendario = pd.concat([calendario, build_calendar(nuevas, int(calendario['ID_Tiempo'].max()) + 1)],
+                               ignore_index=True)
     
-    # Crear dimensión tiempo
-    dim_tiempo = []
-    for i, fecha in enumerate(fechas_encontradas, 1):
-        # Mapear años correctamente (2019=1, 2020=2, etc.)
-        year_id = fecha.year - 2018  # 2019->1, 2020->2, 2021->3...
-        
-        dim_tiempo.append({
-            'ID_Tiempo': i,
-            'Fecha': fecha,
-            'ID_DiaSemana': fecha.weekday() + 1,  # 1=Lunes, 7=Domingo
-            'ID_Mes': fecha.month,
-            'ID_Anio': year_id
-        })
+    logger.info(f'dim_tiempo: Generando {len(nuevas)} fechas desde {nuevas.min().date()} hasta {nuevas.max().date()}')
+    store.save(calendario)
     
-    result = pd.DataFrame(dim_tiempo)
-    log_transform_info('dim_tiempo', len(fechas_encontradas), len(result))
-    return result
\ No newline at end of file
+    log_transform_info('dim_tiempo', len(nuevas), len(calendario))
+    return calendario
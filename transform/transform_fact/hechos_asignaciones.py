@@ -1,6 +1,9 @@
 import pandas as pd
+import numpy as np
 import logging
-from typing import Dict
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Iterator, Optional, Tuple
 import sys
 import os
 
@@ -8,13 +11,144 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
 from transform.common import ensure_df, log_transform_info
+from transform.date_keys import DateKeyResolver, get_date_key_resolver
+from utils.key_registry import get_key_registry
 
 logger = logging.getLogger(__name__)
 
 def get_dependencies():
-    return ['asignaciones', 'empleados', 'proyectos']
+    return ['asignaciones', 'empleados', 'proyectos', 'dim_tiempo']
 
-def transform(df_dict: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+def get_source_columns():
+    """Columnas de las tablas origen que lee esta transformación"""
+    return {
+        'asignaciones': ['ID_Asignacion', 'ID_Empleado', 'ID_Proyecto', 'FechaAsignacion', 'HorasPlanificadas', 'HorasReales'],
+        'empleados': ['ID_Empleado', 'CostoPorHora'],
+    }
+
+FACT_COLUMNS = ['ID_HechoAsignacion', 'ID_Empleado', 'ID_Proyecto', 'ID_FechaAsignacion',
+                'HorasPlanificadas', 'HorasReales', 'ValorHoras']
+
+# Filas de asignaciones por lote: las columnas temporales de un lote no dependen
+# del tamaño de la tabla
+DEFAULT_CHUNK_SIZE = 50000
+
+# Clave bajo la que run_transformations publica (filas por lote, hilos) en df_dict
+CHUNKS_KEY = '_lotes_asignaciones'
+
+def build_chunk(chunk: pd.DataFrame, ids: np.ndarray, resolver: DateKeyResolver,
+                costos: pd.Series) -> pd.DataFrame:
+    """
+    Filas de hechos de un lote de asignaciones (no depende de los demás lotes)
+    
+    Args:
+        chunk: lote de asignaciones
+        ids: ID_HechoAsignacion ya asignados, alineados con chunk
+        resolver: fechas -> ID_Tiempo (ID 0 si la fecha no está en dim_tiempo)
+        costos: CostoPorHora indexado por ID_Empleado (vacío = ValorHoras 0)
+    """
+    # HorasPlanificadas y HorasReales: Extraídas directamente del SGP
+    horas_reales = pd.to_numeric(chunk['HorasReales'], errors='coerce').fillna(0).to_numpy()
+    
+    # ValorHoras: CostoPorHora × HorasReales
+    if len(costos):
+        pos = costos.index.get_indexer(chunk['ID_Empleado'])
+        costo = np.where(pos >= 0, costos.to_numpy()[pos], 0.0)
+        valor_horas = horas_reales * np.nan_to_num(costo)
+    else:
+        valor_horas = 0
+    
+    return pd.DataFrame({
+        'ID_HechoAsignacion': ids,
+        'ID_Empleado': chunk['ID_Empleado'].to_numpy(),
+        'ID_Proyecto': chunk['ID_Proyecto'].to_numpy(),
+        'ID_FechaAsignacion': resolver.resolve(chunk['FechaAsignacion'], missing=0),
+        'HorasPlanificadas': pd.to_numeric(chunk['HorasPlanificadas'], errors='coerce').fillna(0).to_numpy(),
+        'HorasReales': horas_reales,
+        'ValorHoras': valor_horas,
+    }, index=pd.RangeIndex(len(chunk)))
+
+def transform_chunks(chunks: Iterable[Tuple[str, pd.DataFrame]], empleados: pd.DataFrame,
+                     dim_tiempo: pd.DataFrame, workers: int = 1) -> Iterator[pd.DataFrame]:
+    """
+    Construir hechos_asignaciones en lotes a partir de (tabla, DataFrame),
+    p. ej. los de extract_gestion.stream_all(). Los lotes de otras tablas se
+    ignoran; empleados y dim_tiempo (pequeñas) se pasan completas.
+    
+    ID_HechoAsignacion sale del registro de claves subrogadas: cada lote
+    reserva de una vez el bloque consecutivo de IDs de sus asignaciones
+    nuevas, en el orden de los lotes, y después el lote se construye sin
+    depender de los demás. Con workers > 1 se construyen hasta workers lotes
+    a la vez; la memoria depende del tamaño de lote y no del de la tabla.
+    
+    Yields:
+        lotes de hechos_asignaciones, en el orden de entrada
+    """
+    registry = get_key_registry()
+    empleados = ensure_df(empleados)
+    resolver = get_date_key_resolver(ensure_df(dim_tiempo))
+    if not len(resolver):
+        logger.warning('hechos_asignaciones: dim_tiempo vacía, usando 0 como ID_FechaAsignacion')
+    
+    # Costo por hora por empleado (una vez para todos los lotes)
+    costos = pd.Series(dtype=float)
+    if not empleados.empty and 'CostoPorHora' in empleados.columns:
+        costos = pd.to_numeric(empleados['CostoPorHora'], errors='coerce').astype(float)
+        costos.index = pd.Index(empleados['ID_Empleado'])
+        costos = costos[~costos.index.duplicated(keep='last')]
+    else:
+        logger.warning('hechos_asignaciones: No se pudo calcular ValorHoras')
+    
+    def lotes():
+        for table_name, chunk in chunks:
+            if table_name != 'asignaciones' or chunk is None or chunk.empty:
+                continue
+            yield chunk, registry.assign('hechos_asignaciones', chunk['ID_Asignacion'])
+    
+    fechas_no_encontradas = 0
+    if workers <= 1:
+        for chunk, ids in lotes():
+            result = build_chunk(chunk, ids, resolver, costos)
+            fechas_no_encontradas += int((result['ID_FechaAsignacion'] == 0).sum())
+            yield result
+    else:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='hechos_asignaciones') as executor:
+            pendientes = deque()
+            for chunk, ids in lotes():
+                pendientes.append(executor.submit(build_chunk, chunk, ids, resolver, costos))
+                if len(pendientes) >= workers:
+                    result = pendientes.popleft().result()
+                    fechas_no_encontradas += int((result['ID_FechaAsignacion'] == 0).sum())
+                    yield result
+            while pendientes:
+                result = pendientes.popleft().result()
+                fechas_no_encontradas += int((result['ID_FechaAsignacion'] == 0).sum())
+                yield result
+    
+    # Fechas no encontradas (0 = sin fecha en dim_tiempo)
+    if fechas_no_encontradas > 0 and len(resolver):
+        logger.warning(f'hechos_asignaciones: {fechas_no_encontradas} fechas no encontradas en dim_tiempo')
+
+def iter_chunks(df: pd.DataFrame, chunk_size: int) -> Iterator[pd.DataFrame]:
+    """Lotes consecutivos de como máximo chunk_size filas (vistas, sin copiar)"""
+    for start in range(0, len(df), chunk_size):
+        yield df.iloc[start:start + chunk_size]
+
+def transform(df_dict: Dict[str, pd.DataFrame], chunk_size: Optional[int] = None,
+              workers: Optional[int] = None) -> pd.DataFrame:
+    """
+    Hechos de asignaciones (horas planificadas/reales y su valor)
+    
+    La tabla se recorre en lotes (transform_chunks) y cada lote se copia a las
+    columnas del resultado, reservadas una vez: además de la entrada y la salida
+    solo se mantienen en memoria los lotes en construcción.
+    
+    Args:
+        df_dict: tablas de entrada
+        chunk_size: filas por lote (None = las publicadas por run_transformations
+                    o DEFAULT_CHUNK_SIZE)
+        workers: lotes construidos en paralelo (None = los publicados o 1)
+    """
     # Obtener datos de entrada
     asignaciones = ensure_df(df_dict.get('asignaciones', pd.DataFrame()))
     empleados = ensure_df(df_dict.get('empleados', pd.DataFrame()))
@@ -22,59 +156,29 @@ def transform(df_dict: Dict[str, pd.DataFrame]) -> pd.DataFrame:
     
     if asignaciones.empty:
         logger.warning('hechos_asignaciones: No hay datos de asignaciones')
-        return pd.DataFrame(columns=[
-            'ID_HechoAsignacion', 'ID_Empleado', 'ID_Proyecto', 'ID_FechaAsignacion', 
-            'HorasPlanificadas', 'HorasReales', 'ValorHoras'
-        ])
-    
-    # Trabajar con copia
-    df = asignaciones.copy()
-    
-    # ID_HechoAsignacion: ID generado secuencial
-    df['ID_HechoAsignacion'] = range(1, len(df) + 1)
-    
-    # ID_FechaAsignacion: Mapear fecha a ID de dim_tiempo
-    if not dim_tiempo.empty:
-        # Convertir fechas a formato date para mapeo
-        df['FechaAsignacion_date'] = pd.to_datetime(df['FechaAsignacion'], errors='coerce').dt.date
-        dim_tiempo['Fecha_date'] = pd.to_datetime(dim_tiempo['Fecha'], errors='coerce').dt.date
-        
-        # Crear mapeo fecha -> ID_Tiempo
-        fecha_tiempo_map = dim_tiempo.set_index('Fecha_date')['ID_Tiempo'].to_dict()
-        df['ID_FechaAsignacion'] = df['FechaAsignacion_date'].map(fecha_tiempo_map)
-        
-        # Manejar fechas no encontradas
-        fechas_no_encontradas = df['ID_FechaAsignacion'].isna().sum()
-        if fechas_no_encontradas > 0:
-            logger.warning(f'hechos_asignaciones: {fechas_no_encontradas} fechas no encontradas en dim_tiempo')
-            df['ID_FechaAsignacion'] = df['ID_FechaAsignacion'].fillna(0).astype(int)
-    else:
-        logger.warning('hechos_asignaciones: dim_tiempo vacía, usando 0 como ID_FechaAsignacion')
-        df['ID_FechaAsignacion'] = 0
-    
-    # HorasPlanificadas y HorasReales: Extraídas directamente del SGP
-    df['HorasPlanificadas'] = pd.to_numeric(df['HorasPlanificadas'], errors='coerce').fillna(0)
-    df['HorasReales'] = pd.to_numeric(df['HorasReales'], errors='coerce').fillna(0)
+        return pd.DataFrame(columns=FACT_COLUMNS)
     
-    # ValorHoras: CostoPorHora × HorasReales
-    if not empleados.empty and 'CostoPorHora' in empleados.columns:
-        # Crear mapeo empleado -> costo por hora
-        emp_cost_map = empleados.set_index('ID_Empleado')['CostoPorHora'].to_dict()
-        
-        # Mapear costos y calcular valor
-        df['CostoPorHora'] = df['ID_Empleado'].map(emp_cost_map).fillna(0)
-        df['ValorHoras'] = df['HorasReales'] * df['CostoPorHora']
-    else:
-        df['ValorHoras'] = 0
-        logger.warning('hechos_asignaciones: No se pudo calcular ValorHoras')
+    published_chunk_size, published_workers = df_dict.get(CHUNKS_KEY, (DEFAULT_CHUNK_SIZE, 1))
+    chunk_size = chunk_size or published_chunk_size
+    workers = workers or published_workers
     
-    # Seleccionar columnas finales
-    result = df[[
-        'ID_HechoAsignacion', 'ID_Empleado', 'ID_Proyecto', 'ID_FechaAsignacion',
-        'HorasPlanificadas', 'HorasReales', 'ValorHoras'
-    ]].copy()
+    lotes = iter_chunks(asignaciones, chunk_size)
+    columnas = {}
+    inicio = 0
+    for parte in transform_chunks((('asignaciones', lote) for lote in lotes), empleados, dim_tiempo, workers):
+        fin = inicio + len(parte)
+        for column in FACT_COLUMNS:
+            values = parte[column].to_numpy()
+            if column not in columnas:
+                columnas[column] = np.empty(len(asignaciones), dtype=values.dtype)
+            elif values.dtype != columnas[column].dtype:
+                # Un lote con otro tipo (p. ej. sin tipar): se amplía la columna una vez
+                columnas[column] = columnas[column].astype(np.result_type(columnas[column].dtype, values.dtype))
+            columnas[column][inicio:fin] = values
+        inicio = fin
+    result = pd.DataFrame(columnas, columns=FACT_COLUMNS)
     
     # Log del resultado
     log_transform_info('hechos_asignaciones', len(asignaciones), len(result))
     
-    return result
\ No newline at end of file
+    return result
@@ -1,6 +1,7 @@
 import pandas as pd
+import numpy as np
 import logging
-from typing import Dict
+from typing import Dict, Optional
 import sys
 import os
 
@@ -8,198 +9,165 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
 from transform.common import ensure_df, log_transform_info
+from transform.project_state import ProjectAggregates, PROJECT_STATE_KEY
+from transform.sharding import fold_sharded, PROJECT_SHARDS_KEY
+from transform.date_keys import get_date_key_resolver
+from utils.key_registry import get_key_registry
 
 logger = logging.getLogger(__name__)
 
+FACT_COLUMNS = [
+    'ID_Hecho', 'ID_Proyecto', 'ID_TiempoInicio', 'ID_TiempoFinalizacion',
+    'ID_Riesgo', 'ID_Finanza', 'DuracionRealDias', 'RetrasoDias',
+    'PresupuestoCliente', 'CosteReal', 'DesviacionPresupuestal',
+    'PenalizacionesMonto', 'ProporcionCAPEX_OPEX', 'NumeroDefectosEncontrados',
+    'ProductividadPromedio', 'PorcentajeTareasRetrasadas', 'PorcentajeHitosRetrasados'
+]
+
 def get_dependencies():
     return ['proyectos', 'contratos', 'errores', 'asignaciones', 'hitos', 'tareas', 'gastos', 'penalizaciones', 'riesgos', 'dim_tiempo', 'dim_proyectos']
 
-def calculate_project_metrics(proyecto_id: int, df_dict: Dict[str, pd.DataFrame]) -> Dict: 
-    # Obtener datos principales
-    proyectos = df_dict.get('proyectos', pd.DataFrame())
-    contratos = df_dict.get('contratos', pd.DataFrame())
-    gastos = df_dict.get('gastos', pd.DataFrame())
-    penalizaciones = df_dict.get('penalizaciones', pd.DataFrame())
-    riesgos = df_dict.get('riesgos', pd.DataFrame())
-    dim_tiempo = df_dict.get('dim_tiempo', pd.DataFrame())
-    
-    proyecto_data = proyectos[proyectos['ID_Proyecto'] == proyecto_id]
-    
-    if proyecto_data.empty:
-        return None
-    
-    proyecto = proyecto_data.iloc[0]
-    
-    # Inicializar métricas
-    metrics = {
-        'ID_Hecho': 0,  # Se asignará después
-        'ID_Proyecto': proyecto_id,
-        'ID_TiempoInicio': 0,
-        'ID_TiempoFinalizacion': 0,
-        'ID_Riesgo': 0,
-        'ID_Finanza': 0,
-        'DuracionRealDias': 0,
-        'RetrasoDias': 0,  # Eliminada según especificaciones
-        'PresupuestoCliente': 0.0,
-        'CosteReal': 0.0,
-        'DesviacionPresupuestal': 0.0,
-        'PenalizacionesMonto': 0.0,
-        'ProporcionCAPEX_OPEX': 0.0,
-        'NumeroDefectosEncontrados': 0,
-        'ProductividadPromedio': 0.0,
-        'PorcentajeTareasRetrasadas': 0.0,
-        'PorcentajeHitosRetrasados': 0.0
+def get_source_columns():
+    """Columnas de las tablas origen que lee esta transformación"""
+    return {
+        'proyectos': ['ID_Proyecto', 'ID_Contrato', 'FechaInicio', 'FechaFin', 'ValorTotalContrato'],
+        'hitos': ['ID_Proyecto', 'FechaFinPlanificada', 'FechaFinReal'],
+        'tareas': ['ID_Proyecto', 'DuracionPlanificada', 'DuracionReal'],
+        'asignaciones': ['ID_Proyecto', 'ID_Empleado'],
+        'errores': ['ID_Proyecto'],
+        'riesgos': ['ID_Riesgo', 'ID_Proyecto'],
+        'gastos': ['ID_Gasto', 'ID_Proyecto', 'TipoGasto', 'Categoria', 'Monto'],
+        'penalizaciones': ['ID_Contrato', 'Monto'],
     }
+
+def calculate_projects_metrics(proyecto_ids, df_dict: Dict[str, pd.DataFrame],
+                               estado: Optional[ProjectAggregates] = None,
+                               shards: int = 1, shard_method: str = 'hash') -> pd.DataFrame:
+    """
+    Métricas de proyectos a partir de las tablas crudas
+
+    Las filas de df_dict (extracción completa de sus proyectos) se pliegan
+    sobre el estado agregado por proyecto (transform/project_state.py) y las
+    métricas se derivan de ese estado.
+
+    Args:
+        proyecto_ids: proyectos de dim_proyectos, en el orden en que se generan los hechos
+        df_dict: tablas crudas más dim_tiempo
+        estado: estado acumulado sobre el que sumar (por defecto uno vacío)
+        shards: procesos entre los que se reparten los proyectos (transform/sharding.py)
+        shard_method: reparto por 'hash' o por 'range' de ID_Proyecto
+
+    Returns:
+        DataFrame con una fila por proyecto válido (ID_Hecho sin asignar)
+    """
+    if estado is None:
+        estado = ProjectAggregates()
+    if shards > 1:
+        fold_sharded(estado, df_dict, shards, shard_method, columns=get_source_columns())
+    else:
+        estado.fold(df_dict, complete=True)
+    return metrics_from_state(estado, proyecto_ids, ensure_df(df_dict.get('dim_tiempo', pd.DataFrame())))
+
+def metrics_from_state(estado: ProjectAggregates, proyecto_ids, dim_tiempo: pd.DataFrame) -> pd.DataFrame:
+    """
+    Derivar las métricas (ratios incluidos) del estado agregado por proyecto
+
+    Args:
+        estado: sumas, conteos y fechas por proyecto
+        proyecto_ids: proyectos a calcular, en el orden en que se generan los hechos
+        dim_tiempo: calendario para las claves de fecha
+
+    Returns:
+        DataFrame con una fila por proyecto válido del estado (ID_Hecho sin asignar)
+    """
+    # Solo proyectos vistos en la tabla origen y presentes en dim_proyectos
+    validos = estado.proyectos.index[estado.proyectos['Valido'].astype(bool)]
+    ids = pd.Index(proyecto_ids, name='ID_Proyecto')
+    ids = ids[ids.isin(validos)]
+    proyecto = estado.proyectos.reindex(ids)
+    
+    metrics = pd.DataFrame(index=ids)
     
     # === FECHAS Y DURACIÓN ===
-    try:
-        fecha_inicio = pd.to_datetime(proyecto['FechaInicio'])
-        fecha_fin = pd.to_datetime(proyecto['FechaFin'])
-        
-        if pd.notna(fecha_inicio) and pd.notna(fecha_fin):
-            metrics['DuracionRealDias'] = (fecha_fin - fecha_inicio).days
-            
-            # Calcular RetrasoDias basado en duración planificada de hitos
-            hitos_proyecto = df_dict.get('hitos', pd.DataFrame())
-            if not hitos_proyecto.empty:
-                hitos_del_proyecto = hitos_proyecto[hitos_proyecto['ID_Proyecto'] == proyecto_id]
-                if not hitos_del_proyecto.empty:
-                    # Usar el rango de fechas planificadas de hitos como referencia
-                    fechas_planificadas = pd.to_datetime(hitos_del_proyecto['FechaFinPlanificada'], errors='coerce')
-                    fechas_reales = pd.to_datetime(hitos_del_proyecto['FechaFinReal'], errors='coerce')
-                    
-                    if fechas_planificadas.notna().any() and fechas_reales.notna().any():
-                        # Calcular la fecha fin planificada máxima de hitos
-                        fecha_fin_planificada_proyecto = fechas_planificadas.max()
-                        if pd.notna(fecha_fin_planificada_proyecto):
-                            duracion_planificada = (fecha_fin_planificada_proyecto - fecha_inicio).days
-                            metrics['RetrasoDias'] = max(0, metrics['DuracionRealDias'] - duracion_planificada)
-            
-            # Mapear fechas a dim_tiempo
-            if not dim_tiempo.empty:
-                dim_tiempo['Fecha_date'] = pd.to_datetime(dim_tiempo['Fecha']).dt.date
-                fecha_tiempo_map = dim_tiempo.set_index('Fecha_date')['ID_Tiempo'].to_dict()
-                
-                metrics['ID_TiempoInicio'] = fecha_tiempo_map.get(fecha_inicio.date(), 0)
-                metrics['ID_TiempoFinalizacion'] = fecha_tiempo_map.get(fecha_fin.date(), 0)
-    except:
-        pass
+    fecha_inicio = pd.to_datetime(proyecto['FechaInicio'])
+    fecha_fin = pd.to_datetime(proyecto['FechaFin'])
+    con_fechas = fecha_inicio.notna() & fecha_fin.notna()
+    duracion = (fecha_fin - fecha_inicio).dt.days.where(con_fechas, 0).astype(int)
+    metrics['DuracionRealDias'] = duracion
+    
+    # RetrasoDias: duración real menos la planificada hasta el último hito
+    # (solo si el proyecto tiene hitos con fecha fin planificada y real)
+    fin_planificada_proyecto = pd.to_datetime(proyecto['FinPlanificadaMax'])
+    duracion_planificada = (fin_planificada_proyecto - fecha_inicio).dt.days
+    aplica = con_fechas & fin_planificada_proyecto.notna() & (proyecto['HitosConFinReal'] > 0)
+    metrics['RetrasoDias'] = (duracion - duracion_planificada).clip(lower=0).where(aplica, 0).astype(int)
+    
+    # PorcentajeHitosRetrasados: hitos con FechaFinReal posterior a la planificada
+    metrics['PorcentajeHitosRetrasados'] = (proyecto['HitosRetrasados'] / proyecto['Hitos'] * 100).fillna(0.0)
+    
+    # Mapear fechas a dim_tiempo (un único resolver para todos los proyectos)
+    metrics['ID_TiempoInicio'] = 0
+    metrics['ID_TiempoFinalizacion'] = 0
+    if not dim_tiempo.empty:
+        resolver = get_date_key_resolver(dim_tiempo)
+        metrics['ID_TiempoInicio'] = np.where(con_fechas, resolver.resolve(fecha_inicio, missing=0), 0)
+        metrics['ID_TiempoFinalizacion'] = np.where(con_fechas, resolver.resolve(fecha_fin, missing=0), 0)
     
     # === PRESUPUESTO Y COSTOS ===
     # PresupuestoCliente desde el proyecto directamente (ValorTotalContrato está duplicado aquí)
-    metrics['PresupuestoCliente'] = float(proyecto.get('ValorTotalContrato', 0) or 0)
+    metrics['PresupuestoCliente'] = proyecto['ValorTotalContrato'].astype(float)
     
-    # CosteReal: CALCULAR sumando todos los gastos del proyecto
+    # === FINANZAS (sumas de gastos y penalizaciones del estado) ===
+    # CosteReal: suma de todos los gastos del proyecto
     # (El generador de datos dejó todos los costos reales en 0, así que calculamos desde gastos)
-    gastos_proyecto = gastos[gastos['ID_Proyecto'] == proyecto_id] if not gastos.empty else pd.DataFrame()
-    if not gastos_proyecto.empty:
-        metrics['CosteReal'] = float(gastos_proyecto['Monto'].sum())
-    else:
-        metrics['CosteReal'] = 0.0
+    metrics['CosteReal'] = proyecto['Gastos'].astype(float)
+    
+    # ID_Finanza: primer gasto del proyecto como referencia
+    metrics['ID_Finanza'] = proyecto['ID_Finanza'].astype(int)
+    
+    # ProporcionCAPEX_OPEX desde gastos del proyecto (inf si solo hay CAPEX)
+    capex, opex = proyecto['CAPEX'], proyecto['OPEX']
+    proporcion = pd.Series(0.0, index=ids)
+    proporcion[capex > 0] = float('inf')
+    con_opex = opex > 0
+    proporcion[con_opex] = capex[con_opex] / opex[con_opex]
+    metrics['ProporcionCAPEX_OPEX'] = proporcion
     
     # DesviacionPresupuestal: CORREGIDO - Presupuesto menos Costo Real
     # (positivo = ahorro, negativo = sobrecosto)
     metrics['DesviacionPresupuestal'] = metrics['PresupuestoCliente'] - metrics['CosteReal']
     
-    # === FINANZAS (usar tablas originales gastos y penalizaciones) ===
-    # ID_Finanza: usar el primer gasto del proyecto como referencia
-    gastos_proyecto = gastos[gastos['ID_Proyecto'] == proyecto_id] if not gastos.empty else pd.DataFrame()
-    if not gastos_proyecto.empty:
-        metrics['ID_Finanza'] = gastos_proyecto['ID_Gasto'].iloc[0]  # Primera transacción como referencia
-        
-        # PenalizacionesMonto: desde gastos del proyecto (case insensitive)
-        penalizaciones_gastos = gastos_proyecto[gastos_proyecto['TipoGasto'].str.lower().str.contains('penalizacion', na=False)]
-        monto_penalizaciones_gastos = penalizaciones_gastos['Monto'].sum() if not penalizaciones_gastos.empty else 0.0
-        
-        # También agregar penalizaciones directas por contrato del proyecto
-        proyecto_data = proyectos[proyectos['ID_Proyecto'] == proyecto_id]
-        if not proyecto_data.empty and not penalizaciones.empty:
-            id_contrato = proyecto_data['ID_Contrato'].iloc[0]
-            penalizaciones_contrato = penalizaciones[penalizaciones['ID_Contrato'] == id_contrato]
-            monto_penalizaciones_contrato = penalizaciones_contrato['Monto'].sum() if not penalizaciones_contrato.empty else 0.0
-        else:
-            monto_penalizaciones_contrato = 0.0
-            
-        metrics['PenalizacionesMonto'] = monto_penalizaciones_gastos + monto_penalizaciones_contrato
-        
-        # ProporcionCAPEX_OPEX desde gastos del proyecto
-        capex_total = gastos_proyecto[gastos_proyecto['Categoria'].str.upper() == 'CAPEX']['Monto'].sum()
-        opex_total = gastos_proyecto[gastos_proyecto['Categoria'].str.upper() == 'OPEX']['Monto'].sum()
-        
-        if opex_total > 0:
-            metrics['ProporcionCAPEX_OPEX'] = float(capex_total / opex_total)
-        elif capex_total > 0:
-            metrics['ProporcionCAPEX_OPEX'] = float('inf')  # Solo CAPEX
-        else:
-            metrics['ProporcionCAPEX_OPEX'] = 0.0
-    else:
-        # Si no hay gastos, buscar penalizaciones por contrato
-        proyecto_data = proyectos[proyectos['ID_Proyecto'] == proyecto_id]
-        if not proyecto_data.empty and not penalizaciones.empty:
-            id_contrato = proyecto_data['ID_Contrato'].iloc[0]
-            penalizaciones_contrato = penalizaciones[penalizaciones['ID_Contrato'] == id_contrato]
-            metrics['PenalizacionesMonto'] = penalizaciones_contrato['Monto'].sum() if not penalizaciones_contrato.empty else 0.0
+    # PenalizacionesMonto: gastos de penalización (case insensitive) más
+    # penalizaciones directas por contrato del proyecto
+    penalizaciones_contrato = proyecto['ID_Contrato'].map(estado.contratos['Penalizaciones']).fillna(0.0)
+    metrics['PenalizacionesMonto'] = proyecto['GastosPenalizacion'].astype(float) + penalizaciones_contrato
     
-    # === RIESGOS (usar tabla original riesgos) ===
-    if not riesgos.empty:
-        riesgo_proyecto = riesgos[riesgos['ID_Proyecto'] == proyecto_id]
-        if not riesgo_proyecto.empty:
-            metrics['ID_Riesgo'] = riesgo_proyecto['ID_Riesgo'].iloc[0]
-        else:
-            metrics['ID_Riesgo'] = 1  # Default si no hay riesgos específicos
+    # === RIESGOS ===
+    # Primer riesgo del proyecto; 1 por defecto si el proyecto no tiene riesgos
+    # (0 si no hay ningún riesgo cargado)
+    primer_riesgo = proyecto['ID_Riesgo'].astype(int)
+    hay_riesgos = bool((estado.proyectos['ID_Riesgo'] > 0).any())
+    metrics['ID_Riesgo'] = primer_riesgo.where(primer_riesgo > 0, 1) if hay_riesgos else 0
     
     # === DEFECTOS ===
-    errores = df_dict.get('errores', pd.DataFrame())
-    if not errores.empty:
-        errores_proyecto = errores[errores['ID_Proyecto'] == proyecto_id]
-        metrics['NumeroDefectosEncontrados'] = len(errores_proyecto)
+    metrics['NumeroDefectosEncontrados'] = proyecto['Errores'].astype(int)
     
     # === PRODUCTIVIDAD ===
-    asignaciones = df_dict.get('asignaciones', pd.DataFrame())
-    if not asignaciones.empty:
-        asig_proyecto = asignaciones[asignaciones['ID_Proyecto'] == proyecto_id]
-        if not asig_proyecto.empty:
-            empleados_unicos = asig_proyecto['ID_Empleado'].nunique()
-            if empleados_unicos > 0 and metrics['DuracionRealDias'] > 0:
-                metrics['ProductividadPromedio'] = float(metrics['DuracionRealDias'] / empleados_unicos)
+    # Días de duración por empleado distinto asignado
+    empleados_unicos = pd.Series(estado.employees(ids), index=ids)
+    aplica = (empleados_unicos > 0) & (duracion > 0)
+    metrics['ProductividadPromedio'] = (duracion / empleados_unicos).where(aplica, 0.0).astype(float)
     
     # === PORCENTAJE TAREAS RETRASADAS ===
-    tareas = df_dict.get('tareas', pd.DataFrame())
-    if not tareas.empty:
-        tareas_proyecto = tareas[tareas['ID_Proyecto'] == proyecto_id]
-        if not tareas_proyecto.empty:
-            total_tareas = len(tareas_proyecto)
-            # Calcular RetrasoDias = DuracionReal - DuracionPlanificada
-            tareas_con_retraso = 0
-            for _, tarea in tareas_proyecto.iterrows():
-                duracion_real = pd.to_numeric(tarea.get('DuracionReal', 0), errors='coerce') or 0
-                duracion_plan = pd.to_numeric(tarea.get('DuracionPlanificada', 0), errors='coerce') or 0
-                retraso_dias = duracion_real - duracion_plan
-                if retraso_dias > 0:
-                    tareas_con_retraso += 1
-            
-            metrics['PorcentajeTareasRetrasadas'] = (tareas_con_retraso / total_tareas) * 100 if total_tareas > 0 else 0.0
+    # RetrasoDias = DuracionReal - DuracionPlanificada (sin dato = no retrasada)
+    metrics['PorcentajeTareasRetrasadas'] = (proyecto['TareasRetrasadas'] / proyecto['Tareas'] * 100).fillna(0.0)
     
-    # === PORCENTAJE HITOS RETRASADOS ===
-    hitos = df_dict.get('hitos', pd.DataFrame())
-    if not hitos.empty:
-        hitos_proyecto = hitos[hitos['ID_Proyecto'] == proyecto_id]
-        if not hitos_proyecto.empty:
-            total_hitos = len(hitos_proyecto)
-            # Calcular retraso de hitos similar a tareas
-            hitos_con_retraso = 0
-            for _, hito in hitos_proyecto.iterrows():
-                fecha_fin_real = pd.to_datetime(hito.get('FechaFinReal'), errors='coerce')
-                fecha_fin_plan = pd.to_datetime(hito.get('FechaFinPlanificada'), errors='coerce')
-                
-                if pd.notna(fecha_fin_real) and pd.notna(fecha_fin_plan):
-                    retraso_dias = (fecha_fin_real - fecha_fin_plan).days
-                    if retraso_dias > 0:
-                        hitos_con_retraso += 1
-            
-            metrics['PorcentajeHitosRetrasados'] = (hitos_con_retraso / total_hitos) * 100 if total_hitos > 0 else 0.0
-    
-    return metrics
+    return metrics.reset_index()
+
+def build_facts(metrics: pd.DataFrame) -> pd.DataFrame:
+    """Asignar ID_Hecho (estable por proyecto) y ordenar las columnas"""
+    ids = get_key_registry().assign('hechos_proyectos', metrics['ID_Proyecto'])
+    return metrics.assign(ID_Hecho=ids)[FACT_COLUMNS]
 
 def transform(df_dict: Dict[str, pd.DataFrame]) -> pd.DataFrame:
     # Usar dim_proyectos para garantizar integridad referencial
@@ -208,49 +176,24 @@ def transform(df_dict: Dict[str, pd.DataFrame]) -> pd.DataFrame:
     
     if dim_proyectos.empty:
         logger.warning('hechos_proyectos: No hay datos de dim_proyectos')
-        return pd.DataFrame(columns=[
-            'ID_Hecho', 'ID_Proyecto', 'ID_TiempoInicio', 'ID_TiempoFinalizacion',
-            'ID_Riesgo', 'ID_Finanza', 'DuracionRealDias', 'RetrasoDias',
-            'PresupuestoCliente', 'CosteReal', 'DesviacionPresupuestal',
-            'PenalizacionesMonto', 'ProporcionCAPEX_OPEX', 'NumeroDefectosEncontrados',
-            'ProductividadPromedio', 'PorcentajeTareasRetrasadas', 'PorcentajeHitosRetrasados'
-        ])
+        return pd.DataFrame(columns=FACT_COLUMNS)
     
     # Calcular métricas SOLO para proyectos válidos de dim_proyectos
-    hechos_data = []
-    hecho_id = 1
-    
     logger.info(f'hechos_proyectos: Procesando {len(dim_proyectos)} proyectos válidos de dim_proyectos')
     
-    for proyecto_id in dim_proyectos['ID_Proyecto'].unique():
-        metrics = calculate_project_metrics(proyecto_id, df_dict)
-        if metrics:  # Solo agregar si se calcularon las métricas
-            metrics['ID_Hecho'] = hecho_id
-            hechos_data.append(metrics)
-            hecho_id += 1
+    # Estado publicado por run_etl_complete para guardarlo después (o uno vacío)
+    # y shards publicados por run_transformations
+    shards, shard_method = df_dict.get(PROJECT_SHARDS_KEY, (1, 'hash'))
+    result = calculate_projects_metrics(dim_proyectos['ID_Proyecto'].unique(), df_dict,
+                                        estado=df_dict.get(PROJECT_STATE_KEY),
+                                        shards=shards, shard_method=shard_method)
     
-    if not hechos_data:
+    if result.empty:
         logger.warning('hechos_proyectos: No se pudieron calcular métricas para ningún proyecto')
-        return pd.DataFrame(columns=[
-            'ID_Hecho', 'ID_Proyecto', 'ID_TiempoInicio', 'ID_TiempoFinalizacion',
-            'ID_Riesgo', 'ID_Finanza', 'DuracionRealDias', 'RetrasoDias',
-            'PresupuestoCliente', 'CosteReal', 'DesviacionPresupuestal',
-            'PenalizacionesMonto', 'ProporcionCAPEX_OPEX', 'NumeroDefectosEncontrados',
-            'ProductividadPromedio', 'PorcentajeTareasRetrasadas', 'PorcentajeHitosRetrasados'
-        ])
-    
-    result = pd.DataFrame(hechos_data)
-    
-    # Reordenar columnas según especificaciones
-    columnas_ordenadas = [
-        'ID_Hecho', 'ID_Proyecto', 'ID_TiempoInicio', 'ID_TiempoFinalizacion',
-        'ID_Riesgo', 'ID_Finanza', 'DuracionRealDias', 'RetrasoDias',
-        'PresupuestoCliente', 'CosteReal', 'DesviacionPresupuestal',
-        'PenalizacionesMonto', 'ProporcionCAPEX_OPEX', 'NumeroDefectosEncontrados',
-        'ProductividadPromedio', 'PorcentajeTareasRetrasadas', 'PorcentajeHitosRetrasados'
-    ]
+        return pd.DataFrame(columns=FACT_COLUMNS)
     
-    result = result[columnas_ordenadas]
+    # Clave subrogada estable por proyecto y columnas según especificaciones
+    result = build_facts(result)
     
     log_transform_info('hechos_proyectos', len(proyectos), len(result))
-    return result
\ No newline at end of file
+    return result
@@ -0,0 +1,51 @@
+"""
+Calendario persistente de dim_tiempo
+Guarda el calendario ya cargado en el DW como Parquet para que cada ejecución
+solo agregue los días nuevos en lugar de regenerarlo y recargarlo completo.
+Los ID_Tiempo existentes no cambian nunca; los días nuevos reciben IDs a
+continuación del máximo.
+"""
+
+import os
+import logging
+from typing import Optional
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CALENDAR_PATH = "logs/dim_tiempo.parquet"
+
+# Clave bajo la que run_transformations publica en df_dict el calendario de la ejecución
+CALENDAR_KEY = '_calendario'
+
+class CalendarStore:
+    """Clase para leer y guardar el calendario persistente"""
+
+    def __init__(self, path: str = DEFAULT_CALENDAR_PATH):
+        self.path = path
+
+    def load(self) -> Optional[pd.DataFrame]:
+        """Calendario guardado (None si todavía no existe)"""
+        if not os.path.exists(self.path):
+            return None
+        try:
+            return pd.read_parquet(self.path)
+        except Exception as e:
+            logger.warning(f"No se pudo leer el calendario {self.path}: {str(e)}")
+            return None
+
+    def save(self, calendario: pd.DataFrame):
+        """Guardar el calendario completo (escritura atómica)"""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        calendario.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, self.path)
+        logger.info(f"Calendario guardado en {self.path} ({len(calendario)} días)")
+
+    def clear(self):
+        """Eliminar el calendario (solo si también se vacía dim_tiempo en el DW)"""
+        if os.path.exists(self.path):
+            os.remove(self.path)
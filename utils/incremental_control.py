@@ -1,17 +1,20 @@
 """
 Control de Carga Incremental para ETL
-Maneja las fechas de última extracción para evitar duplicados
+Maneja las fechas de última extracción y las marcas de agua por tabla
+para evitar duplicados
 """
 
 import json
 import os
 from datetime import datetime
-from typing import Optional
+from typing import Optional, Dict, Any
+
+DEFAULT_CONTROL_PATH = "logs/incremental_control.json"
 
 class IncrementalControl:
     """Clase para manejar control incremental"""
     
-    def __init__(self, control_file_path: str = "logs/incremental_control.json"):
+    def __init__(self, control_file_path: str = DEFAULT_CONTROL_PATH):
         self.control_file = control_file_path
         self._ensure_control_file_exists()
     
@@ -21,6 +24,7 @@ class IncrementalControl:
             os.makedirs(os.path.dirname(self.control_file), exist_ok=True)
             initial_data = {
                 "last_extraction": "1900-01-01 00:00:00",
+                "watermarks": {},
                 "extractions_history": []
             }
             with open(self.control_file, 'w') as f:
@@ -63,6 +67,32 @@ class IncrementalControl:
         with open(self.control_file, 'w') as f:
             json.dump(data, f, indent=2)
     
+    def get_watermarks(self) -> Dict[str, Any]:
+        """Obtener marcas de agua por tabla ({tabla: PK máxima o fecha})"""
+        try:
+            with open(self.control_file, 'r') as f:
+                data = json.load(f)
+                return data.get("watermarks", {})
+        except Exception:
+            return {}
+    
+    def get_watermark(self, table_name: str) -> Optional[Any]:
+        """Obtener la marca de agua de una tabla (None = nunca extraída)"""
+        return self.get_watermarks().get(table_name)
+    
+    def update_watermarks(self, watermarks: Dict[str, Any]):
+        """Guardar marcas de agua por tabla (las tablas no incluidas se conservan)"""
+        try:
+            with open(self.control_file, 'r') as f:
+                data = json.load(f)
+        except Exception:
+            data = {"extractions_history": []}
+        
+        data.setdefault("watermarks", {}).update(watermarks)
+        
+        with open(self.control_file, 'w') as f:
+            json.dump(data, f, indent=2)
+    
     def get_incremental_filter(self, date_column: str = "fecha_modificacion") -> str:
         """Generar filtro SQL para carga incremental"""
         last_date = self.get_last_extraction_date()
@@ -71,4 +101,10 @@ class IncrementalControl:
     def reset_control(self):
         """Resetear control (para carga completa)"""
         self.update_last_extraction_date("1900-01-01 00:00:00")
+        
+        with open(self.control_file, 'r') as f:
+            data = json.load(f)
+        data["watermarks"] = {}
+        with open(self.control_file, 'w') as f:
+            json.dump(data, f, indent=2)
         print("🔄 Control incremental reseteado - próxima extracción será completa")
\ No newline at end of file
@@ -0,0 +1,123 @@
+"""
+Registro persistente de claves subrogadas del DW
+Asigna a cada clave natural (p. ej. el nombre de un tipo de riesgo o el
+ID_Asignacion del SGP) una clave subrogada estable entre ejecuciones: las
+entidades ya vistas conservan su ID y las nuevas reciben el siguiente.
+Así dimensiones y hechos se pueden insertar/actualizar por PK en lugar de
+vaciarse y reconstruirse con IDs 1..N derivados del orden de los datos.
+
+Cada dimensión se guarda como Parquet (clave natural, ID) en logs/surrogate_keys/
+(o en la carpeta de estado de la ejecución, ver reset_key_registry) y se mantiene en memoria como un pd.Index (tabla hash) para resolver
+columnas completas con get_indexer.
+"""
+
+import os
+import threading
+import logging
+from typing import Dict, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_KEYS_DIR = "logs/surrogate_keys"
+
+def normalize_natural_keys(values: pd.Series) -> pd.Series:
+    """Claves naturales como texto ('5' y 5.0 son la misma clave)"""
+    if pd.api.types.is_float_dtype(values) and (values == values.round()).all():
+        values = values.astype('int64')
+    return values.astype(str)
+
+class SurrogateKeyRegistry:
+    """Clave natural -> clave subrogada por dimensión, persistente"""
+
+    def __init__(self, keys_dir: str = DEFAULT_KEYS_DIR):
+        self.keys_dir = keys_dir
+        self._lock = threading.Lock()
+        self._keys: Dict[str, Tuple[pd.Index, np.ndarray]] = {}
+        self._dirty = set()
+
+    def _path(self, dimension: str) -> str:
+        return os.path.join(self.keys_dir, f"{dimension}.parquet")
+
+    def _get(self, dimension: str) -> Tuple[pd.Index, np.ndarray]:
+        if dimension not in self._keys:
+            path = self._path(dimension)
+            if os.path.exists(path):
+                df = pd.read_parquet(path)
+                self._keys[dimension] = (pd.Index(df['clave'].astype(str)), df['id'].to_numpy(dtype=np.int64))
+            else:
+                self._keys[dimension] = (pd.Index([], dtype=object), np.empty(0, dtype=np.int64))
+        return self._keys[dimension]
+
+    def assign(self, dimension: str, natural_keys) -> np.ndarray:
+        """
+        Claves subrogadas de una columna de claves naturales
+
+        Las claves nuevas reciben IDs consecutivos a partir del máximo
+        registrado, en orden de primera aparición (la primera ejecución
+        produce 1..N igual que antes).
+
+        Args:
+            dimension: tabla del DW (p. ej. 'dim_finanzas')
+            natural_keys: Series/arreglo de claves naturales
+
+        Returns:
+            arreglo de IDs alineado con natural_keys (0 para claves nulas)
+        """
+        values = pd.Series(natural_keys).reset_index(drop=True)
+        valid = values.notna().to_numpy()
+        claves = normalize_natural_keys(values[valid])
+
+        with self._lock:
+            index, ids = self._get(dimension)
+            pos = index.get_indexer(claves)
+            nuevas = pd.unique(claves[pos < 0])
+            if len(nuevas):
+                next_id = int(ids.max()) + 1 if len(ids) else 1
+                index = index.append(pd.Index(nuevas, dtype=object))
+                ids = np.concatenate([ids, np.arange(next_id, next_id + len(nuevas), dtype=np.int64)])
+                self._keys[dimension] = (index, ids)
+                self._dirty.add(dimension)
+                pos = index.get_indexer(claves)
+                logger.debug(f"{dimension}: {len(nuevas)} claves nuevas desde {next_id}")
+
+        result = np.zeros(len(values), dtype=np.int64)
+        result[valid] = ids[pos]
+        return result
+
+    def save(self):
+        """Guardar las dimensiones con claves nuevas (escritura atómica)"""
+        with self._lock:
+            if not self._dirty:
+                return
+            os.makedirs(self.keys_dir, exist_ok=True)
+            for dimension in sorted(self._dirty):
+                index, ids = self._keys[dimension]
+                path = self._path(dimension)
+                pd.DataFrame({'clave': index.astype(str), 'id': ids}).to_parquet(f"{path}.tmp", index=False)
+                os.replace(f"{path}.tmp", path)
+            logger.info(f"Claves subrogadas guardadas: {', '.join(sorted(self._dirty))}")
+            self._dirty.clear()
+
+_registry_lock = threading.Lock()
+_registry = None
+
+def get_key_registry() -> SurrogateKeyRegistry:
+    """Registro compartido por todas las transformaciones del proceso"""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = SurrogateKeyRegistry()
+        return _registry
+
+def reset_key_registry(keys_dir: str = DEFAULT_KEYS_DIR) -> SurrogateKeyRegistry:
+    """
+    Empezar una ejecución con el registro de keys_dir: descarta el que está en
+    memoria, que puede ser de otro origen/DW (p. ej. una ejecución local previa)
+    """
+    global _registry
+    with _registry_lock:
+        _registry = SurrogateKeyRegistry(keys_dir)
+        return _registry
@@ -0,0 +1,51 @@
+"""
+Proyectos pendientes de recalcular en hechos_proyectos
+Las marcas de agua avanzan al terminar la extracción; si después falla el
+recálculo o la carga de los proyectos afectados por el delta, sus filas ya
+no se volverían a extraer. Por eso el conjunto se guarda antes de
+recalcular y se borra solo cuando los hechos quedaron cargados en el DW.
+"""
+
+import json
+import os
+import logging
+from typing import List, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PENDING_PATH = "logs/pending_projects.json"
+
+class PendingProjectsStore:
+    """Clase para leer y guardar los proyectos/contratos pendientes"""
+
+    def __init__(self, path: str = DEFAULT_PENDING_PATH):
+        self.path = path
+
+    def load(self) -> Tuple[List[int], List[int]]:
+        """(proyectos, contratos) pendientes de una ejecución anterior"""
+        if not os.path.exists(self.path):
+            return [], []
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+            return data.get("proyectos", []), data.get("contratos", [])
+        except Exception as e:
+            logger.warning(f"No se pudo leer {self.path}: {str(e)}")
+            return [], []
+
+    def save(self, proyecto_ids, contrato_ids):
+        """Guardar el conjunto completo (escritura atómica)"""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        data = {"proyectos": sorted(int(i) for i in proyecto_ids),
+                "contratos": sorted(int(i) for i in contrato_ids)}
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.path)
+
+    def clear(self):
+        """Eliminar el conjunto (los hechos ya están en el DW)"""
+        if os.path.exists(self.path):
+            os.remove(self.path)
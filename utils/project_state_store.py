@@ -0,0 +1,92 @@
+"""
+Estado agregado persistente de hechos_proyectos
+Guarda como Parquet las tablas del estado por proyecto (sumas, conteos,
+fechas), por contrato (penalizaciones) y los empleados distintos (pares
+proyecto-empleado o registros HyperLogLog), para que la siguiente ejecución
+incremental solo sume el delta. Junto al estado se guardan las marcas de
+agua del último delta sumado: un delta solo se suma si parte de ellas.
+"""
+
+import json
+import os
+import logging
+from typing import Any, Dict, Optional
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STATE_DIR = "logs/project_state"
+
+class ProjectStateStore:
+    """Clase para leer y guardar el estado agregado por proyecto"""
+
+    def __init__(self, state_dir: str = DEFAULT_STATE_DIR):
+        self.state_dir = state_dir
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.state_dir, f"{name}.parquet")
+
+    @property
+    def _watermarks_path(self) -> str:
+        return os.path.join(self.state_dir, "watermarks.json")
+
+    def _names(self) -> list:
+        if not os.path.isdir(self.state_dir):
+            return []
+        return [name[:-len('.parquet')] for name in sorted(os.listdir(self.state_dir)) if name.endswith('.parquet')]
+
+    def load(self, required=('proyectos', 'contratos')) -> Optional[Dict[str, pd.DataFrame]]:
+        """Todas las tablas del estado (None si todavía no existe o está incompleto)"""
+        names = self._names()
+        if not all(name in names for name in required):
+            return None
+        try:
+            return {name: pd.read_parquet(self._path(name)) for name in names}
+        except Exception as e:
+            logger.warning(f"No se pudo leer el estado de {self.state_dir}: {str(e)}")
+            return None
+
+    def load_watermarks(self) -> Optional[Dict[str, Any]]:
+        """Marcas de agua de la última extracción sumada al estado (None si no se conocen)"""
+        if not os.path.exists(self._watermarks_path):
+            return None
+        try:
+            with open(self._watermarks_path, 'r') as f:
+                return json.load(f)
+        except Exception as e:
+            logger.warning(f"No se pudo leer {self._watermarks_path}: {str(e)}")
+            return None
+
+    def save(self, tables: Dict[str, pd.DataFrame], watermarks: Optional[Dict[str, Any]] = None):
+        """
+        Guardar todas las tablas del estado (escritura atómica por tabla)
+
+        Args:
+            watermarks: marcas de agua de la última extracción sumada (None = desconocidas)
+        """
+        os.makedirs(self.state_dir, exist_ok=True)
+        for name, df in tables.items():
+            path = self._path(name)
+            df.to_parquet(f"{path}.tmp", index=False)
+            os.replace(f"{path}.tmp", path)
+        # Tablas de otro modo de conteo (empleados / empleados_hll) ya no corresponden
+        for name in self._names():
+            if name not in tables:
+                os.remove(self._path(name))
+        if watermarks is None:
+            if os.path.exists(self._watermarks_path):
+                os.remove(self._watermarks_path)
+        else:
+            with open(f"{self._watermarks_path}.tmp", 'w') as f:
+                json.dump(watermarks, f)
+            os.replace(f"{self._watermarks_path}.tmp", self._watermarks_path)
+        logger.info(f"Estado de proyectos guardado en {self.state_dir} "
+                    f"({', '.join(f'{name}={len(df)}' for name, df in tables.items())})")
+
+    def clear(self):
+        """Eliminar el estado (la siguiente ejecución lo reconstruye)"""
+        for name in self._names():
+            os.remove(self._path(name))
+        if os.path.exists(self._watermarks_path):
+            os.remove(self._watermarks_path)
@@ -0,0 +1,51 @@
+"""
+Claves del alcance (proyectos/contratos cerrados o cancelados) de la última extracción
+Un proyecto o contrato puede cerrarse mucho después de su FechaFin o de su
+alta, así que ni la fecha ni la PK indican cuándo entró al alcance. Cada
+extracción incremental compara el alcance actual con estas claves y extrae
+completos los proyectos y contratos nuevos (SGPExtractor.extract_new_scope).
+"""
+
+import json
+import os
+import logging
+from typing import List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SCOPE_PATH = "logs/scope_keys.json"
+
+class ScopeKeysStore:
+    """Clase para leer y guardar las claves del alcance ya extraído"""
+
+    def __init__(self, path: str = DEFAULT_SCOPE_PATH):
+        self.path = path
+
+    def load(self) -> Optional[Tuple[List[int], List[int]]]:
+        """(proyectos, contratos) del alcance anterior, None si no hay claves guardadas"""
+        if not os.path.exists(self.path):
+            return None
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+            return data.get("proyectos", []), data.get("contratos", [])
+        except Exception as e:
+            logger.warning(f"No se pudo leer {self.path}: {str(e)}")
+            return None
+
+    def save(self, proyecto_ids, contrato_ids):
+        """Guardar el alcance completo (escritura atómica)"""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        data = {"proyectos": sorted(int(i) for i in proyecto_ids),
+                "contratos": sorted(int(i) for i in contrato_ids)}
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.path)
+
+    def clear(self):
+        """Eliminar las claves (la próxima extracción vuelve a ser completa)"""
+        if os.path.exists(self.path):
+            os.remove(self.path)
@@ -0,0 +1,214 @@
+"""
+Caché de snapshots de extracción
+Guarda cada tabla cruda extraída del SGP como Parquet comprimido para poder
+repetir transformación y carga sin volver a consultar el OLTP.
+También guarda los checkpoints de una extracción en curso para poder reanudarla.
+"""
+
+import json
+import os
+import shutil
+import threading
+import logging
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SNAPSHOT_DIR = "logs/snapshots"
+DEFAULT_CHECKPOINT_DIR = "logs/checkpoints"
+
+class SnapshotCache:
+    """Clase para guardar y recuperar snapshots de datos crudos"""
+
+    def __init__(self, cache_dir: str = DEFAULT_SNAPSHOT_DIR, keep_last: int = 3):
+        self.cache_dir = cache_dir
+        self.keep_last = keep_last
+
+    def _manifest_path(self, run_id: str) -> str:
+        return os.path.join(self.cache_dir, run_id, "manifest.json")
+
+    def save(self, data: Dict[str, pd.DataFrame], watermarks: Optional[Dict[str, Any]] = None,
+             incremental: bool = False, run_id: Optional[str] = None,
+             base_watermarks: Optional[Dict[str, Any]] = None) -> Optional[str]:
+        """
+        Guardar un snapshot (una carpeta por ejecución, un Parquet por tabla)
+
+        Args:
+            data: tablas crudas extraídas
+            watermarks: marcas de agua resultantes de la extracción
+            incremental: True si los datos son un delta (extracción con marcas de agua)
+            run_id: identificador de la ejecución (por defecto fecha y hora)
+            base_watermarks: marcas de agua desde las que se extrajo el delta
+
+        Returns:
+            run_id del snapshot o None si no se pudo guardar
+        """
+        run_id = run_id or datetime.now().strftime("%Y%m%d_%H%M%S")
+        run_dir = os.path.join(self.cache_dir, run_id)
+
+        try:
+            os.makedirs(run_dir, exist_ok=True)
+            tables = {}
+            for table_name, df in data.items():
+                df.to_parquet(os.path.join(run_dir, f"{table_name}.parquet"),
+                              compression="zstd", index=False)
+                tables[table_name] = len(df)
+        except ImportError as e:
+            logger.warning(f"Snapshot no guardado (instalar pyarrow): {str(e)}")
+            shutil.rmtree(run_dir, ignore_errors=True)
+            return None
+        except Exception as e:
+            logger.warning(f"Error guardando snapshot {run_id}: {str(e)}")
+            shutil.rmtree(run_dir, ignore_errors=True)
+            return None
+
+        manifest = {
+            "run_id": run_id,
+            "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "incremental": incremental,
+            "watermarks": watermarks or {},
+            "base_watermarks": base_watermarks or {},
+            "tables": tables
+        }
+        with open(self._manifest_path(run_id), 'w') as f:
+            json.dump(manifest, f, indent=2)
+
+        logger.info(f"Snapshot {run_id} guardado en {run_dir}")
+        self._prune()
+        return run_id
+
+    def list_snapshots(self) -> List[str]:
+        """Listar snapshots completos (con manifest), del más antiguo al más reciente"""
+        if not os.path.isdir(self.cache_dir):
+            return []
+        return sorted(
+            name for name in os.listdir(self.cache_dir)
+            if os.path.exists(self._manifest_path(name))
+        )
+
+    def get_manifest(self, run_id: Optional[str] = None) -> Dict[str, Any]:
+        """Leer el manifest de un snapshot (el más reciente si run_id es None)"""
+        run_id = run_id or self.latest()
+        if run_id is None:
+            return {}
+        with open(self._manifest_path(run_id), 'r') as f:
+            return json.load(f)
+
+    def latest(self) -> Optional[str]:
+        snapshots = self.list_snapshots()
+        return snapshots[-1] if snapshots else None
+
+    def load(self, run_id: Optional[str] = None) -> Dict[str, pd.DataFrame]:
+        """Cargar todas las tablas de un snapshot (el más reciente si run_id es None)"""
+        manifest = self.get_manifest(run_id)
+        if not manifest:
+            logger.warning(f"No hay snapshots en {self.cache_dir}")
+            return {}
+
+        run_dir = os.path.join(self.cache_dir, manifest["run_id"])
+        data = {}
+        for table_name in manifest["tables"]:
+            data[table_name] = pd.read_parquet(os.path.join(run_dir, f"{table_name}.parquet"))
+
+        logger.info(f"Snapshot {manifest['run_id']} cargado: {len(data)} tablas")
+        return data
+
+    def _prune(self):
+        """Mantener solo los últimos keep_last snapshots"""
+        for run_id in self.list_snapshots()[:-self.keep_last]:
+            shutil.rmtree(os.path.join(self.cache_dir, run_id), ignore_errors=True)
+            logger.debug(f"Snapshot {run_id} eliminado")
+
+class ExtractionCheckpoint:
+    """
+    Checkpoint de una extracción en curso: cada unidad completada (tabla o
+    rango de PK de una tabla grande) se guarda como Parquet junto con su
+    número de filas y su marca de agua. Si la extracción falla, la siguiente
+    ejecución con los mismos parámetros reutiliza las unidades guardadas.
+    """
+
+    def __init__(self, checkpoint_dir: str = DEFAULT_CHECKPOINT_DIR):
+        self.checkpoint_dir = checkpoint_dir
+        self.state = {}
+        self._lock = threading.Lock()
+
+    @property
+    def _state_path(self) -> str:
+        return os.path.join(self.checkpoint_dir, "checkpoint.json")
+
+    def _unit_path(self, unit_id: str) -> str:
+        return os.path.join(self.checkpoint_dir, f"{unit_id}.parquet")
+
+    def _write_state(self):
+        tmp_path = self._state_path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.state, f, indent=2)
+        os.replace(tmp_path, self._state_path)
+
+    def read(self) -> Dict[str, Any]:
+        """Leer el estado guardado sin modificarlo ({} si no hay checkpoint)"""
+        if not os.path.exists(self._state_path):
+            return {}
+        with open(self._state_path, 'r') as f:
+            return json.load(f)
+
+    def open(self, params: Dict[str, Any]) -> int:
+        """
+        Abrir el checkpoint para una extracción con los parámetros dados.
+        Un checkpoint de otra extracción (otras marcas de agua o modo) se descarta.
+
+        Returns:
+            número de unidades ya completadas
+        """
+        state = self.read()
+        if state:
+            if state.get("params") == params:
+                self.state = state
+                return len(self.state["units"])
+            logger.info("Checkpoint de una extracción distinta descartado")
+            self.clear()
+
+        os.makedirs(self.checkpoint_dir, exist_ok=True)
+        self.state = {
+            "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "params": params,
+            "ranges": {},
+            "units": {}
+        }
+        self._write_state()
+        return 0
+
+    def is_complete(self, unit_id: str) -> bool:
+        return unit_id in self.state.get("units", {})
+
+    def get_ranges(self, table_name: str) -> Optional[List[List[int]]]:
+        """Rangos de PK planificados para una tabla (se reutilizan al reanudar)"""
+        return self.state.get("ranges", {}).get(table_name)
+
+    def set_ranges(self, table_name: str, ranges: List) -> None:
+        with self._lock:
+            self.state["ranges"][table_name] = [list(r) for r in ranges]
+            self._write_state()
+
+    def save_unit(self, unit_id: str, table_name: str, df: pd.DataFrame, watermark: Any = None):
+        """Guardar una unidad completada (primero el Parquet, luego el estado)"""
+        df.to_parquet(self._unit_path(unit_id), compression="zstd", index=False)
+        with self._lock:
+            self.state["units"][unit_id] = {
+                "table": table_name,
+                "rows": len(df),
+                "watermark": watermark,
+                "saved_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            }
+            self._write_state()
+
+    def load_unit(self, unit_id: str) -> pd.DataFrame:
+        return pd.read_parquet(self._unit_path(unit_id))
+
+    def clear(self):
+        """Eliminar el checkpoint (extracción terminada o descartada)"""
+        shutil.rmtree(self.checkpoint_dir, ignore_errors=True)
+        self.state = {}